@@ -18,6 +18,10 @@ class Settings(BaseSettings):
 
     # Database settings
     database_url: str = "sqlite:///./app.db"
+    # Upgrade the schema when the app starts. With several workers or
+    # replicas set this to false and run `python -m app.db.migrate` once
+    # per deploy instead
+    run_migrations_on_startup: bool = True
 
     # Google OAuth settings
     google_client_id: Optional[str] = None
@@ -40,6 +44,7 @@ class Settings(BaseSettings):
     groq_api_key: Optional[str] = None
     groq_model: str = "llama-3.3-70b-versatile"
     groq_temperature: float = 0.7
+    groq_fast_model: str = "llama-3.1-8b-instant"  # titles and short follow-ups
     llama_vision_model: str = (
         "meta-llama/llama-4-maverick-17b-128e-instruct"  # For image processing
     )
@@ -52,10 +57,113 @@ class Settings(BaseSettings):
     ]
     max_tokens: int = 4000
 
+    # LLM backend: "groq", "fake" (local and deterministic, for load tests),
+    # "record" (groq, saving each reply) or "replay" (saved replies only)
+    llm_backend: str = "groq"
+    llm_recordings_dir: str = "llm_recordings"
+    llm_fake_latency_ms: float = 400.0  # median time to first token
+    llm_fake_latency_sigma: float = 0.5  # log-normal spread; 0 for fixed
+    llm_fake_tokens_per_second: float = 80.0  # median generation rate
+    llm_fake_tokens_per_second_sigma: float = 0.2
+    llm_fake_reply_tokens: int = 150
+    llm_fake_seed: int = 0
+
+    # Groq call admission (per model): concurrency, quota pacing, retries
+    llm_text_max_concurrency: int = 8
+    llm_text_requests_per_minute: int = 30  # 0 disables pacing
+    llm_text_tokens_per_minute: int = 12000  # prompt tokens; 0 disables
+    llm_fast_max_concurrency: int = 8
+    llm_fast_requests_per_minute: int = 30
+    llm_fast_tokens_per_minute: int = 6000
+    llm_vision_max_concurrency: int = 4
+    llm_vision_requests_per_minute: int = 30
+    llm_vision_tokens_per_minute: int = 0
+    llm_timeout_seconds: float = 60.0  # per call; per chunk when streaming
+    llm_max_retries: int = 3  # on 429, 5xx, connection errors and timeouts
+    llm_retry_base_delay: float = 0.5
+    llm_retry_max_delay: float = 8.0
+    llm_circuit_failure_threshold: int = 5  # consecutive failures to open
+    llm_circuit_reset_seconds: float = 30.0
+
+    # Model routing: cheap tasks to groq_fast_model, answers to groq_model
+    llm_routing_enabled: bool = True
+    llm_fast_tasks: list = ["title"]  # always sent to the fast model
+    llm_fast_message_max_tokens: int = 12  # short follow-ups go fast...
+    llm_fast_message_pattern: str = (  # ...when made only of these phrases
+        r"^(\s*(thanks?( you)?|ok(ay)?|got it|great|cool|hi|hello|hey|yes|no|sure|please|"
+        r"what do you mean|i don'?t understand|can you (clarify|rephrase)( that| it)?|"
+        r"(explain|say) (that|it) (again|more simply|simpler))[\s,.!?]*)+$"
+    )
+    llm_latency_slo_ms: float = 8000.0  # p95 first token / call time
+    llm_fast_latency_slo_ms: float = 3000.0
+    llm_routing_window_seconds: float = 300.0
+    llm_routing_min_samples: int = 5
+
+    # How often assistant routes check whether the client is still there
+    client_disconnect_poll_seconds: float = 0.5
+
+    # Upload ingestion: read in chunks, spooled to disk above the threshold
+    upload_chunk_bytes: int = 64 * 1024
+    upload_spool_bytes: int = 1024 * 1024
+    upload_spool_dir: Optional[str] = None  # system temp directory
+    max_model_file_size: int = 500 * 1024 * 1024  # classifier model uploads
+
+    # Conversation context sent with each chat message (tokens)
+    context_token_budget: int = 6000  # capped by the model's context window
+    context_summary_max_tokens: int = 600  # rolling summary of older turns
+    context_file_analysis_max_tokens: int = 800  # per file analysis message
+
+    # Assistant reply cache for stateless or short-context prompts
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 1000
+    llm_cache_ttl_seconds: int = 6 * 3600
+    llm_cache_max_context_tokens: int = 0  # 0 caches only chat-less prompts
+    llm_cache_near_duplicates: bool = False  # also match similar wording
+    llm_cache_similarity_threshold: float = 0.9
+
+    # Analyses of uploaded files, keyed by a SHA-256 of the file bytes
+    file_cache_enabled: bool = True
+    file_cache_max_entries: int = 500
+    file_cache_ttl_seconds: int = 24 * 3600
+    file_worker_threads: int = 4  # PDF/image decoding off the event loop
+
+    # Images sent to the vision model
+    image_max_side: int = 1024
+    image_jpeg_quality: int = 80
+
+    # Large PDFs: parallel page extraction, then map-reduce summarization
+    pdf_worker_processes: int = 2  # 0 extracts in the file worker threads
+    pdf_pages_per_task: int = 8
+    pdf_max_pages: int = 100
+    pdf_max_text_tokens: int = 60000
+    pdf_chunk_tokens: int = 3000
+    pdf_summary_concurrency: int = 3
+
     # ML Models storage settings (Railway volume mounted at /app/backend/classifiers)
     # Root directory in Railway is /backend, so paths are relative to /app/backend
     ml_models_path: str = "classifiers"  # Will be /app/backend/classifiers in Railway
 
+    # Upload-time model profiling (runs in a sandboxed subprocess)
+    model_profile_timeout: int = 120  # seconds before the profiler is killed
+    model_profile_memory_limit_mb: int = 2048  # address-space cap for the profiler
+    model_profile_batch_size: int = 100
+    # Activation is refused when a profiled model exceeds any of these ceilings
+    model_max_load_time: float = 10.0  # seconds, cold load of all artifacts
+    model_max_predict_latency: float = 0.5  # seconds, single-row predict
+    model_max_batch_latency: float = 5.0  # seconds, batch predict
+    model_max_memory_mb: float = 512.0  # memory footprint of the loaded model
+
+    # Denormalized counters are recomputed from the source tables this often
+    counter_reconcile_interval_hours: float = 6.0  # 0 disables the job
+
+    # Log files are written by a background thread in each process. With
+    # several uvicorn workers, run `python -m app.core.log_writer` and set
+    # this to its "host:port" so one process owns the files and rotation
+    log_writer_address: str = ""
+    # "text" (the human-readable lines) or "json" (one object per line with
+    # request_id and structured fields, for log ingestion)
+    log_format: str = "text"
+
     # Supabase storage
     supabase_url: Optional[str] = None
     supabase_service_role_key: Optional[str] = None
@@ -0,0 +1,71 @@
+"""
+Log writer process for multi-worker deployments
+
+Each uvicorn worker writes its own log files by default, so with several
+workers the midnight rotation races between processes. Instead, start one
+writer next to the workers and point them at it:
+
+    python -m app.core.log_writer --port 9020
+    LOG_WRITER_ADDRESS=127.0.0.1:9020 uvicorn app.main:app --workers 4
+
+The workers still queue records on the request path and print them to
+stdout from their listener thread; their listener sends each record to
+this process (length-prefixed JSON), which alone writes and rotates the
+files in classifiers/logs.
+"""
+
+import argparse
+import json
+import logging
+import socketserver
+import struct
+
+from app.core.logging import LOG_DIR, LogWriter
+
+
+class _RecordStreamHandler(socketserver.StreamRequestHandler):
+    """Reads the records sent by one worker's listener."""
+
+    def handle(self):
+        while True:
+            header = self.rfile.read(4)
+            if len(header) < 4:
+                break
+            (length,) = struct.unpack(">L", header)
+            data = self.rfile.read(length)
+            if len(data) < length:
+                break
+            record = logging.makeLogRecord(json.loads(data))
+            self.server.writer.handle(record)
+
+
+class LogWriterServer(socketserver.ThreadingTCPServer):
+    """Accepts worker connections and writes their records to one set of files."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, host: str, port: int, writer: LogWriter):
+        super().__init__((host, port), _RecordStreamHandler)
+        self.writer = writer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9020)
+    args = parser.parse_args()
+
+    writer = LogWriter(LOG_DIR)
+    with LogWriterServer(args.host, args.port, writer) as server:
+        print(f"📝 Writing logs to {LOG_DIR} from {args.host}:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            writer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,54 +1,251 @@
+import atexit
+import copy
+import json
 import logging
+import queue
+import struct
 import sys
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterator, Optional
 import functools
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, SocketHandler, TimedRotatingFileHandler
+from app.core.config import settings
 from app.utils.helpers import get_client_ip
 
+LOG_DIR = Path("classifiers/logs")
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_FORMATS = ("text", "json")
 
-def setup_logging():
-    """Setup logging configuration with main app log for common events"""
+# Id of the request being handled, set by LoggingMiddleware and carried
+# into background work (see request_context)
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
 
-    # Create logs directory if it doesn't exist
-    log_dir = Path("classifiers/logs")
-    log_dir.mkdir(parents=True, exist_ok=True)
-
-    # Create main app log file handler (for common/basic logs)
-    main_file_handler = TimedRotatingFileHandler(
-        log_dir / "app.log",
-        when="midnight",  # Rotate at midnight
-        interval=1,  # Every 1 day
-        backupCount=30,  # Keep 30 days of logs
-        encoding="utf-8",
-    )
-    main_file_handler.suffix = "%Y-%m-%d"
-    main_file_handler.setFormatter(
-        logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-    )
 
-    # Console handler for all logs
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(
-        logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-    )
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+def get_request_id() -> Optional[str]:
+    """The id of the request this code runs for, if any."""
+    return _request_id.get()
+
+
+@contextmanager
+def request_context(request_id: Optional[str]) -> Iterator[None]:
+    """
+    Tag the logs written inside the block with a request id.
+
+    Background tasks and worker threads do not always inherit the request's
+    context, so work started by a request passes its id along and enters
+    this context. None keeps the current id.
+    """
+    if request_id is None:
+        yield
+        return
+    token = _request_id.set(request_id)
+    try:
+        yield
+    finally:
+        _request_id.reset(token)
+
+
+# Keys every JSON log line owns; structured fields cannot replace them
+_JSON_KEYS = ("ts", "level", "logger", "msg", "request_id", "exc")
+
+
+def _add_fields(entry: Dict[str, Any], fields: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Add caller fields to a log entry without overwriting its own keys.
+
+    A field named like one of _JSON_KEYS or a key the entry already has
+    (such as action or success) is written as "field_<name>" instead.
+    """
+    for key, value in fields.items():
+        entry[f"field_{key}" if key in entry or key in _JSON_KEYS else key] = value
+    return entry
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One flat JSON object per line: ts (epoch seconds), level, logger, msg,
+    request_id, the record's structured fields, and exc for tracebacks.
+    Fields named like those keys are prefixed (see _add_fields).
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        _add_fields(entry, getattr(record, "fields", None) or {})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _formatter() -> logging.Formatter:
+    """The formatter for settings.log_format."""
+    if settings.log_format not in LOG_FORMATS:
+        raise ValueError(f"LOG_FORMAT must be one of {', '.join(LOG_FORMATS)}, not {settings.log_format!r}")
+    if settings.log_format == "json":
+        return JsonFormatter()
+    return logging.Formatter(LOG_FORMAT)
+
+
+class LogWriter(logging.Handler):
+    """
+    Writes records to the log file of the logger that queued them.
+
+    Each feature gets its own daily-rotated file, opened on its first
+    record. Runs on the queue listener's thread, or in the log writer
+    process (app.core.log_writer) when several workers share the files.
+    """
+
+    def __init__(self, log_dir: Path = LOG_DIR):
+        super().__init__()
+        self.log_dir = log_dir
+        self.files: Dict[str, TimedRotatingFileHandler] = {}
+
+    def _file(self, name: str) -> TimedRotatingFileHandler:
+        name = Path(name).name or "app"  # Names may arrive over the network
+        if name not in self.files:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            handler = TimedRotatingFileHandler(
+                self.log_dir / f"{name}.log",
+                when="midnight",  # Rotate at midnight
+                interval=1,  # Every 1 day
+                backupCount=30,  # Keep 30 days of logs
+                encoding="utf-8",
+            )
+            handler.suffix = "%Y-%m-%d"
+            handler.setFormatter(_formatter())
+            self.files[name] = handler
+        return self.files[name]
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self._file(getattr(record, "log_file", "app")).handle(record)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        for handler in self.files.values():
+            handler.close()
+        super().close()
+
+
+class _FeatureQueueHandler(QueueHandler):
+    """Queues a logger's records, tagged with the log file they belong in."""
+
+    _exc_formatter = logging.Formatter()
+
+    def __init__(self, log_queue: queue.SimpleQueue, log_file: str):
+        super().__init__(log_queue)
+        self.log_file = log_file
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The message, traceback and request id are resolved on the calling
+        # thread; the listener only formats the line and writes it
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        record.stack_info = None
+        record.log_file = self.log_file
+        record.request_id = _request_id.get()
+        return record
+
+
+class _LogWriterSocketHandler(SocketHandler):
+    """Sends records to the log writer process as length-prefixed JSON."""
+
+    def makePickle(self, record: logging.LogRecord) -> bytes:
+        data = json.dumps(
+            {
+                "name": record.name,
+                "levelname": record.levelname,
+                "levelno": record.levelno,
+                "msg": record.getMessage(),
+                "created": record.created,
+                "msecs": record.msecs,
+                "exc_text": record.exc_text,
+                "log_file": getattr(record, "log_file", "app"),
+                "request_id": getattr(record, "request_id", None),
+                "fields": getattr(record, "fields", None),
+            },
+            default=str,
+        ).encode("utf-8")
+        return struct.pack(">L", len(data)) + data
+
+
+def _file_sink() -> logging.Handler:
+    """Local log files, or the shared log writer process if one is configured."""
+    if settings.log_writer_address:
+        host, port = settings.log_writer_address.rsplit(":", 1)
+        return _LogWriterSocketHandler(host, int(port))
+    return LogWriter()
+
+
+# Loggers only enqueue records; a background thread formats them and does
+# the console and file I/O, so request handlers never wait on the disk
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_listener: Optional[QueueListener] = None
+
+
+def _queue_handler(log_file: str) -> QueueHandler:
+    return _FeatureQueueHandler(_log_queue, log_file)
+
+
+def start_log_listener() -> QueueListener:
+    """Start the background thread that writes queued log records."""
+    global _listener
+    if _listener is None:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(_formatter())
+        _listener = QueueListener(_log_queue, console_handler, _file_sink())
+        _listener.start()
+        atexit.register(stop_log_listener)
+    return _listener
+
+
+def stop_log_listener():
+    """Write out the records still queued and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def setup_logging():
+    """Setup logging configuration with main app log for common events"""
+    start_log_listener()
 
     # Configure root logging for common logs
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.INFO)
 
-    # Create main app logger for basic/common logs
+    # Create main app logger for basic/common logs (app.log and console)
     app_logger = logging.getLogger("app")
-    app_logger.addHandler(main_file_handler)
-    app_logger.addHandler(console_handler)
+    app_logger.addHandler(_queue_handler("app"))
     app_logger.setLevel(logging.INFO)
     app_logger.propagate = False  # Don't propagate to root
 
     # API middleware logger (goes to main app.log)
     api_logger = logging.getLogger("api")
-    api_logger.addHandler(main_file_handler)
-    api_logger.addHandler(console_handler)
+    api_logger.addHandler(_queue_handler("app"))
     api_logger.setLevel(logging.INFO)
     api_logger.propagate = False
 
@@ -74,31 +271,8 @@ def get_logger(name: str) -> logging.Logger:
 
     # Don't add handlers if already configured
     if not logger.handlers:
-        log_dir = Path("classifiers/logs")
-        log_dir.mkdir(parents=True, exist_ok=True)
-
-        # Create feature-specific file handler
-        file_handler = TimedRotatingFileHandler(
-            log_dir / f"{name}.log",
-            when="midnight",
-            interval=1,
-            backupCount=30,  # Keep 30 days for each feature
-            encoding="utf-8",
-        )
-        file_handler.suffix = "%Y-%m-%d"
-        file_handler.setFormatter(
-            logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-        )
-
-        # Console handler for this feature
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setFormatter(
-            logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-        )
-
-        # Add handlers to the logger
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        # Records go through the queue to logs/{name}.log and the console
+        logger.addHandler(_queue_handler(name))
         logger.setLevel(logging.INFO)
         logger.propagate = False  # Don't propagate to root logger
 
@@ -153,11 +327,54 @@ def log_endpoint_activity(
 
     message = " | ".join(parts)
 
+    # The same details as fields, for the JSON log format
+    fields = {"action": action, "user": user_email, "ip": ip_address, "success": success}
+    if additional_info:
+        _add_fields(fields, additional_info)
+
     # Log with appropriate level
     if success:
-        logger.info(f"✅ {message}")
+        logger.info(f"✅ {message}", extra={"fields": fields})
     else:
-        logger.warning(f"❌ {message}")
+        logger.warning(f"❌ {message}", extra={"fields": fields})
+
+
+def _timing_fields(action: str, duration: float, success: bool, error: Optional[str] = None) -> dict:
+    fields = {"action": action, "duration_ms": round(duration * 1000, 1), "success": success}
+    if error is not None:
+        fields["error"] = error
+    return fields
+
+
+def log_endpoint_timing(
+    logger_name: str, action: str, duration: float, error: Optional[BaseException] = None
+):
+    """
+    Log how long an endpoint took, as track_endpoint_performance does.
+
+    For endpoints whose work outlives the handler, such as a streamed
+    response, call this when the work actually ends.
+
+    Args:
+        logger_name: Feature logger to write to
+        action: Endpoint action name
+        duration: Elapsed time in seconds
+        error: The exception it failed with, if any
+    """
+    logger = get_logger(logger_name)  # Feature-specific logger
+    if error is None:
+        logger.info(
+            f"✅ {action.title()} completed successfully in {duration:.3f}s",
+            extra={"fields": _timing_fields(action, duration, True)},
+        )
+        return
+
+    error_msg = str(error) if str(error) else f"{type(error).__name__}: {repr(error)}"
+    logger.error(
+        f"❌ {action.title()} failed after {duration:.3f}s - Error: {error_msg}",
+        extra={"fields": _timing_fields(action, duration, False, error_msg)},
+    )
+    logger.error("Full traceback:", exc_info=error)
 
 
 def track_endpoint_performance(logger_name: str, action: str):
@@ -178,7 +395,6 @@ def track_endpoint_performance(logger_name: str, action: str):
     def decorator(func):
         @functools.wraps(func)
         async def async_wrapper(*args, **kwargs):
-            logger = get_logger(logger_name)  # Feature-specific logger
             start_time = datetime.now()
 
             try:
@@ -187,25 +403,18 @@ def track_endpoint_performance(logger_name: str, action: str):
 
                 # Log success
                 duration = (datetime.now() - start_time).total_seconds()
-                logger.info(
-                    f"✅ {action.title()} completed successfully in {duration:.3f}s"
-                )
+                log_endpoint_timing(logger_name, action, duration)
 
                 return result
 
             except Exception as e:
                 # Log failure
                 duration = (datetime.now() - start_time).total_seconds()
-                error_msg = str(e) if str(e) else f"{type(e).__name__}: {repr(e)}"
-                logger.error(
-                    f"❌ {action.title()} failed after {duration:.3f}s - Error: {error_msg}"
-                )
-                logger.exception("Full traceback:")
+                log_endpoint_timing(logger_name, action, duration, e)
                 raise
 
         @functools.wraps(func)
         def sync_wrapper(*args, **kwargs):
-            logger = get_logger(logger_name)  # Feature-specific logger
             start_time = datetime.now()
 
             try:
@@ -214,20 +423,14 @@ def track_endpoint_performance(logger_name: str, action: str):
 
                 # Log success
                 duration = (datetime.now() - start_time).total_seconds()
-                logger.info(
-                    f"✅ {action.title()} completed successfully in {duration:.3f}s"
-                )
+                log_endpoint_timing(logger_name, action, duration)
 
                 return result
 
             except Exception as e:
                 # Log failure
                 duration = (datetime.now() - start_time).total_seconds()
-                error_msg = str(e) if str(e) else f"{type(e).__name__}: {repr(e)}"
-                logger.error(
-                    f"❌ {action.title()} failed after {duration:.3f}s - Error: {error_msg}"
-                )
-                logger.exception("Full traceback:")
+                log_endpoint_timing(logger_name, action, duration, e)
                 raise
 
         # Return appropriate wrapper based on function type
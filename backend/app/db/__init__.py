@@ -1,10 +1,22 @@
 # Database package
-from .connection import get_db, init_db, Base, engine, SessionLocal
+from .connection import (
+    get_db,
+    get_async_db,
+    init_db,
+    Base,
+    engine,
+    SessionLocal,
+    async_engine,
+    AsyncSessionLocal,
+)
 
 __all__ = [
     "get_db",
+    "get_async_db",
     "init_db", 
     "Base",
     "engine",
     "SessionLocal",
+    "async_engine",
+    "AsyncSessionLocal",
 ]
\ No newline at end of file
@@ -1,8 +1,35 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
+# Async drivers used for each sync backend
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(database_url: str):
+    """Map a sync database URL onto the matching async driver."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+
+    # asyncpg takes 'ssl' rather than libpq's 'sslmode'
+    if backend == "postgresql" and "sslmode" in url.query:
+        query = dict(url.query)
+        query["ssl"] = query.pop("sslmode")
+        url = url.set(query=query)
+
+    return url
+
+
 # Create database engine
 engine = create_engine(
     settings.database_url, pool_size=5, max_overflow=10, pool_pre_ping=True, echo=False
@@ -11,6 +38,20 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for async routers, so queries don't block the event loop
+async_engine = create_async_engine(
+    get_async_database_url(settings.database_url),
+    pool_size=5,
+    max_overflow=10,
+    pool_pre_ping=True,
+    echo=False,
+)
+
+# Objects stay usable after commit: lazy refreshes can't run outside the loop
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # Create base class for models
 Base = declarative_base()
 
@@ -24,13 +65,14 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Async database dependency for FastAPI async routes."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
-    """Initialize database tables."""
-    # Import all models here to ensure they are registered with SQLAlchemy
-    from app.models import user  # noqa: F401
-    from app.models import disease  # noqa: F401
-    from app.models import classifier  # noqa: F401
-    from app.models import blog  # noqa: F401
-
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
+    """Bring the database schema up to date (see app.db.migrate)."""
+    from app.db.migrate import upgrade_database
+
+    upgrade_database(engine)
@@ -1,12 +1,12 @@
 """
 Database initialization and utilities
+
+The schema is brought up to date by the application's startup event
+(app.main), not when this module is imported.
 """
 from app.db.connection import init_db, get_db, Base, engine, SessionLocal
 from app.models.user import User
 
-# Initialize the database when this module is imported
-init_db()
-
 __all__ = [
     "init_db",
     "get_db", 
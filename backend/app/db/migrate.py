@@ -0,0 +1,114 @@
+"""
+Schema migrations
+
+The schema is owned by the Alembic revisions in app/migrations/versions.
+On startup the database is brought up to the latest revision:
+
+- Empty database: tables are created from the models and stamped at head,
+  since the revision chain starts from tables that already exist.
+- Database created by create_all before migrations were tracked: stamped
+  at LEGACY_BASELINE_REVISION, then upgraded.
+- Tracked database: upgraded to head.
+
+With several API workers or replicas, run the upgrade once as a deploy
+step and turn it off at startup (RUN_MIGRATIONS_ON_STARTUP=false):
+    python -m app.db.migrate
+On PostgreSQL concurrent upgrades are also serialized by an advisory lock,
+so workers that do migrate on startup wait for the first one and then
+find the schema at head.
+"""
+
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.logging import app_logger
+from app.db.connection import Base
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+ALEMBIC_INI = BACKEND_DIR / "alembic.ini"
+
+# Schema that create_all produced before the migration pipeline existed
+LEGACY_BASELINE_REVISION = "add_classifier_metadata"
+
+# pg_advisory_xact_lock key held while migrating ("projx-mg")
+MIGRATION_LOCK_KEY = 0x70726F6A782D6D67
+
+
+def import_models():
+    """Import every model module so all tables are registered on Base."""
+    from app.models import user  # noqa: F401
+    from app.models import chat  # noqa: F401
+    from app.models import message  # noqa: F401
+    from app.models import disease  # noqa: F401
+    from app.models import classifier  # noqa: F401
+    from app.models import diagnosis  # noqa: F401
+    from app.models import notification  # noqa: F401
+    from app.models import blog  # noqa: F401
+    from app.models import counter  # noqa: F401
+
+
+def get_alembic_config(connection: Connection = None) -> Config:
+    """
+    Build the Alembic config, optionally bound to an open connection.
+
+    Args:
+        connection: Connection for env.py to run on instead of its own engine
+
+    Returns:
+        Config: Alembic configuration for app/migrations
+    """
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(BACKEND_DIR / "app" / "migrations"))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def get_current_revision(connection: Connection):
+    """Return the revision the database is stamped at, or None."""
+    return MigrationContext.configure(connection).get_current_revision()
+
+
+def upgrade_database(engine: Engine) -> None:
+    """
+    Bring the database schema up to the latest migration.
+
+    Args:
+        engine: Engine for the database to migrate
+    """
+    import_models()
+
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            # Released when this transaction ends
+            connection.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY}
+            )
+        config = get_alembic_config(connection)
+        current = get_current_revision(connection)
+
+        if current is None and not inspect(connection).get_table_names():
+            Base.metadata.create_all(bind=connection)
+            command.stamp(config, "head")
+            app_logger.info("🗄️ Created database schema and stamped it at head")
+            return
+
+        if current is None:
+            app_logger.warning(
+                f"⚠️ Untracked database schema, assuming {LEGACY_BASELINE_REVISION}"
+            )
+            command.stamp(config, LEGACY_BASELINE_REVISION)
+
+        command.upgrade(config, "head")
+        app_logger.info(f"🗄️ Database schema at {get_current_revision(connection)}")
+
+
+if __name__ == "__main__":
+    from app.db.connection import engine
+
+    upgrade_database(engine)
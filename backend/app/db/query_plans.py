@@ -0,0 +1,197 @@
+"""
+EXPLAIN check for hot queries
+
+Builds the first-page query of each hot list endpoint the same way its
+service does, asks the database for the plan, and reports any query that
+doesn't read from its index or still needs a sort step.
+
+Run against the configured database (e.g. in CI after migrations):
+    python -m app.db.query_plans
+"""
+
+import sys
+from dataclasses import dataclass
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection, Engine
+
+PAGE_SIZE = 20
+
+
+@dataclass
+class HotQuery:
+    """A hot query and the index that should answer it."""
+
+    name: str
+    index: str
+    statement: object
+
+
+@dataclass
+class PlanCheck:
+    """Outcome of checking one hot query's plan."""
+
+    name: str
+    index: str
+    plan: List[str]
+    uses_index: bool
+    sorts: bool
+
+    @property
+    def ok(self) -> bool:
+        return self.uses_index and not self.sorts
+
+
+def get_hot_queries() -> List[HotQuery]:
+    """Hot queries, built with the services' own filters and keysets."""
+    from app.db.migrate import import_models
+    from app.models.chat import Chat
+    from app.models.diagnosis import Diagnosis
+    from app.models.message import Message
+    from app.models.notification import Notification
+    from app.services.chat_service import ChatService
+    from app.services.diagnosis_service import DiagnosisService
+    from app.services.notification_service import NotificationService
+    from app.utils.pagination import apply_keyset
+
+    import_models()
+
+    return [
+        HotQuery(
+            "user diagnoses",
+            "ix_diagnoses_user_id_created_at",
+            apply_keyset(
+                select(Diagnosis).filter(Diagnosis.user_id == 1),
+                DiagnosisService.LIST_KEYS,
+                PAGE_SIZE,
+            ),
+        ),
+        HotQuery(
+            "user notifications",
+            "ix_notifications_user_id_created_at",
+            apply_keyset(
+                select(Notification).filter(Notification.user_id == 1),
+                NotificationService.LIST_KEYS,
+                PAGE_SIZE,
+            ),
+        ),
+        HotQuery(
+            "unread notifications",
+            "ix_notifications_user_id_unread",
+            apply_keyset(
+                select(Notification).filter(
+                    Notification.user_id == 1, Notification.is_read == False
+                ),
+                NotificationService.LIST_KEYS,
+                PAGE_SIZE,
+            ),
+        ),
+        HotQuery(
+            "chat messages",
+            "ix_messages_chat_id_created_at",
+            apply_keyset(
+                select(Message).filter(Message.chat_id == 1),
+                ChatService.MESSAGE_KEYS,
+                PAGE_SIZE,
+            ),
+        ),
+        HotQuery(
+            "chat list",
+            "ix_chats_user_id_active_order",
+            apply_keyset(
+                select(Chat).filter(Chat.user_id == 1, Chat.is_archived == False),
+                ChatService.CHAT_LIST_KEYS,
+                PAGE_SIZE,
+            ),
+        ),
+    ]
+
+
+def explain(connection: Connection, statement) -> List[str]:
+    """
+    Return the database's plan for a statement, one line per step.
+
+    Args:
+        connection: Open connection (SQLite or PostgreSQL)
+        statement: SQLAlchemy select()
+
+    Returns:
+        List[str]: Plan lines
+    """
+    dialect = connection.dialect.name
+    sql = str(
+        statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+    )
+
+    if dialect == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+        return [row[-1] for row in rows]
+
+    if dialect == "postgresql":
+        # Small tables make sequential scans look cheapest; we want to know
+        # whether the index *can* answer the query
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        rows = connection.exec_driver_sql(f"EXPLAIN {sql}").fetchall()
+        return [row[0] for row in rows]
+
+    raise ValueError(f"EXPLAIN check not supported for dialect '{dialect}'")
+
+
+def _uses_index(plan: List[str], index: str) -> bool:
+    return any(
+        f"INDEX {index}" in line or f"using {index}" in line or f"on {index}" in line
+        for line in plan
+    )
+
+
+def _sorts(plan: List[str]) -> bool:
+    return any(
+        "USE TEMP B-TREE FOR ORDER BY" in line
+        or line.strip().lstrip("->").strip().startswith(("Sort ", "Incremental Sort"))
+        for line in plan
+    )
+
+
+def check_query_plans(engine: Engine) -> List[PlanCheck]:
+    """
+    Check that every hot query is answered from its index without a sort.
+
+    Args:
+        engine: Engine for a migrated database
+
+    Returns:
+        List[PlanCheck]: One result per hot query
+    """
+    results = []
+    with engine.connect() as connection:
+        for query in get_hot_queries():
+            with connection.begin():
+                plan = explain(connection, query.statement)
+            results.append(
+                PlanCheck(
+                    name=query.name,
+                    index=query.index,
+                    plan=plan,
+                    uses_index=_uses_index(plan, query.index),
+                    sorts=_sorts(plan),
+                )
+            )
+    return results
+
+
+def main() -> int:
+    from app.db.connection import engine
+
+    results = check_query_plans(engine)
+    for result in results:
+        status = "ok" if result.ok else "FAIL"
+        print(f"[{status}] {result.name} -> {result.index}")
+        for line in result.plan:
+            print(f"    {line}")
+
+    return 0 if all(result.ok for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
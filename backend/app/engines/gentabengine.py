@@ -17,7 +17,7 @@ Required files:
 import pandas as pd
 import joblib
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 
 class GeneralPredictor:
@@ -200,6 +200,38 @@ class GeneralPredictor:
                 "error": str(e),
             }
 
+    def predict_batch(self, input_rows: List[Dict[str, Any]]) -> List[str]:
+        """
+        Make predictions for several rows in a single model call.
+
+        Unlike predict(), errors are raised rather than returned so callers
+        (e.g. the upload-time profiler) can tell a broken model apart.
+
+        Args:
+            input_rows: List of dictionaries containing patient features
+
+        Returns:
+            List of predicted class names, one per input row
+        """
+        if self.model is None:
+            raise ValueError(f"{self.model_name} not loaded")
+
+        prepared_data = pd.concat(
+            [self._prepare_input(row) for row in input_rows], ignore_index=True
+        )
+
+        imputed_df = pd.DataFrame(
+            self.imputer.transform(prepared_data), columns=self.features
+        )
+        scaled_df = pd.DataFrame(
+            self.encoder.transform(imputed_df), columns=self.features
+        )
+
+        predictions = self.model.predict(scaled_df)
+        self.model.predict_proba(scaled_df)
+
+        return [self.class_mapping[p] for p in predictions]
+
 
 def load_model(
     model_dir: str,
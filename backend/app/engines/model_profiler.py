@@ -0,0 +1,212 @@
+"""
+model_profiler.py -
+Upload-time profiler for tabular model artifacts
+
+Loads a classifier directory (features.pkl, scaler.pkl, imputer.pkl, model.pkl,
+class.pkl) in a separate, resource-limited Python process and measures:
+
+- cold load time of all artifacts
+- single-row predict latency
+- batch predict latency
+- memory footprint (peak RSS growth while loading and predicting)
+
+The parent side (run_profile) never unpickles anything itself, so a broken,
+hanging or memory-hungry model cannot take the API worker down with it.
+
+Usage (child side, invoked by run_profile):
+    python -m app.engines.model_profiler <model_dir> --batch-size 100
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Windows - no rlimits, profile without a memory cap
+    resource = None
+
+# Directory that contains the "app" package, so "-m app.engines..." resolves
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MB."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def _sample_row(predictor) -> Dict[str, float]:
+    """
+    Build a synthetic input row for the model.
+
+    Uses the imputer's fitted statistics when available so the row looks like
+    a realistic patient, otherwise falls back to zeros.
+    """
+    statistics = getattr(predictor.imputer, "statistics_", None)
+    if statistics is not None and len(statistics) == len(predictor.features):
+        return {
+            feature: float(value)
+            for feature, value in zip(predictor.features, statistics)
+        }
+    return {feature: 0.0 for feature in predictor.features}
+
+
+def profile_model_dir(model_dir: str, batch_size: int = 100) -> Dict[str, Any]:
+    """
+    Profile a model directory in the current process.
+
+    This is the child side of run_profile() and should not be called from the
+    API process directly.
+
+    Args:
+        model_dir: Directory containing the model pickle files
+        batch_size: Number of rows for the batch predict measurement
+
+    Returns:
+        Dict with load_time, predict_latency, batch_latency (seconds),
+        batch_size and memory_mb
+    """
+    from app.engines.gentabengine import load_model
+
+    baseline_rss = _peak_rss_mb()
+
+    # Cold load - includes importing the model's library (sklearn, xgboost...)
+    start_time = time.perf_counter()
+    predictor = load_model(model_dir, "profile")
+    load_time = time.perf_counter() - start_time
+
+    row = _sample_row(predictor)
+
+    # Single-row predict (same path DiagnosisService uses)
+    start_time = time.perf_counter()
+    result = predictor.predict(row)
+    predict_latency = time.perf_counter() - start_time
+    if result["error"]:
+        raise ValueError(f"Predict failed: {result['error']}")
+
+    # Batch predict
+    start_time = time.perf_counter()
+    predictor.predict_batch([row] * batch_size)
+    batch_latency = time.perf_counter() - start_time
+
+    return {
+        "load_time": load_time,
+        "predict_latency": predict_latency,
+        "batch_latency": batch_latency,
+        "batch_size": batch_size,
+        "memory_mb": max(_peak_rss_mb() - baseline_rss, 0.0),
+    }
+
+
+def _limit_resources(memory_limit_mb: int):
+    """Return a preexec_fn that caps the child's address space."""
+
+    def apply_limits():
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    return apply_limits
+
+
+def run_profile(
+    model_dir: str,
+    timeout: int,
+    memory_limit_mb: int,
+    batch_size: int = 100,
+) -> Dict[str, Any]:
+    """
+    Profile a model directory in a sandboxed subprocess.
+
+    Args:
+        model_dir: Directory containing the model pickle files
+        timeout: Seconds before the profiling process is killed
+        memory_limit_mb: Address-space limit for the profiling process
+        batch_size: Number of rows for the batch predict measurement
+
+    Returns:
+        Dict with the profile numbers and an "error" key that is empty on
+        success and holds the failure reason otherwise
+    """
+    command = [
+        sys.executable,
+        "-m",
+        "app.engines.model_profiler",
+        str(model_dir),
+        "--batch-size",
+        str(batch_size),
+    ]
+
+    # Single-threaded BLAS keeps timings stable and thread stacks inside the cap
+    env = {
+        **os.environ,
+        "OMP_NUM_THREADS": "1",
+        "OPENBLAS_NUM_THREADS": "1",
+        "MKL_NUM_THREADS": "1",
+    }
+
+    preexec_fn: Optional[Any] = None
+    if resource is not None and memory_limit_mb:
+        preexec_fn = _limit_resources(memory_limit_mb)
+
+    try:
+        completed = subprocess.run(
+            command,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            cwd=str(BACKEND_DIR),
+            env=env,
+            preexec_fn=preexec_fn,
+        )
+    except subprocess.TimeoutExpired:
+        return {"error": f"Profiling timed out after {timeout}s"}
+
+    output_lines = completed.stdout.strip().splitlines()
+    if output_lines:
+        try:
+            return json.loads(output_lines[-1])
+        except json.JSONDecodeError:
+            pass
+
+    # No JSON result - the child was killed (e.g. OOM) or crashed hard
+    stderr_lines = completed.stderr.strip().splitlines()
+    reason = stderr_lines[-1] if stderr_lines else "no output"
+    return {
+        "error": f"Profiling process exited with code {completed.returncode}: {reason}"
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile tabular model artifacts")
+    parser.add_argument("model_dir", help="Directory containing the model files")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    try:
+        result = profile_model_dir(args.model_dir, args.batch_size)
+        result["error"] = ""
+        exit_code = 0
+    except MemoryError:
+        result = {"error": "Model exceeded the profiling memory limit"}
+        exit_code = 1
+    except Exception as e:
+        result = {"error": str(e) if str(e) else type(e).__name__}
+        exit_code = 1
+
+    print(json.dumps(result))
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
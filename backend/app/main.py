@@ -1,3 +1,6 @@
+import asyncio
+import sys
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import (
@@ -14,11 +17,10 @@ from app.routers import (
 )
 from app.core.config import settings
 from app.core.logging import app_logger
-from app.middleware.logging import LoggingMiddleware
-from app.db.connection import init_db
-
-# Initialize database
-init_db()
+from app.middleware.logging import REQUEST_ID_HEADER, LoggingMiddleware
+from app.db.connection import init_db, async_engine
+from app.services.counter_service import run_reconciliation_job
+from app.utils.pagination import NEXT_CURSOR_HEADER
 
 app = FastAPI(
     title=settings.app_name,
@@ -40,6 +42,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, REQUEST_ID_HEADER],
 )
 
 # Include routers
@@ -55,6 +58,48 @@ app.include_router(blog.router)
 app.include_router(logs.router)
 
 
+@app.on_event("startup")
+def run_database_migrations():
+    """Bring the database schema up to date before serving requests."""
+    if not settings.run_migrations_on_startup:
+        app_logger.info("🗄️ Skipping migrations on startup (run python -m app.db.migrate)")
+        return
+    init_db()
+
+
+@app.on_event("startup")
+async def start_counter_reconciliation():
+    """Repair drifted denormalized counters periodically."""
+    interval_hours = settings.counter_reconcile_interval_hours
+    if interval_hours > 0:
+        app.state.counter_reconciliation = asyncio.create_task(
+            run_reconciliation_job(interval_hours * 3600)
+        )
+
+
+@app.on_event("shutdown")
+def stop_counter_reconciliation():
+    """Stop the counter reconciliation job."""
+    task = getattr(app.state, "counter_reconciliation", None)
+    if task is not None:
+        task.cancel()
+
+
+@app.on_event("shutdown")
+def stop_file_workers():
+    """Stop the file processing worker threads."""
+    # The file processor is imported with the AI stack on first use
+    file_processor = sys.modules.get("app.services.file_processor")
+    if file_processor is not None:
+        file_processor.shutdown_file_workers()
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    """Release pooled async database connections."""
+    await async_engine.dispose()
+
+
 @app.get("/")
 def read_root():
     """Root endpoint."""
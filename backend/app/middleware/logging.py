@@ -1,36 +1,58 @@
+import re
 import time
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
+from app.core.logging import new_request_id, request_context
 from app.utils.helpers import get_client_ip
 import logging
 
+# Response header carrying the request id; a well-formed incoming one is kept
+REQUEST_ID_HEADER = "X-Request-ID"
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
 class LoggingMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         # Get client IP using the utility function
         client_ip = get_client_ip(request)
-        
-        # Start timer
-        start_time = time.time()
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate process time
-        process_time = time.time() - start_time
-        
-        # Get API logger (goes to main app.log for common logs)
-        api_logger = logging.getLogger("api")
-        
-        # Log API call details
-        api_logger.info(
-            f"API Call - Method: {request.method} | "
-            f"Path: {request.url.path} | "
-            f"IP: {client_ip} | "
-            f"Status: {response.status_code} | "
-            f"Process Time: {process_time:.4f}s"
-        )
-        
-        # Add process time to response headers
+
+        # Correlate this request's logs, including its background tasks
+        request_id = request.headers.get(REQUEST_ID_HEADER, "")
+        if not _VALID_REQUEST_ID.fullmatch(request_id):
+            request_id = new_request_id()
+
+        with request_context(request_id):
+            # Start timer
+            start_time = time.time()
+
+            # Process request
+            response = await call_next(request)
+
+            # Calculate process time
+            process_time = time.time() - start_time
+
+            # Get API logger (goes to main app.log for common logs)
+            api_logger = logging.getLogger("api")
+
+            # Log API call details
+            api_logger.info(
+                f"API Call - Method: {request.method} | "
+                f"Path: {request.url.path} | "
+                f"IP: {client_ip} | "
+                f"Status: {response.status_code} | "
+                f"Process Time: {process_time:.4f}s",
+                extra={
+                    "fields": {
+                        "method": request.method,
+                        "path": request.url.path,
+                        "ip": client_ip,
+                        "status": response.status_code,
+                        "duration_ms": round(process_time * 1000, 1),
+                    }
+                },
+            )
+
+        # Add process time and request id to response headers
         response.headers["X-Process-Time"] = str(process_time)
-        
-        return response
\ No newline at end of file
+        response.headers[REQUEST_ID_HEADER] = request_id
+
+        return response
@@ -0,0 +1,70 @@
+"""
+Alembic environment
+
+Runs migrations against settings.database_url, or against the connection
+handed over by app.db.migrate when the app upgrades itself on startup.
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.core.config import settings
+from app.db.connection import Base
+from app.db.migrate import import_models
+
+config = context.config
+
+# Register every model so autogenerate sees the whole schema
+import_models()
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """Emit migration SQL to stdout without a database connection."""
+    context.configure(
+        url=settings.database_url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=settings.database_url.startswith("sqlite"),
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Run migrations on a live connection."""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_on_connection(connection)
+        return
+
+    # Called from the alembic CLI: set up its logging and our own engine
+    if config.config_file_name is not None:
+        fileConfig(config.config_file_name)
+
+    engine = create_engine(settings.database_url, poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        _run_on_connection(connection)
+    engine.dispose()
+
+
+def _run_on_connection(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite can't ALTER most things in place; batch mode copies the table
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
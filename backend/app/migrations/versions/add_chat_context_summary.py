@@ -0,0 +1,30 @@
+"""
+Migration: Add rolling context summaries to chats
+
+Adds chats.context_summary and chats.summarized_until_id, which hold the
+summary of older turns that app.services.context_service sends to the LLM
+in place of the messages themselves. Existing chats start unsummarized.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers
+revision = 'add_chat_context_summary'
+down_revision = 'add_user_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add context summary columns to chats"""
+
+    op.add_column('chats', sa.Column('context_summary', sa.Text, nullable=True))
+    op.add_column('chats', sa.Column('summarized_until_id', sa.Integer, nullable=True))
+
+
+def downgrade():
+    """Remove context summary columns from chats"""
+
+    op.drop_column('chats', 'summarized_until_id')
+    op.drop_column('chats', 'context_summary')
@@ -10,7 +10,7 @@ from sqlalchemy.dialects.postgresql import JSON
 
 # Revision identifiers
 revision = 'add_classifier_metadata'
-down_revision = None  # Update this with your previous migration
+down_revision = None  # Baseline: tables created by create_all before this
 branch_labels = None
 depends_on = None
 
@@ -0,0 +1,66 @@
+"""
+Migration: Add upload-time profiling columns to classifiers table
+
+Run this migration to store load time, predict latency and memory footprint
+measured when model files are uploaded
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers
+revision = 'add_classifier_profile'
+down_revision = 'add_classifier_metadata'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add profiling result columns"""
+
+    op.add_column(
+        'classifiers',
+        sa.Column('profile_load_time', sa.Float, nullable=True)
+    )
+
+    op.add_column(
+        'classifiers',
+        sa.Column('profile_predict_latency', sa.Float, nullable=True)
+    )
+
+    op.add_column(
+        'classifiers',
+        sa.Column('profile_batch_latency', sa.Float, nullable=True)
+    )
+
+    op.add_column(
+        'classifiers',
+        sa.Column('profile_batch_size', sa.Integer, nullable=True)
+    )
+
+    op.add_column(
+        'classifiers',
+        sa.Column('profile_memory_mb', sa.Float, nullable=True)
+    )
+
+    op.add_column(
+        'classifiers',
+        sa.Column('profile_error', sa.Text, nullable=True)
+    )
+
+    op.add_column(
+        'classifiers',
+        sa.Column('profiled_at', sa.DateTime(timezone=True), nullable=True)
+    )
+
+
+def downgrade():
+    """Remove profiling result columns"""
+
+    op.drop_column('classifiers', 'profile_load_time')
+    op.drop_column('classifiers', 'profile_predict_latency')
+    op.drop_column('classifiers', 'profile_batch_latency')
+    op.drop_column('classifiers', 'profile_batch_size')
+    op.drop_column('classifiers', 'profile_memory_mb')
+    op.drop_column('classifiers', 'profile_error')
+    op.drop_column('classifiers', 'profiled_at')
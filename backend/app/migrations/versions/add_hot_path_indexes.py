@@ -0,0 +1,83 @@
+"""
+Migration: Add composite and partial indexes for hot list queries
+
+Each index matches the filter and keyset order of a list endpoint, so the
+page is read straight from the index without a sort:
+
+- diagnoses WHERE user_id ORDER BY created_at DESC, id DESC
+- notifications WHERE user_id [AND NOT is_read] ORDER BY created_at DESC, id DESC
+- messages WHERE chat_id ORDER BY created_at, id
+- chats WHERE user_id AND NOT is_archived ORDER BY is_pinned, last_message_at, id
+
+The single-column indexes on diagnoses.user_id, notifications.user_id and
+messages.chat_id are dropped: the new indexes lead with the same column.
+notifications.is_read is dropped too; the partial unread index replaces it.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers
+revision = 'add_hot_path_indexes'
+down_revision = 'add_classifier_profile'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create hot-path indexes"""
+
+    op.create_index(
+        'ix_diagnoses_user_id_created_at',
+        'diagnoses',
+        ['user_id', 'created_at', 'id'],
+    )
+
+    op.create_index(
+        'ix_notifications_user_id_created_at',
+        'notifications',
+        ['user_id', 'created_at', 'id'],
+    )
+
+    op.create_index(
+        'ix_notifications_user_id_unread',
+        'notifications',
+        ['user_id', 'created_at', 'id'],
+        postgresql_where=sa.text('is_read = false'),
+        sqlite_where=sa.text('is_read = 0'),
+    )
+
+    op.create_index(
+        'ix_messages_chat_id_created_at',
+        'messages',
+        ['chat_id', 'created_at', 'id'],
+    )
+
+    op.create_index(
+        'ix_chats_user_id_active_order',
+        'chats',
+        ['user_id', 'is_pinned', 'last_message_at', 'id'],
+        postgresql_where=sa.text('is_archived = false'),
+        sqlite_where=sa.text('is_archived = 0'),
+    )
+
+    # Superseded by the composite indexes above
+    op.drop_index('ix_diagnoses_user_id', table_name='diagnoses')
+    op.drop_index('ix_notifications_user_id', table_name='notifications')
+    op.drop_index('ix_notifications_is_read', table_name='notifications')
+    op.drop_index('ix_messages_chat_id', table_name='messages')
+
+
+def downgrade():
+    """Drop hot-path indexes and restore the single-column ones"""
+
+    op.create_index('ix_messages_chat_id', 'messages', ['chat_id'])
+    op.create_index('ix_notifications_is_read', 'notifications', ['is_read'])
+    op.create_index('ix_notifications_user_id', 'notifications', ['user_id'])
+    op.create_index('ix_diagnoses_user_id', 'diagnoses', ['user_id'])
+
+    op.drop_index('ix_chats_user_id_active_order', table_name='chats')
+    op.drop_index('ix_messages_chat_id_created_at', table_name='messages')
+    op.drop_index('ix_notifications_user_id_unread', table_name='notifications')
+    op.drop_index('ix_notifications_user_id_created_at', table_name='notifications')
+    op.drop_index('ix_diagnoses_user_id_created_at', table_name='diagnoses')
@@ -0,0 +1,27 @@
+"""
+Migration: Add time-to-first-token to messages
+
+Adds messages.first_token_time, the seconds from request to the first
+streamed token of an assistant reply. Non-streamed replies leave it null.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers
+revision = 'add_message_first_token_time'
+down_revision = 'add_chat_context_summary'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add first_token_time to messages"""
+
+    op.add_column('messages', sa.Column('first_token_time', sa.Float, nullable=True))
+
+
+def downgrade():
+    """Remove first_token_time from messages"""
+
+    op.drop_column('messages', 'first_token_time')
@@ -0,0 +1,123 @@
+"""
+Migration: Add denormalized counters
+
+Adds chats.message_count and the user_counters table, and backfills both
+from the existing rows. From then on app.services.counter_service keeps
+them up to date.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers
+revision = 'add_user_counters'
+down_revision = 'add_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add counter storage and backfill it"""
+
+    op.add_column(
+        'chats',
+        sa.Column('message_count', sa.Integer, nullable=False, server_default='0')
+    )
+
+    op.create_table(
+        'user_counters',
+        sa.Column(
+            'user_id',
+            sa.Integer,
+            sa.ForeignKey('users.id', ondelete='CASCADE'),
+            primary_key=True,
+        ),
+        sa.Column('name', sa.String(50), primary_key=True),
+        sa.Column('value', sa.Integer, nullable=False),
+    )
+
+    # Backfill from the source tables
+    chats = sa.table(
+        'chats',
+        sa.column('id', sa.Integer),
+        sa.column('user_id', sa.Integer),
+        sa.column('is_archived', sa.Boolean),
+        sa.column('is_pinned', sa.Boolean),
+        sa.column('message_count', sa.Integer),
+    )
+    messages = sa.table(
+        'messages', sa.column('id', sa.Integer), sa.column('chat_id', sa.Integer)
+    )
+    notifications = sa.table(
+        'notifications',
+        sa.column('id', sa.Integer),
+        sa.column('user_id', sa.Integer),
+        sa.column('is_read', sa.Boolean),
+    )
+    diagnoses = sa.table(
+        'diagnoses',
+        sa.column('id', sa.Integer),
+        sa.column('user_id', sa.Integer),
+        sa.column('status', sa.String),
+    )
+    counters = sa.table(
+        'user_counters',
+        sa.column('user_id', sa.Integer),
+        sa.column('name', sa.String),
+        sa.column('value', sa.Integer),
+    )
+
+    op.execute(
+        chats.update().values(
+            message_count=sa.select(sa.func.count(messages.c.id))
+            .where(messages.c.chat_id == chats.c.id)
+            .scalar_subquery()
+        )
+    )
+
+    def backfill(select):
+        op.execute(counters.insert().from_select(['user_id', 'name', 'value'], select))
+
+    for name, condition in (
+        ('chats', None),
+        ('chats_archived', chats.c.is_archived == sa.true()),
+        ('chats_pinned', chats.c.is_pinned == sa.true()),
+    ):
+        select = sa.select(
+            chats.c.user_id, sa.literal(name), sa.func.count(chats.c.id)
+        ).group_by(chats.c.user_id)
+        if condition is not None:
+            select = select.where(condition)
+        backfill(select)
+
+    backfill(
+        sa.select(chats.c.user_id, sa.literal('messages'), sa.func.count(messages.c.id))
+        .select_from(chats.join(messages, messages.c.chat_id == chats.c.id))
+        .group_by(chats.c.user_id)
+    )
+
+    backfill(
+        sa.select(
+            notifications.c.user_id,
+            sa.literal('notifications_unread'),
+            sa.func.count(notifications.c.id),
+        )
+        .where(notifications.c.is_read == sa.false())
+        .group_by(notifications.c.user_id)
+    )
+
+    # Enum names are the upper-cased values ('COMPLETED' -> 'diagnoses_completed')
+    status_name = sa.literal('diagnoses_') + sa.func.lower(
+        sa.cast(diagnoses.c.status, sa.String)
+    )
+    backfill(
+        sa.select(diagnoses.c.user_id, status_name, sa.func.count(diagnoses.c.id))
+        .group_by(diagnoses.c.user_id, status_name)
+    )
+
+
+def downgrade():
+    """Remove counter storage"""
+
+    op.drop_table('user_counters')
+    op.drop_column('chats', 'message_count')
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, ForeignKey, JSON
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -14,7 +14,8 @@ class Blog(Base):
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     content = Column(Text, nullable=False)  # Markdown format
     summary = Column(Text, nullable=True)
-    tags = Column(ARRAY(String), nullable=True)
+    # JSON on SQLite so a local dev database can be created from the models
+    tags = Column(ARRAY(String).with_variant(JSON, "sqlite"), nullable=True)
     image_url = Column(Text, nullable=True)
     published = Column(Boolean, nullable=False, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.connection import Base
@@ -7,6 +7,18 @@ from app.db.connection import Base
 class Chat(Base):
     """Chat session model for AI assistant conversations."""
     __tablename__ = "chats"
+    __table_args__ = (
+        # Sidebar list of active chats (ChatService.CHAT_LIST_KEYS)
+        Index(
+            "ix_chats_user_id_active_order",
+            "user_id",
+            "is_pinned",
+            "last_message_at",
+            "id",
+            postgresql_where=text("is_archived = false"),
+            sqlite_where=text("is_archived = 0"),
+        ),
+    )
     
     # Primary key
     id = Column(Integer, primary_key=True, index=True)
@@ -26,6 +38,14 @@ class Chat(Base):
     model_name = Column(String(100), nullable=True, default="llama-3.3-70b-versatile")
     temperature = Column(String(10), nullable=True, default="0.7")  # Store as string for flexibility
     
+    # Denormalized count of messages, maintained by app.services.counter_service
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    # Rolling summary of the turns that no longer fit the LLM context
+    # (app.services.context_service), covering messages up to summarized_until_id
+    context_summary = Column(Text, nullable=True)
+    summarized_until_id = Column(Integer, nullable=True)
+    
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -33,28 +53,8 @@ class Chat(Base):
     
     # Relationships
     user = relationship("User", back_populates="chats")
-    messages = relationship("Message", back_populates="chat", cascade="all, delete-orphan", order_by="Message.created_at")
+    # Never loaded implicitly: read bounded pages with ChatService.get_messages
+    messages = relationship("Message", back_populates="chat", cascade="all, delete-orphan", order_by="Message.created_at", lazy="raise")
     
     def __repr__(self):
-        return f"<Chat(id={self.id}, title='{self.title}', user_id={self.user_id})>"
-    
-    @property
-    def message_count(self):
-        """Get count of messages in this chat."""
-        return len(self.messages) if self.messages else 0
-    
-    @property
-    def last_user_message(self):
-        """Get the last user message."""
-        if self.messages:
-            user_messages = [msg for msg in self.messages if msg.role == "user"]
-            return user_messages[-1] if user_messages else None
-        return None
-    
-    @property
-    def last_assistant_message(self):
-        """Get the last assistant message."""
-        if self.messages:
-            assistant_messages = [msg for msg in self.messages if msg.role == "assistant"]
-            return assistant_messages[-1] if assistant_messages else None
-        return None
\ No newline at end of file
+        return f"<Chat(id={self.id}, title='{self.title}', user_id={self.user_id})>"
\ No newline at end of file
@@ -85,6 +85,15 @@ class Classifier(Base):
     training_samples = Column(Integer, nullable=True)
     version = Column(String(50), nullable=True)  # e.g., "v1.0.0"
 
+    # Upload-time profiling results (see app/engines/model_profiler.py)
+    profile_load_time = Column(Float, nullable=True)  # seconds, cold load
+    profile_predict_latency = Column(Float, nullable=True)  # seconds, single row
+    profile_batch_latency = Column(Float, nullable=True)  # seconds, whole batch
+    profile_batch_size = Column(Integer, nullable=True)
+    profile_memory_mb = Column(Float, nullable=True)  # memory footprint in MB
+    profile_error = Column(Text, nullable=True)  # why profiling/activation failed
+    profiled_at = Column(DateTime(timezone=True), nullable=True)
+
     # Metadata
     is_active = Column(Boolean, default=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -124,6 +133,13 @@ class Classifier(Base):
             ),
             "training_samples": self.training_samples,
             "version": self.version,
+            "profile_load_time": self.profile_load_time,
+            "profile_predict_latency": self.profile_predict_latency,
+            "profile_batch_latency": self.profile_batch_latency,
+            "profile_batch_size": self.profile_batch_size,
+            "profile_memory_mb": self.profile_memory_mb,
+            "profile_error": self.profile_error,
+            "profiled_at": self.profiled_at.isoformat() if self.profiled_at else None,
             "is_active": self.is_active,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
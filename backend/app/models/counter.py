@@ -0,0 +1,38 @@
+"""
+User Counter Model - Denormalized per-user counts
+
+One row per (user, counter name), kept in step with the source tables by
+the flush listener in app.services.counter_service and repaired by its
+reconciliation job.
+"""
+
+from sqlalchemy import Column, Integer, String, ForeignKey
+from app.db.connection import Base
+
+
+class CounterName:
+    """Names of the per-user counters."""
+
+    CHATS = "chats"
+    CHATS_ARCHIVED = "chats_archived"
+    CHATS_PINNED = "chats_pinned"
+    MESSAGES = "messages"
+    NOTIFICATIONS_UNREAD = "notifications_unread"
+
+    @staticmethod
+    def diagnoses(status) -> str:
+        """Counter name for a user's diagnoses in the given status."""
+        return f"diagnoses_{getattr(status, 'value', status)}"
+
+
+class UserCounter(Base):
+    __tablename__ = "user_counters"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    name = Column(String(50), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<UserCounter(user_id={self.user_id}, name='{self.name}', value={self.value})>"
@@ -12,6 +12,7 @@ from sqlalchemy import (
     ForeignKey,
     DateTime,
     Enum as SQLEnum,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -28,11 +29,15 @@ class DiagnosisStatus(str, enum.Enum):
 
 class Diagnosis(Base):
     __tablename__ = "diagnoses"
+    __table_args__ = (
+        # A user's history, newest first (DiagnosisService.LIST_KEYS)
+        Index("ix_diagnoses_user_id_created_at", "user_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
     # User and disease info
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # see __table_args__
     disease_id = Column(Integer, ForeignKey("diseases.id"), nullable=False, index=True)
     classifier_id = Column(
         Integer, ForeignKey("classifiers.id"), nullable=False, index=True
@@ -97,3 +102,45 @@ class Diagnosis(Base):
                 self.completed_at.isoformat() if self.completed_at else None
             ),
         }
+
+    def to_response_dict(self):
+        """
+        Convert model to the DiagnosisResponse shape, including disease and
+        classifier details.
+
+        Load the diagnosis with DiagnosisService (which eager-loads disease and
+        classifier) to avoid one lazy query per relationship per row.
+        """
+        disease = self.disease
+        classifier = self.classifier
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "disease_id": self.disease_id,
+            "classifier_id": self.classifier_id,
+            "modality": self.modality,
+            "name": self.name,
+            "age": self.age,
+            "sex": self.sex,
+            "input_file": self.input_file,
+            "input_data": self.input_data,
+            "prediction": self.prediction,
+            "confidence": self.confidence,
+            "probabilities": self.probabilities,
+            "status": self.status.value if self.status else None,
+            "error_message": self.error_message,
+            "processing_time": self.processing_time,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
+            # Disease info
+            "disease_name": disease.name if disease else None,
+            "disease_description": disease.description if disease else None,
+            "disease_blog_link": disease.blog_link if disease else None,
+            # Classifier info
+            "classifier_name": classifier.name if classifier else None,
+            "classifier_title": classifier.name if classifier else None,
+            "classifier_description": classifier.description if classifier else None,
+            "classifier_blog_link": classifier.blog_link if classifier else None,
+            "classifier_paper_link": classifier.paper_link if classifier else None,
+        }
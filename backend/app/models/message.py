@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Boolean, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Boolean, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.connection import Base
@@ -7,12 +7,16 @@ from app.db.connection import Base
 class Message(Base):
     """Message model for individual chat messages."""
     __tablename__ = "messages"
+    __table_args__ = (
+        # A chat's history in order (ChatService.MESSAGE_KEYS)
+        Index("ix_messages_chat_id_created_at", "chat_id", "created_at", "id"),
+    )
     
     # Primary key
     id = Column(Integer, primary_key=True, index=True)
     
     # Foreign key to chat
-    chat_id = Column(Integer, ForeignKey("chats.id"), nullable=False, index=True)
+    chat_id = Column(Integer, ForeignKey("chats.id"), nullable=False)  # see __table_args__
     
     # Message content
     content = Column(Text, nullable=False)
@@ -20,7 +24,7 @@ class Message(Base):
     
     # Message type and processing info
     message_type = Column(String(20), default="text", index=True)  # 'text', 'image', 'pdf', 'file'
-    processing_status = Column(String(20), default="completed")  # 'processing', 'completed', 'error'
+    processing_status = Column(String(20), default="completed")  # 'processing', 'completed', 'partial', 'error', 'cancelled'
     
     # File-related metadata (for file uploads)
     file_metadata = Column(JSON, nullable=True)  # Store file info, processing details, etc.
@@ -29,6 +33,7 @@ class Message(Base):
     model_used = Column(String(100), nullable=True)  # Track which model generated response
     tokens_used = Column(Integer, nullable=True)     # Token usage tracking
     processing_time = Column(Float, nullable=True)   # Response time in seconds
+    first_token_time = Column(Float, nullable=True)  # Seconds to the first streamed token
     confidence_score = Column(Float, nullable=True)  # AI confidence if available
     
     # Message status
@@ -11,6 +11,8 @@ from sqlalchemy import (
     ForeignKey,
     DateTime,
     Enum as SQLEnum,
+    Index,
+    text,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -27,11 +29,24 @@ class NotificationType(str, enum.Enum):
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # A user's notifications, newest first (NotificationService.LIST_KEYS)
+        Index("ix_notifications_user_id_created_at", "user_id", "created_at", "id"),
+        # Unread badge count and unread-only list
+        Index(
+            "ix_notifications_user_id_unread",
+            "user_id",
+            "created_at",
+            "id",
+            postgresql_where=text("is_read = false"),
+            sqlite_where=text("is_read = 0"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
     # User info
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # see __table_args__
 
     # Notification details
     type = Column(
@@ -50,7 +65,7 @@ class Notification(Base):
     )
 
     # Status
-    is_read = Column(Boolean, default=False, nullable=False, index=True)
+    is_read = Column(Boolean, default=False, nullable=False)
 
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -7,18 +7,23 @@ from fastapi import (
     File,
     Form,
     Request,
+    Response,
 )
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict, Any
+import asyncio
 import json
 import time
+import anyio
 
-from app.db.connection import get_db
-from app.services.ai_service import ai_service
+from app.core.config import settings
+from app.db.connection import get_async_db
 from app.services.chat_service import ChatService
-from app.services.file_processor import FileProcessor
+from app.services.context_service import ConversationContext
 from app.routers.auth import get_current_user
+from app.routers.logs import require_admin
 from app.schemas.user import User
 from app.schemas.chat import ChatCreate, ChatResponse, ChatUpdate, ChatStats
 from app.schemas.message import (
@@ -28,7 +33,12 @@ from app.schemas.message import (
     StructuredAnalysisRequest,
     StructuredAnalysisResponse,
 )
-from app.core.logging import track_endpoint_performance, log_endpoint_activity
+from app.core.logging import (
+    app_logger,
+    track_endpoint_performance,
+    log_endpoint_activity,
+    log_endpoint_timing,
+)
 from app.utils.helpers import get_client_ip
 from app.utils.ai_helpers import (
     validate_chat_access,
@@ -36,22 +46,61 @@ from app.utils.ai_helpers import (
     validate_message_content,
     get_default_analysis_schemas,
 )
+from app.utils.pagination import set_next_cursor_header
+from app.utils.uploads import ingest_upload_async
+from app.utils.disconnect import (
+    ClientDisconnected,
+    get_cancellation_stats,
+    record_cancellation,
+    run_until_disconnect,
+)
 
 router = APIRouter(prefix="/aiassistant", tags=["ai-assistant"])
 
 
+def _ai_service():
+    """The shared AIService; LangChain and the models load on first use."""
+    from app.services.ai_service import get_ai_service
+
+    return get_ai_service()
+
+
+def _message_to_dict(msg) -> Dict[str, Any]:
+    """Serialize a message for the chat detail and history endpoints."""
+    return {
+        "id": msg.id,
+        "chat_id": msg.chat_id,
+        "content": msg.content,
+        "role": msg.role,
+        "message_type": msg.message_type,
+        "processing_status": msg.processing_status,
+        "file_metadata": msg.file_metadata,
+        "model_used": msg.model_used,
+        "tokens_used": msg.tokens_used,
+        "processing_time": msg.processing_time,
+        "first_token_time": msg.first_token_time,
+        "confidence_score": msg.confidence_score,
+        "is_edited": msg.is_edited,
+        "is_deleted": msg.is_deleted,
+        "error_message": msg.error_message,
+        "created_at": msg.created_at,
+        "updated_at": msg.updated_at,
+        "processed_at": msg.processed_at,
+    }
+
+
 # Create a new chat
 @router.post("/chats")
 @track_endpoint_performance("aiassistant", "create_chat")
 async def create_chat(
     chat_data: ChatCreate,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Create a new AI chat session"""
     try:
-        chat = ChatService.create_chat(
+        chat = await ChatService.create_chat(
             db, current_user.id, chat_data.title, chat_data.description or ""
         )
 
@@ -99,17 +148,20 @@ async def create_chat(
 @track_endpoint_performance("aiassistant", "get_chats")
 async def get_chats(
     request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 20,
     include_archived: bool = False,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Get user's chat sessions"""
     try:
-        chats = ChatService.get_user_chats(
-            db, current_user.id, skip, limit, include_archived
+        chats = await ChatService.get_user_chats(
+            db, current_user.id, skip, limit, include_archived, cursor
         )
+        set_next_cursor_header(response, chats)
 
         log_endpoint_activity(
             "aiassistant",
@@ -137,6 +189,8 @@ async def get_chats(
             for chat in chats
         ]
 
+    except HTTPException:
+        raise
     except Exception as e:
         log_endpoint_activity(
             "aiassistant",
@@ -158,24 +212,26 @@ async def get_chats(
 async def get_chat_detail(
     chat_id: int,
     request: Request,
-    db: Session = Depends(get_db),
+    response: Response,
+    message_limit: int = 50,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Get a specific chat with its messages"""
+    """
+    Get a specific chat with its latest messages.
+
+    Internal messages (AI context only) are excluded. When older messages
+    exist, the X-Next-Cursor header holds the cursor for
+    GET /chats/{chat_id}/messages.
+    """
     try:
-        # Validate access
-        if not validate_chat_access(current_user.id, chat_id, db):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found"
-            )
+        # Validate access - this will raise HTTPException if unauthorized
+        chat = await validate_chat_access(current_user.id, chat_id, db)
 
-        chat_with_messages = ChatService.get_chat_with_messages(
-            db, chat_id, current_user.id
+        page = await ChatService.get_messages(
+            db, chat_id, limit=message_limit, include_internal=False
         )
-        if not chat_with_messages:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found"
-            )
+        set_next_cursor_header(response, page)
 
         log_endpoint_activity(
             "aiassistant",
@@ -183,51 +239,23 @@ async def get_chat_detail(
             current_user.email,
             get_client_ip(request),
             True,
-            {"chat_id": chat_id, "message_count": len(chat_with_messages.messages)},
-        )
-
-        # Convert messages to dict format, excluding internal messages
-        messages = []
-        for msg in chat_with_messages.messages:
-            # Skip internal messages (used for AI context but not shown to user)
-            if getattr(msg, "is_internal", False):
-                continue
-
-            messages.append(
-                {
-                    "id": msg.id,
-                    "chat_id": msg.chat_id,
-                    "content": msg.content,
-                    "role": msg.role,
-                    "message_type": msg.message_type,
-                    "processing_status": msg.processing_status,
-                    "file_metadata": msg.file_metadata,
-                    "model_used": msg.model_used,
-                    "tokens_used": msg.tokens_used,
-                    "processing_time": msg.processing_time,
-                    "confidence_score": msg.confidence_score,
-                    "is_edited": msg.is_edited,
-                    "is_deleted": msg.is_deleted,
-                    "error_message": msg.error_message,
-                    "created_at": msg.created_at,
-                    "updated_at": msg.updated_at,
-                    "processed_at": msg.processed_at,
-                }
-            )
+            {"chat_id": chat_id, "message_count": len(page)},
+        )
 
         return {
-            "id": chat_with_messages.id,
-            "title": chat_with_messages.title,
-            "description": chat_with_messages.description,
-            "is_pinned": chat_with_messages.is_pinned,
-            "is_archived": chat_with_messages.is_archived,
-            "model_name": chat_with_messages.model_name,
-            "temperature": chat_with_messages.temperature,
-            "created_at": chat_with_messages.created_at,
-            "updated_at": chat_with_messages.updated_at,
-            "last_message_at": chat_with_messages.last_message_at,
-            "message_count": chat_with_messages.message_count,
-            "messages": messages,
+            "id": chat.id,
+            "title": chat.title,
+            "description": chat.description,
+            "is_pinned": chat.is_pinned,
+            "is_archived": chat.is_archived,
+            "model_name": chat.model_name,
+            "temperature": chat.temperature,
+            "created_at": chat.created_at,
+            "updated_at": chat.updated_at,
+            "last_message_at": chat.last_message_at,
+            "message_count": chat.message_count,
+            # Chronological order for display
+            "messages": [_message_to_dict(msg) for msg in reversed(page)],
         }
 
     except HTTPException:
@@ -247,53 +275,338 @@ async def get_chat_detail(
         )
 
 
-# Send message to AI
-@router.post("/chats/{chat_id}/messages")
-@track_endpoint_performance("aiassistant", "send_message")
-async def send_message(
+# Load older messages
+@router.get("/chats/{chat_id}/messages")
+@track_endpoint_performance("aiassistant", "get_messages")
+async def get_chat_messages(
     chat_id: int,
-    message_data: MessageCreate,
     request: Request,
-    db: Session = Depends(get_db),
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Send a message to AI and get response"""
+    """
+    Get the page of messages before a cursor, in chronological order.
+
+    Start from the X-Next-Cursor header of the chat detail response and
+    follow this endpoint's X-Next-Cursor header until it is absent.
+    """
     try:
         # Validate access - this will raise HTTPException if unauthorized
-        validate_chat_access(current_user.id, chat_id, db)
+        await validate_chat_access(current_user.id, chat_id, db)
+
+        page = await ChatService.get_messages(
+            db, chat_id, limit=limit, cursor=cursor, include_internal=False
+        )
+        set_next_cursor_header(response, page)
+
+        log_endpoint_activity(
+            "aiassistant",
+            "get_messages",
+            current_user.email,
+            get_client_ip(request),
+            True,
+            {"chat_id": chat_id, "count": len(page)},
+        )
+
+        return [_message_to_dict(msg) for msg in reversed(page)]
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        log_endpoint_activity(
+            "aiassistant",
+            "get_messages_error",
+            current_user.email,
+            get_client_ip(request),
+            False,
+            {"error": str(e)},
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get messages: {str(e)}",
+        )
+
+
+async def _begin_exchange(
+    chat_id: int, message_data: MessageCreate, db: AsyncSession, current_user: User
+):
+    """
+    Validate and save the user's message, route it and build the LLM context.
+
+    Returns:
+        (chat, user_message, context, route, is_first_message)
+    """
+    # Validate message content
+    if not validate_message_content(message_data.content):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid message content",
+        )
+
+    # Load the chat (validating access) and its history once
+    context = await ChatService.get_chat_context(db, chat_id, current_user.id)
+    if context is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat not found or access denied",
+        )
+    chat, history = context
+
+    # Phase 1: save the user message before calling the AI
+    user_message = ChatService.build_message(
+        chat_id, message_data.content, "user", message_data.message_type
+    )
+    await ChatService.add_messages(db, chat, [user_message])
+
+    # Fit the history into the token budget of the model that will answer
+    route = _ai_service().route_message(message_data.content)
+    context = _ai_service().prepare_context(chat, history, message_data.content, route)
+
+    return chat, user_message, context, route, not history
+
 
-        # Validate message content
-        if not validate_message_content(message_data.content):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid message content",
+def _start_title_generation(
+    message_data: MessageCreate, is_first_message: bool
+) -> Optional[asyncio.Task]:
+    """Start generating a new chat's title concurrently with the reply."""
+    if not is_first_message:
+        return None
+    return asyncio.create_task(_ai_service().generate_chat_title(message_data.content))
+
+
+def _start_summary_update(chat, context: ConversationContext) -> None:
+    """Fold the turns left out of the context into the chat's summary, after the reply."""
+    if not context.to_summarize:
+        return
+    ChatService.save_summary_in_background(
+        chat,
+        context.to_summarize,
+        _ai_service().summarize_conversation(chat.context_summary, context.to_summarize),
+    )
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+# Send message to AI, streaming the reply
+@router.post("/chats/{chat_id}/messages/stream")
+async def stream_message(
+    chat_id: int,
+    message_data: MessageCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Send a message to AI and stream the reply as Server-Sent Events.
+
+    Events, in order:
+    - user_message: the saved user message
+    - token: {"content": chunk} for each piece of the reply
+    - error: {"detail": ...} if generation fails part-way
+    - done: the saved assistant message, time_to_first_token and
+      total_time in seconds, and chat_title on a new chat if the title was
+      ready (otherwise it is saved in the background)
+
+    The assistant message is saved once the stream ends; if generation
+    failed it keeps the text received so far, marked "partial" (or
+    "error" if nothing arrived).
+
+    Timed from here to the end of the stream (not with
+    track_endpoint_performance, which would stop once the response object
+    is returned).
+    """
+    request_start = time.time()
+    try:
+        chat, user_message, context, route, is_first_message = (
+            await _begin_exchange(chat_id, message_data, db, current_user)
+        )
+    except HTTPException as e:
+        log_endpoint_timing("aiassistant", "stream_message", time.time() - request_start, e)
+        raise
+    except Exception as e:
+        log_endpoint_activity(
+            "aiassistant",
+            "stream_message_error",
+            current_user.email,
+            get_client_ip(request),
+            False,
+            {"error": str(e)},
+        )
+        log_endpoint_timing("aiassistant", "stream_message", time.time() - request_start, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to send message: {str(e)}",
+        )
+
+    # Generate the title of a new chat alongside the reply
+    title_task = _start_title_generation(message_data, is_first_message)
+
+    async def event_stream():
+        yield _sse_event("user_message", _message_to_dict(user_message))
+
+        start_time = time.time()
+        first_token_time = None
+        chunks = []
+        processing_status, error_message, stream_error = "completed", None, None
+
+        try:
+            async for chunk in _ai_service().stream_text_message(
+                message_data.content, context.as_chat_history(), route
+            ):
+                if first_token_time is None:
+                    first_token_time = time.time() - start_time
+                chunks.append(chunk)
+                yield _sse_event("token", {"content": chunk})
+        except asyncio.CancelledError:
+            # The client disconnected and the server cancelled the stream,
+            # which also cancelled the LLM call. Keep what was generated,
+            # marked cancelled; the save must not be cancelled in turn.
+            record_cancellation("stream_message")
+            if title_task:
+                title_task.cancel()
+            with anyio.CancelScope(shield=True):
+                await ChatService.add_messages(
+                    db,
+                    chat,
+                    [
+                        ChatService.build_message(
+                            chat_id,
+                            "".join(chunks),
+                            "assistant",
+                            "text",
+                            model_used=route.model_name,
+                            processing_time=time.time() - start_time,
+                            first_token_time=first_token_time,
+                            processing_status="cancelled",
+                            error_message="Client disconnected before the reply was complete",
+                        )
+                    ],
+                )
+            log_endpoint_timing(
+                "aiassistant",
+                "stream_message",
+                time.time() - request_start,
+                ClientDisconnected(),
+            )
+            raise
+        except Exception as e:
+            processing_status = "partial" if chunks else "error"
+            error_message, stream_error = str(e), e
+            app_logger.error(f"Error streaming reply for chat {chat_id}: {error_message}")
+            yield _sse_event(
+                "error",
+                {"detail": "The response was interrupted. Please try again."},
             )
 
-        # Get conversation context before adding new message
-        chat = ChatService.get_chat_with_messages(db, chat_id, current_user.id)
-        is_first_message = not chat.messages if chat else True
+        processing_time = time.time() - start_time
 
-        # Add user message
-        user_message = ChatService.add_message(
-            db, chat_id, message_data.content, "user", message_data.message_type
+        # Include the title only if it is already done
+        chat_title = None
+        if title_task:
+            chat_title = ChatService.resolve_generated_title(chat, title_task)
+
+        # Phase 2: save the (possibly partial) reply and the title together
+        assistant_message = ChatService.build_message(
+            chat_id,
+            "".join(chunks),
+            "assistant",
+            "text",
+            model_used=route.model_name,
+            processing_time=processing_time,
+            first_token_time=first_token_time,
+            processing_status=processing_status,
+            error_message=error_message,
         )
+        await ChatService.add_messages(
+            db, chat, [assistant_message], title=chat_title
+        )
+        _start_summary_update(chat, context)
 
-        # Build context messages
-        if chat and chat.messages:
-            context_messages = [
-                {"role": msg.role, "content": msg.content} for msg in chat.messages
-            ]
-        else:
-            context_messages = []
+        ttft = f"{first_token_time:.2f}s" if first_token_time is not None else "n/a"
+        app_logger.info(
+            f"Streamed reply for chat {chat_id}: first token {ttft}, "
+            f"total {processing_time:.2f}s ({processing_status})"
+        )
+        log_endpoint_activity(
+            "aiassistant",
+            "stream_message",
+            current_user.email,
+            get_client_ip(request),
+            processing_status == "completed",
+            {
+                "chat_id": chat_id,
+                "message_length": len(message_data.content),
+                "time_to_first_token": first_token_time,
+                "total_time": processing_time,
+            },
+        )
 
-        # Get AI response
-        ai_result = await ai_service.process_text_message(
-            message_data.content, context_messages
+        done = {
+            "assistant_message": _message_to_dict(assistant_message),
+            "time_to_first_token": first_token_time,
+            "total_time": processing_time,
+        }
+        if chat_title:
+            done["chat_title"] = chat_title
+        yield _sse_event("done", done)
+        log_endpoint_timing(
+            "aiassistant", "stream_message", time.time() - request_start, stream_error
         )
 
-        # Add AI response message
-        assistant_message = ChatService.add_message(
-            db,
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Send message to AI
+@router.post("/chats/{chat_id}/messages")
+@track_endpoint_performance("aiassistant", "send_message")
+async def send_message(
+    chat_id: int,
+    message_data: MessageCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Send a message to AI and get response"""
+    try:
+        chat, user_message, context, route, is_first_message = (
+            await _begin_exchange(chat_id, message_data, db, current_user)
+        )
+
+        # Generate the title of a new chat alongside the reply
+        title_task = _start_title_generation(message_data, is_first_message)
+
+        # Get AI response, abandoning it if the client goes away
+        try:
+            ai_result = await run_until_disconnect(
+                request,
+                _ai_service().process_text_message(
+                    message_data.content, context.as_chat_history(), route
+                ),
+                "send_message",
+            )
+        except ClientDisconnected:
+            if title_task:
+                title_task.cancel()
+            await ChatService.mark_message_cancelled(db, user_message)
+            raise
+
+        # Include the title only if it is already done
+        chat_title = None
+        if title_task:
+            chat_title = ChatService.resolve_generated_title(chat, title_task)
+
+        # Phase 2: save the AI response and the title together
+        assistant_message = ChatService.build_message(
             chat_id,
             ai_result.get("content", ""),
             "assistant",
@@ -301,13 +614,13 @@ async def send_message(
             model_used=ai_result.get("model_used", "unknown"),
             processing_time=ai_result.get("processing_time", 0.0),
             tokens_used=ai_result.get("tokens_used", 0),
+            processing_status=ai_result.get("processing_status", "completed"),
+            error_message=ai_result.get("error"),
         )
-
-        # Generate chat title if this is the first message
-        chat_title = None
-        if is_first_message:
-            chat_title = await ai_service.generate_chat_title(message_data.content)
-            ChatService.update_chat_title(db, chat_id, current_user.id, chat_title)
+        await ChatService.add_messages(
+            db, chat, [assistant_message], title=chat_title
+        )
+        _start_summary_update(chat, context)
 
         log_endpoint_activity(
             "aiassistant",
@@ -374,17 +687,14 @@ async def upload_file(
     request: Request,
     file: UploadFile = File(...),
     prompt: str = Form(""),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Upload and process a file with AI"""
     try:
         # Validate access
-        validate_chat_access(current_user.id, chat_id, db)
+        await validate_chat_access(current_user.id, chat_id, db)
 
-        # Read file content
-        file_content = await file.read()
-        content_type = file.content_type or "application/octet-stream"
         filename = file.filename or "unknown"
 
         # Create user message with file info
@@ -393,12 +703,16 @@ async def upload_file(
         else:
             user_content = f"[File uploaded: {file.filename}]"
 
-        # Get AI response for file content (includes file processing internally)
-        ai_result = await ai_service.process_file_message(
-            file_content, content_type, filename, prompt
-        )
+        # Read the file in chunks under the size cap, then get the AI
+        # response for it (includes file processing internally)
+        # Nothing is saved until the analysis is done, so a disconnect
+        # leaves no partial state behind
+        with await ingest_upload_async(file, settings.max_file_size) as upload:
+            ai_result = await run_until_disconnect(
+                request, _ai_service().process_file_message(upload, prompt), "upload_file"
+            )
 
-        user_message = ChatService.add_message(
+        user_message = await ChatService.add_message(
             db,
             chat_id,
             user_content,
@@ -408,10 +722,11 @@ async def upload_file(
             is_internal=True,
         )
 
-        ai_response = f"{ai_result.get("content", "Sorry, I couldn't process the file.")} (Analyzed from file: {filename}) . anything you asked about the file (image/pdf) will be answered based on this description. answer like you saw the file visually. dont tell like 'Based on the text description provided,'"
+        analysis = ai_result.get("content", "Sorry, I couldn't process the file.")
+        ai_response = f"{analysis} (Analyzed from file: {filename}) . anything you asked about the file (image/pdf) will be answered based on this description. answer like you saw the file visually. dont tell like 'Based on the text description provided,'"
 
         # Add AI response
-        assistant_message = ChatService.add_message(
+        assistant_message = await ChatService.add_message(
             db,
             chat_id,
             ai_response,
@@ -431,8 +746,8 @@ async def upload_file(
             True,
             {
                 "chat_id": chat_id,
-                "file_type": content_type,
-                "file_size": len(file_content),
+                "file_type": upload.content_type,
+                "file_size": upload.size,
             },
         )
 
@@ -480,36 +795,30 @@ async def update_chat(
     chat_id: int,
     chat_update: ChatUpdate,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Update a chat"""
     try:
-        # Validate access
-        validate_chat_access(current_user.id, chat_id, db)
+        # Validate access - the updates below modify this same chat instance
+        updated_chat = await validate_chat_access(current_user.id, chat_id, db)
 
         # Update individual fields using available methods
-        updated_chat = None
         if chat_update.title:
-            updated_chat = ChatService.update_chat_title(
+            await ChatService.update_chat_title(
                 db, chat_id, current_user.id, chat_update.title
             )
 
         if chat_update.is_pinned is not None:
-            ChatService.pin_chat(db, chat_id, current_user.id, chat_update.is_pinned)
+            await ChatService.pin_chat(
+                db, chat_id, current_user.id, chat_update.is_pinned
+            )
 
         if chat_update.is_archived is not None:
-            ChatService.archive_chat(
+            await ChatService.archive_chat(
                 db, chat_id, current_user.id, chat_update.is_archived
             )
 
-        # Get updated chat for response
-        updated_chat = ChatService.get_chat_with_messages(db, chat_id, current_user.id)
-        if not updated_chat:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found"
-            )
-
         log_endpoint_activity(
             "aiassistant",
             "update_chat",
@@ -551,15 +860,15 @@ async def update_chat(
 async def delete_chat(
     chat_id: int,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Delete a chat"""
     try:
         # Validate access
-        validate_chat_access(current_user.id, chat_id, db)
+        await validate_chat_access(current_user.id, chat_id, db)
 
-        ChatService.delete_chat(db, chat_id, current_user.id)
+        await ChatService.delete_chat(db, chat_id, current_user.id)
 
         log_endpoint_activity(
             "aiassistant",
@@ -594,12 +903,12 @@ async def delete_chat(
 @track_endpoint_performance("aiassistant", "get_stats")
 async def get_stats(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Get chat statistics for the user"""
     try:
-        stats = ChatService.get_chat_stats(db, current_user.id)
+        stats = await ChatService.get_chat_stats(db, current_user.id)
 
         log_endpoint_activity(
             "aiassistant", "get_stats", current_user.email, get_client_ip(request), True
@@ -626,3 +935,31 @@ async def get_stats(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get stats: {str(e)}",
         )
+
+
+# Get AI cache statistics (admin only)
+@router.get("/cache/stats")
+@track_endpoint_performance("aiassistant", "get_cache_stats")
+async def get_cache_stats(
+    request: Request,
+    current_user: User = Depends(require_admin),
+):
+    """Get hit rates and tokens saved by the assistant's caches"""
+    log_endpoint_activity(
+        "aiassistant", "get_cache_stats", current_user.email, get_client_ip(request), True
+    )
+    return _ai_service().get_cache_stats()
+
+
+@router.get("/llm/stats")
+@track_endpoint_performance("aiassistant", "get_llm_stats")
+async def get_llm_stats(
+    request: Request,
+    current_user: User = Depends(require_admin),
+):
+    """Get Groq gateway load and circuit state, per-route model latency and
+    requests cancelled by client disconnects"""
+    log_endpoint_activity(
+        "aiassistant", "get_llm_stats", current_user.email, get_client_ip(request), True
+    )
+    return {**_ai_service().get_llm_stats(), "cancelled_requests": get_cancellation_stats()}
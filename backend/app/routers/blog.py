@@ -3,6 +3,7 @@ from fastapi import (
     Depends,
     HTTPException,
     Query,
+    Response,
     status,
     UploadFile,
     File,
@@ -19,6 +20,7 @@ from app.models.user import User
 from app.core.logging import app_logger
 from app.services.supabase_storage import SupabaseStorage
 from app.core.config import settings
+from app.utils.pagination import set_next_cursor_header
 import uuid
 
 router = APIRouter(prefix="/blogs", tags=["blogs"])
@@ -26,6 +28,7 @@ router = APIRouter(prefix="/blogs", tags=["blogs"])
 
 @router.get("/", response_model=List[BlogWithAuthor])
 def list_blogs(
+    response: Response,
     db: Session = Depends(get_db),
     author_id: Optional[int] = Query(None, description="Filter by author ID"),
     tag: Optional[str] = Query(None, description="Filter by tag"),
@@ -33,6 +36,9 @@ def list_blogs(
     q: Optional[str] = Query(None, description="Search query"),
     limit: int = Query(20, le=100, description="Maximum number of results"),
     offset: int = Query(0, description="Offset for pagination"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from X-Next-Cursor; takes precedence over offset"
+    ),
 ):
     """List all blogs with optional filters."""
     try:
@@ -44,7 +50,9 @@ def list_blogs(
             q=q,
             limit=limit,
             offset=offset,
+            cursor=cursor,
         )
+        set_next_cursor_header(response, blogs)
 
         # Convert to BlogWithAuthor to include author details
         blogs_with_author = []
@@ -72,6 +80,8 @@ def list_blogs(
 
         app_logger.info(f"Listed {len(blogs_with_author)} blogs")
         return blogs_with_author
+    except HTTPException:
+        raise
     except Exception as e:
         app_logger.error(f"Error listing blogs: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to list blogs")
@@ -90,7 +90,10 @@ def upload_model_files(
     """
     Upload model pickle files for a tabular classifier - Step 2 (Tabular).
     
-    Automatically extracts and updates required_features from features.pkl.
+    Automatically extracts and updates required_features from features.pkl,
+    then profiles the model in a sandboxed subprocess. The classifier is only
+    activated if load time, predict latency and memory stay within the
+    configured ceilings.
 
     Required files:
     - features.pkl: Feature names (automatically extracted)
@@ -134,7 +137,8 @@ def upload_model_files(
         "message": "Model files uploaded successfully",
         "saved_files": result["saved_files"],
         "extracted_features": result["extracted_features"],
-        "feature_count": result["feature_count"]
+        "feature_count": result["feature_count"],
+        "profile": result["profile"],
     }
 
 
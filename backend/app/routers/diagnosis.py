@@ -2,7 +2,7 @@
 Diagnosis Router - Endpoints for diagnosis requests
 """
 
-from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException
+from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import Optional
 
@@ -14,9 +14,11 @@ from app.schemas.diagnosis import (
     DiagnosisCreate,
     DiagnosisResponse,
     DiagnosisAcknowledgement,
+    DiagnosisStats,
 )
-from app.core.logging import log_endpoint_activity, track_endpoint_performance
+from app.core.logging import get_request_id, log_endpoint_activity, track_endpoint_performance
 from app.core.config import settings
+from app.utils.pagination import set_next_cursor_header
 
 router = APIRouter(prefix="/diagnosis", tags=["diagnosis"])
 
@@ -57,8 +59,10 @@ def create_diagnosis(
             input_file=diagnosis_data.input_file,
         )
 
-        # Add background task to process diagnosis
-        background_tasks.add_task(DiagnosisService.process_diagnosis, db, diagnosis.id)
+        # Add background task to process diagnosis, logged under this request's id
+        background_tasks.add_task(
+            DiagnosisService.process_diagnosis, db, diagnosis.id, get_request_id()
+        )
 
         # Return immediate acknowledgement
         result_link = f"{settings.frontend_url}/diagnosis/{diagnosis.id}"
@@ -78,6 +82,22 @@ def create_diagnosis(
         )
 
 
+@router.get("/stats", response_model=DiagnosisStats)
+@track_endpoint_performance("diagnosis", "stats")
+def get_my_diagnosis_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Get the current user's diagnosis counts by status."""
+    log_endpoint_activity(
+        "diagnosis",
+        "get_diagnosis_stats",
+        additional_info={"user_id": current_user.id},
+    )
+
+    return DiagnosisService.get_user_diagnosis_stats(db=db, user_id=current_user.id)
+
+
 @router.get("/{diagnosis_id}", response_model=DiagnosisResponse)
 @track_endpoint_performance("diagnosis", "get")
 def get_diagnosis(
@@ -97,40 +117,7 @@ def get_diagnosis(
             db=db, diagnosis_id=diagnosis_id, user_id=current_user.id
         )
         
-        # Enrich with disease and classifier information
-        diagnosis_dict = {
-            "id": diagnosis.id,
-            "user_id": diagnosis.user_id,
-            "disease_id": diagnosis.disease_id,
-            "classifier_id": diagnosis.classifier_id,
-            "modality": diagnosis.modality,
-            "name": diagnosis.name,
-            "age": diagnosis.age,
-            "sex": diagnosis.sex,
-            "input_file": diagnosis.input_file,
-            "input_data": diagnosis.input_data,
-            "prediction": diagnosis.prediction,
-            "confidence": diagnosis.confidence,
-            "probabilities": diagnosis.probabilities,
-            "status": diagnosis.status.value if diagnosis.status else None,
-            "error_message": diagnosis.error_message,
-            "processing_time": diagnosis.processing_time,
-            "created_at": diagnosis.created_at,
-            "started_at": diagnosis.started_at,
-            "completed_at": diagnosis.completed_at,
-            # Disease info
-            "disease_name": diagnosis.disease.name if diagnosis.disease else None,
-            "disease_description": diagnosis.disease.description if diagnosis.disease else None,
-            "disease_blog_link": diagnosis.disease.blog_link if diagnosis.disease else None,
-            # Classifier info
-            "classifier_name": diagnosis.classifier.name if diagnosis.classifier else None,
-            "classifier_title": diagnosis.classifier.name if diagnosis.classifier else None,
-            "classifier_description": diagnosis.classifier.description if diagnosis.classifier else None,
-            "classifier_blog_link": diagnosis.classifier.blog_link if diagnosis.classifier else None,
-            "classifier_paper_link": diagnosis.classifier.paper_link if diagnosis.classifier else None,
-        }
-        
-        return diagnosis_dict
+        return diagnosis.to_response_dict()
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -138,10 +125,12 @@ def get_diagnosis(
 @router.get("/", response_model=list[DiagnosisResponse])
 @track_endpoint_performance("diagnosis", "list_user")
 def get_my_diagnoses(
+    response: Response,
     disease_id: Optional[int] = None,
     status: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -159,54 +148,22 @@ def get_my_diagnoses(
         status=status,
         skip=skip,
         limit=limit,
+        cursor=cursor,
     )
-    
-    # Enrich with disease and classifier information
-    enriched_diagnoses = []
-    for diagnosis in diagnoses:
-        diagnosis_dict = {
-            "id": diagnosis.id,
-            "user_id": diagnosis.user_id,
-            "disease_id": diagnosis.disease_id,
-            "classifier_id": diagnosis.classifier_id,
-            "modality": diagnosis.modality,
-            "name": diagnosis.name,
-            "age": diagnosis.age,
-            "sex": diagnosis.sex,
-            "input_file": diagnosis.input_file,
-            "input_data": diagnosis.input_data,
-            "prediction": diagnosis.prediction,
-            "confidence": diagnosis.confidence,
-            "probabilities": diagnosis.probabilities,
-            "status": diagnosis.status.value if diagnosis.status else None,
-            "error_message": diagnosis.error_message,
-            "processing_time": diagnosis.processing_time,
-            "created_at": diagnosis.created_at,
-            "started_at": diagnosis.started_at,
-            "completed_at": diagnosis.completed_at,
-            # Disease info
-            "disease_name": diagnosis.disease.name if diagnosis.disease else None,
-            "disease_description": diagnosis.disease.description if diagnosis.disease else None,
-            "disease_blog_link": diagnosis.disease.blog_link if diagnosis.disease else None,
-            # Classifier info
-            "classifier_name": diagnosis.classifier.name if diagnosis.classifier else None,
-            "classifier_title": diagnosis.classifier.name if diagnosis.classifier else None,
-            "classifier_description": diagnosis.classifier.description if diagnosis.classifier else None,
-            "classifier_blog_link": diagnosis.classifier.blog_link if diagnosis.classifier else None,
-            "classifier_paper_link": diagnosis.classifier.paper_link if diagnosis.classifier else None,
-        }
-        enriched_diagnoses.append(diagnosis_dict)
-    
-    return enriched_diagnoses
+    set_next_cursor_header(response, diagnoses)
+
+    return [diagnosis.to_response_dict() for diagnosis in diagnoses]
 
 
 @router.get("/admin/all", response_model=list[DiagnosisResponse])
 @track_endpoint_performance("diagnosis", "list_all_admin")
 def get_all_diagnoses_admin(
+    response: Response,
     disease_id: Optional[int] = None,
     status: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -227,42 +184,8 @@ def get_all_diagnoses_admin(
         status=status,
         skip=skip,
         limit=limit,
+        cursor=cursor,
     )
-    
-    # Enrich with disease and classifier information
-    enriched_diagnoses = []
-    for diagnosis in diagnoses:
-        diagnosis_dict = {
-            "id": diagnosis.id,
-            "user_id": diagnosis.user_id,
-            "disease_id": diagnosis.disease_id,
-            "classifier_id": diagnosis.classifier_id,
-            "modality": diagnosis.modality,
-            "name": diagnosis.name,
-            "age": diagnosis.age,
-            "sex": diagnosis.sex,
-            "input_file": diagnosis.input_file,
-            "input_data": diagnosis.input_data,
-            "prediction": diagnosis.prediction,
-            "confidence": diagnosis.confidence,
-            "probabilities": diagnosis.probabilities,
-            "status": diagnosis.status.value if diagnosis.status else None,
-            "error_message": diagnosis.error_message,
-            "processing_time": diagnosis.processing_time,
-            "created_at": diagnosis.created_at,
-            "started_at": diagnosis.started_at,
-            "completed_at": diagnosis.completed_at,
-            # Disease info
-            "disease_name": diagnosis.disease.name if diagnosis.disease else None,
-            "disease_description": diagnosis.disease.description if diagnosis.disease else None,
-            "disease_blog_link": diagnosis.disease.blog_link if diagnosis.disease else None,
-            # Classifier info
-            "classifier_name": diagnosis.classifier.name if diagnosis.classifier else None,
-            "classifier_title": diagnosis.classifier.name if diagnosis.classifier else None,
-            "classifier_description": diagnosis.classifier.description if diagnosis.classifier else None,
-            "classifier_blog_link": diagnosis.classifier.blog_link if diagnosis.classifier else None,
-            "classifier_paper_link": diagnosis.classifier.paper_link if diagnosis.classifier else None,
-        }
-        enriched_diagnoses.append(diagnosis_dict)
-    
-    return enriched_diagnoses
+    set_next_cursor_header(response, diagnoses)
+
+    return [diagnosis.to_response_dict() for diagnosis in diagnoses]
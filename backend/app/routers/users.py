@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.db.connection import get_db
 from app.schemas.user import User, UserUpdate
 from app.schemas.contact import ContactMessage, ContactResponse
@@ -9,6 +9,7 @@ from app.services.email_service import EmailService
 from app.routers.auth import get_current_user
 from app.core.logging import track_endpoint_performance, log_endpoint_activity
 from app.utils.helpers import get_client_ip
+from app.utils.pagination import set_next_cursor_header
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -17,10 +18,14 @@ router = APIRouter(prefix="/users", tags=["users"])
 @track_endpoint_performance("admin", "get_all_users")
 def get_all_users(
     request: Request,
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of users to skip"),
     limit: int = Query(
         100, ge=1, le=1000, description="Maximum number of users to return"
     ),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from X-Next-Cursor; takes precedence over skip"
+    ),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -62,7 +67,8 @@ def get_all_users(
             detail="Not enough permissions. Staff or superuser access required.",
         )
 
-    users = UserService.get_all_users(db, skip=skip, limit=limit)
+    users = UserService.get_all_users(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor_header(response, users)
 
     # Log successful operation
     log_endpoint_activity(
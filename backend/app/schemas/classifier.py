@@ -123,6 +123,13 @@ class ClassifierResponse(ClassifierBase):
     blog_link: Optional[str] = Field(None, max_length=500)
     paper_link: Optional[str] = Field(None, max_length=500)
     training_date: Optional[datetime] = None
+    profile_load_time: Optional[float] = None
+    profile_predict_latency: Optional[float] = None
+    profile_batch_latency: Optional[float] = None
+    profile_batch_size: Optional[int] = None
+    profile_memory_mb: Optional[float] = None
+    profile_error: Optional[str] = None
+    profiled_at: Optional[datetime] = None
     is_active: bool
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -60,3 +60,13 @@ class DiagnosisAcknowledgement(BaseModel):
     status: str
     message: str
     result_link: Optional[str] = None
+
+
+class DiagnosisStats(BaseModel):
+    """Schema for a user's diagnosis counts by status."""
+
+    total: int
+    pending: int
+    processing: int
+    completed: int
+    failed: int
@@ -25,6 +25,7 @@ class MessageResponse(BaseModel):
     model_used: Optional[str] = None
     tokens_used: Optional[int] = None
     processing_time: Optional[float] = None
+    first_token_time: Optional[float] = None
     confidence_score: Optional[float] = None
     is_edited: bool
     is_deleted: bool
@@ -1,57 +1,147 @@
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import Runnable
 from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 from app.core.config import settings
 from app.core.logging import app_logger
+from app.models.chat import Chat
+from app.models.message import Message
+from app.services.context_service import ContextService, ConversationContext
 from app.services.file_processor import FileProcessor
-from app.utils.ai_models import text_llm, vision_llm
+from app.services.model_router import ModelRouter, ModelTier, Route
+from app.services.response_cache import ResponseCache
+from app.utils.ai_helpers import estimate_tokens
+from app.utils.ai_models import get_fast_text_llm, get_text_llm, get_vision_llm
+from app.utils.uploads import IngestedUpload
 import json
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import Any, AsyncIterator, List, Dict, Optional
+import hashlib
 import time
 import asyncio
 
+# Prompts are parsed once. Conversation text is only ever passed in as
+# variable values or message objects, never as template text, so braces
+# in it are not read as template variables.
+_SUMMARY_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """You maintain a running summary of a conversation between a user and a medical AI assistant.
+Merge the new conversation turns into the existing summary. Keep the user's health concerns, symptoms, reported values, uploaded file findings, and any advice already given.
+Be concise and factual. Write plain prose, no headings. Output only the updated summary.""",
+        ),
+        (
+            "user",
+            "Existing summary:\n{summary}\n\nNew conversation turns:\n{transcript}",
+        ),
+    ]
+)
+
+_TITLE_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """Generate a brief, descriptive title (3-6 words) for a chat conversation based on the first user message. 
+                The title should be concise and capture the main topic or intent of the message.
+                Do not use quotes or special formatting in the title.""",
+        ),
+        ("user", "First message: {first_message}"),
+    ]
+)
+
+_HISTORY_MESSAGE_TYPES = {"user": HumanMessage, "system": SystemMessage}
+
 
 class AIService:
     """Service class for AI operations using Groq API."""
 
     def __init__(self):
         """Initialize with shared AI models from ai_models module."""
-        if not settings.groq_api_key:
+        # The fake and replay backends never call Groq
+        if settings.llm_backend in ("groq", "record") and not settings.groq_api_key:
             raise ValueError("GROQ_API_KEY is required but not set in environment")
 
-        # Use shared LLM instances from ai_models
-        self.llm = text_llm
+        # Shared LLM instances from ai_models; the router picks one per call
+        self.router = ModelRouter(
+            ModelTier(settings.groq_model, get_text_llm(), settings.llm_latency_slo_ms),
+            ModelTier(settings.groq_fast_model, get_fast_text_llm(), settings.llm_fast_latency_slo_ms)
+            if settings.llm_routing_enabled
+            else None,
+            fast_tasks=settings.llm_fast_tasks,
+            fast_message_max_tokens=settings.llm_fast_message_max_tokens,
+            fast_message_pattern=settings.llm_fast_message_pattern,
+            window_seconds=settings.llm_routing_window_seconds,
+            min_samples=settings.llm_routing_min_samples,
+        )
 
         # Output parsers
         self.json_parser = JsonOutputParser()
         self.text_parser = StrOutputParser()
 
+        # The chat prompt, with the history fitted by prepare_context passed
+        # in as messages; chains over it are built once per model
+        self.chat_prompt = ChatPromptTemplate.from_messages(
+            [
+                SystemMessage(content=self._get_system_prompt()),
+                MessagesPlaceholder("history", optional=True),
+                ("user", "{input}"),
+            ]
+        )
+        self._chains: Dict[tuple, tuple] = {}
+
+        # Replies to repeated stateless questions; keyed by this version so
+        # editing the system prompt invalidates them
+        self.system_prompt_version = hashlib.sha256(
+            self._get_system_prompt().encode()
+        ).hexdigest()[:12]
+        self.response_cache = (
+            ResponseCache(
+                settings.llm_cache_max_entries,
+                settings.llm_cache_ttl_seconds,
+                near_duplicates=settings.llm_cache_near_duplicates,
+                similarity_threshold=settings.llm_cache_similarity_threshold,
+            )
+            if settings.llm_cache_enabled
+            else None
+        )
+
         app_logger.info(f"AIService initialized with shared models")
 
+    def route_message(self, message: str) -> Route:
+        """Choose the model that answers a chat message."""
+        return self.router.route("chat", message)
+
     async def process_text_message(
-        self, message: str, chat_history: List[Dict] = None
+        self, message: str, chat_history: List[Dict] = None, route: Optional[Route] = None
     ) -> dict:
         """Process text message with conversation context."""
         start_time = time.time()
+        route = route or self.route_message(message)
 
         try:
-            # Build conversation context
-            messages = [("system", self._get_system_prompt())]
-
-            # Add chat history if provided (last 10 messages for context)
-            if chat_history:
-                for msg in chat_history[-10:]:
-                    role = "user" if msg["role"] == "user" else "assistant"
-                    messages.append((role, msg["content"]))
-
-            # Add current message
-            messages.append(("user", message))
-
-            # Create prompt and chain
-            prompt = ChatPromptTemplate.from_messages(messages)
-            chain = prompt | self.llm | self.text_parser
+            cache_scope = self._cache_scope(chat_history, route.model_name)
+            if cache_scope:
+                cached = self.response_cache.lookup(message, cache_scope)
+                if cached is not None:
+                    app_logger.info(f"Served cached response for: {message[:50]}...")
+                    return {
+                        "content": cached,
+                        "model_used": route.model_name,
+                        "processing_time": time.time() - start_time,
+                        "tokens_used": None,
+                        "processing_status": "completed",
+                        "cache_hit": True,
+                    }
+
+            chain = self._get_chain(self.chat_prompt, route.llm)
 
             # Get response
-            response = await chain.ainvoke({"input": message})
+            response = await chain.ainvoke(self._chat_input(message, chat_history))
+            self.router.record(route, time.time() - start_time)
+
+            if cache_scope:
+                self._cache_response(message, chat_history, cache_scope, response)
 
             processing_time = time.time() - start_time
 
@@ -61,40 +151,242 @@ class AIService:
 
             return {
                 "content": response,
-                "model_used": settings.groq_model,
+                "model_used": route.model_name,
                 "processing_time": processing_time,
                 "tokens_used": None,  # Groq doesn't provide token count in response
                 "processing_status": "completed",
+                "cache_hit": False,
             }
 
         except Exception as e:
             processing_time = time.time() - start_time
+            self.router.record(route, processing_time, ok=False)
             app_logger.error(f"Error processing text message: {str(e)}")
 
             return {
                 "content": "I apologize, but I encountered an error processing your message. Please try again.",
-                "model_used": settings.groq_model,
+                "model_used": route.model_name,
                 "processing_time": processing_time,
                 "tokens_used": None,
                 "processing_status": "error",
                 "error": str(e),
             }
 
+    async def stream_text_message(
+        self, message: str, chat_history: List[Dict] = None, route: Optional[Route] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream the reply to a text message as it is generated.
+
+        Unlike process_text_message, errors are raised to the caller, which
+        decides what to do with the part of the reply already received.
+
+        Args:
+            message: The user's message
+            chat_history: Context from prepare_context().as_chat_history()
+            route: The model to use, from route_message() (chosen here if
+                not given)
+
+        Yields:
+            str: Reply text chunks, in order
+        """
+        route = route or self.route_message(message)
+        cache_scope = self._cache_scope(chat_history, route.model_name)
+        if cache_scope:
+            cached = self.response_cache.lookup(message, cache_scope)
+            if cached is not None:
+                yield cached
+                return
+
+        chain = self._get_chain(self.chat_prompt, route.llm)
+        chunks = []
+        start_time = time.time()
+        try:
+            async for chunk in chain.astream(self._chat_input(message, chat_history)):
+                if chunk:
+                    if not chunks:
+                        # Routing SLOs for streams are on time to first token
+                        self.router.record(route, time.time() - start_time)
+                    chunks.append(chunk)
+                    yield chunk
+        except Exception:
+            if not chunks:
+                self.router.record(route, time.time() - start_time, ok=False)
+            raise
+
+        if cache_scope:
+            self._cache_response(message, chat_history, cache_scope, "".join(chunks))
+
+    def _cache_scope(
+        self, chat_history: List[Dict] = None, model_name: str = settings.groq_model
+    ) -> Optional[str]:
+        """
+        Hash everything besides the message that shapes a reply.
+
+        Returns None when the reply should not be cached: caching is off or
+        the conversation context exceeds llm_cache_max_context_tokens.
+        """
+        if self.response_cache is None:
+            return None
+
+        chat_history = chat_history or []
+        context_tokens = sum(estimate_tokens(msg["content"]) for msg in chat_history)
+        if context_tokens > settings.llm_cache_max_context_tokens:
+            return None
+
+        scope = json.dumps(
+            [
+                self.system_prompt_version,
+                model_name,
+                settings.groq_temperature,
+                chat_history,
+            ],
+            sort_keys=True,
+        )
+        return hashlib.sha256(scope.encode()).hexdigest()
+
+    def _cache_response(
+        self, message: str, chat_history: List[Dict], scope: str, response: str
+    ) -> None:
+        """Cache a reply with the prompt and reply tokens a hit will save."""
+        prompt = [self._get_system_prompt(), message]
+        prompt += [msg["content"] for msg in chat_history or []]
+        tokens = sum(estimate_tokens(text) for text in prompt) + estimate_tokens(response)
+        self.response_cache.store(message, scope, response, tokens)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit rates and tokens saved by the AI caches."""
+        return {
+            "responses": self.response_cache.stats() if self.response_cache else None,
+            "file_analyses": FileProcessor.get_cache_stats(),
+        }
+
+    def get_llm_stats(self) -> Dict[str, Any]:
+        """Gateway load and circuit state per model, and per-route latency."""
+        return {
+            "text": get_text_llm().gateway.stats(),
+            "fast": get_fast_text_llm().gateway.stats(),
+            "vision": get_vision_llm().gateway.stats(),
+            "routing": self.router.stats(),
+        }
+
+    def _get_chain(
+        self, prompt: ChatPromptTemplate, llm, max_tokens: Optional[int] = None
+    ) -> Runnable:
+        """
+        The prompt | llm | parser chain for a prompt and model, built once.
+
+        Args:
+            prompt: One of the service's prompt templates
+            llm: The routed model
+            max_tokens: Reply limit bound to the model, if any
+
+        Returns:
+            Runnable: The chain, reused across calls
+        """
+        key = (id(prompt), id(llm), max_tokens)
+        cached = self._chains.get(key)
+        # The model is kept with its chain so a reused id() is detected
+        if cached is None or cached[0] is not llm:
+            model = llm.bind(max_tokens=max_tokens) if max_tokens else llm
+            cached = (llm, prompt | model | self.text_parser)
+            self._chains[key] = cached
+        return cached[1]
+
+    @staticmethod
+    def _chat_input(message: str, chat_history: List[Dict] = None) -> Dict[str, Any]:
+        """Chat prompt variables, with the history as message objects."""
+        history: List[BaseMessage] = [
+            _HISTORY_MESSAGE_TYPES.get(msg["role"], AIMessage)(content=msg["content"])
+            for msg in chat_history or []
+        ]
+        return {"history": history, "input": message}
+
+    def prepare_context(
+        self, chat: Chat, history: List[Message], message: str, route: Optional[Route] = None
+    ) -> ConversationContext:
+        """
+        Fit a chat's history into the token budget of the model answering.
+
+        Turns that no longer fit are returned in to_summarize and left out
+        of this request. Fold them into the chat's rolling summary once the
+        reply is out (summarize_conversation, saved with
+        ChatService.save_summary_in_background), so the extra LLM call never
+        delays the reply.
+
+        Args:
+            chat: The chat being answered
+            history: Recent messages in chronological order
+            message: The new user message
+            route: The model that will answer, from route_message() (chosen
+                here if not given)
+
+        Returns:
+            ConversationContext: Summary and recent turns to send
+        """
+        route = route or self.route_message(message)
+        context = ContextService.build_context(
+            chat, history, message, self._get_system_prompt(), route.model_name
+        )
+
+        app_logger.info(
+            f"Context for chat {chat.id} ({route.model_name}): "
+            f"{len(context.recent)} recent messages, "
+            f"{len(context.to_summarize)} to summarize, ~{context.tokens} tokens"
+        )
+        return context
+
+    async def summarize_conversation(
+        self, previous_summary: Optional[str], messages: List[Message]
+    ) -> Optional[str]:
+        """
+        Extend a rolling conversation summary with older turns.
+
+        Args:
+            previous_summary: The chat's current summary, if any
+            messages: Turns to fold in, in chronological order
+
+        Returns:
+            Optional[str]: The new summary, or None on failure
+        """
+        route = self.router.route("summary")
+        start_time = time.time()
+        try:
+            chain = self._get_chain(
+                _SUMMARY_PROMPT, route.llm, settings.context_summary_max_tokens
+            )
+            summary = await chain.ainvoke(
+                {
+                    "summary": previous_summary or "(none yet)",
+                    "transcript": ContextService.format_transcript(
+                        messages, ContextService.get_token_budget(route.model_name)
+                    ),
+                }
+            )
+            self.router.record(route, time.time() - start_time)
+
+            return ContextService.truncate_to_tokens(
+                summary.strip(), settings.context_summary_max_tokens
+            ) or None
+
+        except Exception as e:
+            self.router.record(route, time.time() - start_time, ok=False)
+            app_logger.error(f"Error summarizing conversation: {str(e)}")
+            return None
+
     async def process_file_message(
         self,
-        file_content: bytes,
-        content_type: str,
-        filename: str,
+        upload: IngestedUpload,
         user_message: str = "",
     ) -> dict:
         """Process file with AI analysis."""
         start_time = time.time()
+        content_type = upload.content_type
+        filename = upload.filename
 
         try:
             # First, process the file to extract content
-            file_result = await FileProcessor.process_file(
-                file_content, content_type, filename
-            )
+            file_result = await FileProcessor.process_upload(upload)
 
             if file_result["processing_status"] == "error":
                 return {
@@ -142,21 +434,12 @@ class AIService:
 
     async def generate_chat_title(self, first_message: str) -> str:
         """Generate a title for a chat based on the first message."""
+        route = self.router.route("title")
+        start_time = time.time()
         try:
-            title_prompt = ChatPromptTemplate.from_messages(
-                [
-                    (
-                        "system",
-                        """Generate a brief, descriptive title (3-6 words) for a chat conversation based on the first user message. 
-                The title should be concise and capture the main topic or intent of the message.
-                Do not use quotes or special formatting in the title.""",
-                    ),
-                    ("user", f"First message: {first_message}"),
-                ]
-            )
-
-            chain = title_prompt | self.llm | self.text_parser
-            title = await chain.ainvoke({})
+            chain = self._get_chain(_TITLE_PROMPT, route.llm)
+            title = await chain.ainvoke({"first_message": first_message})
+            self.router.record(route, time.time() - start_time)
 
             # Clean and limit the title
             title = title.strip().replace('"', "").replace("'", "")
@@ -166,6 +449,7 @@ class AIService:
             return title if title else "New Chat"
 
         except Exception as e:
+            self.router.record(route, time.time() - start_time, ok=False)
             app_logger.error(f"Error generating chat title: {str(e)}")
             return "New Chat"
 
@@ -235,5 +519,7 @@ TONE EXAMPLES:
 Remember: You're here to educate, support, and guide users through our multi-disease diagnosis platform—not to replace medical professionals."""
 
 
-# Singleton instance
-ai_service = AIService()
+@lru_cache(maxsize=None)
+def get_ai_service() -> AIService:
+    """The shared AIService, created (with its models) on first use."""
+    return AIService()
@@ -1,9 +1,10 @@
-from typing import List, Optional
+from typing import Optional
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, desc
+from sqlalchemy import or_
 from app.models.blog import Blog
 from app.models.user import User
 from app.schemas.blog import BlogCreate, BlogUpdate
+from app.utils.pagination import Page, paginate
 import re
 
 
@@ -18,6 +19,9 @@ def slugify(text: str) -> str:
 
 class BlogService:
 
+    # Keyset for list pagination: newest first, id breaks created_at ties
+    LIST_KEYS = [(Blog.created_at, True), (Blog.id, True)]
+
     @staticmethod
     def create(db: Session, payload: BlogCreate, author_id: int) -> Blog:
         """Create a new blog post."""
@@ -69,9 +73,10 @@ class BlogService:
         q: Optional[str] = None,
         limit: int = 20,
         offset: int = 0,
-    ) -> List[Blog]:
-        """List blogs with filters."""
-        query = db.query(Blog)
+        cursor: Optional[str] = None,
+    ) -> Page:
+        """List blogs with filters, by cursor when given or by offset."""
+        query = db.query(Blog).options(joinedload(Blog.author))
 
         if author_id is not None:
             query = query.filter(Blog.author_id == author_id)
@@ -92,7 +97,7 @@ class BlogService:
                 )
             )
 
-        return query.order_by(desc(Blog.created_at)).limit(limit).offset(offset).all()
+        return paginate(query, BlogService.LIST_KEYS, limit, cursor=cursor, skip=offset)
 
     @staticmethod
     def update(db: Session, blog: Blog, payload: BlogUpdate) -> Blog:
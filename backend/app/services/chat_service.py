@@ -1,19 +1,54 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import and_, delete, select, update
+from typing import Awaitable, List, Optional, Set, Tuple
 from datetime import datetime
+import asyncio
 
+from app.db.connection import AsyncSessionLocal
 from app.models.chat import Chat
 from app.models.message import Message
+from app.models.counter import CounterName
 from app.core.logging import app_logger
+from app.services.counter_service import CounterService
+from app.utils.pagination import Page, paginate_async
+
+# Deferred title and summary saves still running (see resolve_generated_title
+# and save_summary_in_background)
+_background_tasks: Set[asyncio.Task] = set()
 
 
 class ChatService:
-    """Service class for managing chat operations."""
+    """
+    Service class for managing chat operations.
+
+    Methods are async and take an AsyncSession so the async AI assistant
+    routes never block the event loop on database I/O.
+    """
+
+    # Keyset for chat list: pinned first, then by last activity
+    CHAT_LIST_KEYS = [
+        (Chat.is_pinned, True),
+        (Chat.last_message_at, True),
+        (Chat.id, True),
+    ]
+
+    # Keyset for message history: newest first (callers reverse for display)
+    MESSAGE_KEYS = [(Message.created_at, True), (Message.id, True)]
+
+    @staticmethod
+    async def _get_owned_chat(
+        db: AsyncSession, chat_id: int, user_id: int
+    ) -> Optional[Chat]:
+        """Get a chat (without messages) if the user owns it."""
+        result = await db.execute(
+            select(Chat).filter(and_(Chat.id == chat_id, Chat.user_id == user_id))
+        )
+        return result.scalars().first()
 
     @staticmethod
-    def create_chat(
-        db: Session, user_id: int, title: str, description: str = None
+    async def create_chat(
+        db: AsyncSession, user_id: int, title: str, description: str = None
     ) -> Chat:
         """Create a new chat session."""
         try:
@@ -24,40 +59,34 @@ class ChatService:
                 last_message_at=datetime.utcnow(),
             )
             db.add(chat)
-            db.commit()
-            db.refresh(chat)
+            await db.commit()
 
             app_logger.info(f"Created new chat {chat.id} for user {user_id}")
             return chat
 
         except Exception as e:
             app_logger.error(f"Error creating chat: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise
 
     @staticmethod
-    def get_user_chats(
-        db: Session,
+    async def get_user_chats(
+        db: AsyncSession,
         user_id: int,
         skip: int = 0,
         limit: int = 50,
         include_archived: bool = False,
-    ) -> List[Chat]:
-        """Get user's chat list, ordered by last activity."""
+        cursor: Optional[str] = None,
+    ) -> Page:
+        """Get user's chat list, pinned first then by last activity."""
         try:
-            query = db.query(Chat).filter(Chat.user_id == user_id)
+            stmt = select(Chat).filter(Chat.user_id == user_id)
 
             if not include_archived:
-                query = query.filter(Chat.is_archived == False)
+                stmt = stmt.filter(Chat.is_archived == False)
 
-            chats = (
-                query.order_by(
-                    desc(Chat.is_pinned),  # Pinned chats first
-                    desc(Chat.last_message_at),  # Then by last activity
-                )
-                .offset(skip)
-                .limit(limit)
-                .all()
+            chats = await paginate_async(
+                db, stmt, ChatService.CHAT_LIST_KEYS, limit, cursor=cursor, skip=skip
             )
 
             app_logger.info(f"Retrieved {len(chats)} chats for user {user_id}")
@@ -68,46 +97,84 @@ class ChatService:
             raise
 
     @staticmethod
-    def get_chat_with_messages(
-        db: Session, chat_id: int, user_id: int, message_limit: int = 100
-    ) -> Optional[Chat]:
-        """Get chat with messages, ensuring user owns the chat."""
+    async def get_messages(
+        db: AsyncSession,
+        chat_id: int,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+        include_internal: bool = True,
+    ) -> Page:
+        """
+        Get a page of a chat's messages, newest first.
+
+        Reads at most limit rows from the (chat_id, created_at, id) index;
+        the chat's messages relationship is never loaded. Pass the returned
+        next_cursor back to load older messages. Access to the chat must be
+        validated by the caller.
+
+        Args:
+            db: Database session
+            chat_id: Chat ID
+            limit: Maximum number of messages to return
+            cursor: Cursor from a previous page, to continue after it
+            skip: Offset, used only without a cursor
+            include_internal: Include internal messages (AI context only)
+
+        Returns:
+            Page: Messages, newest first, with next_cursor for older ones
+        """
         try:
-            chat = (
-                db.query(Chat)
-                .filter(and_(Chat.id == chat_id, Chat.user_id == user_id))
-                .first()
+            stmt = select(Message).filter(Message.chat_id == chat_id)
+            if not include_internal:
+                stmt = stmt.filter(Message.is_internal == False)
+            return await paginate_async(
+                db, stmt, ChatService.MESSAGE_KEYS, limit, cursor=cursor, skip=skip
             )
 
+        except Exception as e:
+            app_logger.error(f"Error retrieving messages for chat {chat_id}: {str(e)}")
+            raise
+
+    @staticmethod
+    async def get_chat_context(
+        db: AsyncSession, chat_id: int, user_id: int, message_limit: int = 100
+    ) -> Optional[Tuple[Chat, List[Message]]]:
+        """
+        Load a chat and its recent history for a new exchange.
+
+        One query for the owned chat and one for its latest messages. The
+        history is returned separately, leaving chat.messages unloaded.
+
+        Args:
+            db: Database session
+            chat_id: Chat ID
+            user_id: User ID (for authorization)
+            message_limit: Number of recent messages to load
+
+        Returns:
+            Optional[Tuple[Chat, List[Message]]]: The chat and its recent
+            messages in chronological order, or None if the user has no
+            such chat
+        """
+        try:
+            chat = await ChatService._get_owned_chat(db, chat_id, user_id)
+
             if not chat:
                 app_logger.warning(f"Chat {chat_id} not found for user {user_id}")
                 return None
 
-            # Load messages if needed (they should be loaded via relationship)
-            if message_limit and message_limit < len(chat.messages):
-                # Get the most recent messages
-                recent_messages = (
-                    db.query(Message)
-                    .filter(Message.chat_id == chat_id)
-                    .order_by(desc(Message.created_at))
-                    .limit(message_limit)
-                    .all()
-                )
-                # Reverse to get chronological order
-                chat.messages = list(reversed(recent_messages))
+            recent = await ChatService.get_messages(db, chat_id, limit=message_limit)
+            history = list(reversed(recent))
 
-            app_logger.info(
-                f"Retrieved chat {chat_id} with {len(chat.messages)} messages"
-            )
-            return chat
+            return chat, history
 
         except Exception as e:
-            app_logger.error(f"Error retrieving chat {chat_id}: {str(e)}")
+            app_logger.error(f"Error loading context for chat {chat_id}: {str(e)}")
             raise
 
     @staticmethod
-    def add_message(
-        db: Session,
+    def build_message(
         chat_id: int,
         content: str,
         role: str,
@@ -117,87 +184,289 @@ class ChatService:
         tokens_used: int = None,
         processing_time: float = None,
         is_internal: bool = False,
+        first_token_time: float = None,
+        processing_status: str = "completed",
+        error_message: str = None,
     ) -> Message:
-        """Add a message to a chat."""
-        try:
-            message = Message(
-                chat_id=chat_id,
-                content=content,
-                role=role,
-                message_type=message_type,
-                file_metadata=file_metadata,
-                model_used=model_used,
-                tokens_used=tokens_used,
-                processing_time=processing_time,
-                is_internal=is_internal,
-                processed_at=datetime.utcnow() if role == "assistant" else None,
-            )
+        """Build an unsaved message for add_messages()."""
+        return Message(
+            chat_id=chat_id,
+            content=content,
+            role=role,
+            message_type=message_type,
+            file_metadata=file_metadata,
+            model_used=model_used,
+            tokens_used=tokens_used,
+            processing_time=processing_time,
+            first_token_time=first_token_time,
+            is_internal=is_internal,
+            processing_status=processing_status,
+            error_message=error_message,
+            processed_at=datetime.utcnow() if role == "assistant" else None,
+        )
 
-            db.add(message)
+    @staticmethod
+    async def add_messages(
+        db: AsyncSession,
+        chat: Chat,
+        messages: List[Message],
+        title: Optional[str] = None,
+    ) -> List[Message]:
+        """
+        Save messages to a loaded chat in a single commit.
+
+        The inserts, the chat's activity timestamps and an optional new title
+        go out in one flush. Defaults are set client-side, so the messages
+        are complete after the commit without a refresh.
+
+        Args:
+            db: Database session
+            chat: Chat the messages belong to
+            messages: Messages built with build_message()
+            title: New chat title, if it should change
+
+        Returns:
+            List[Message]: The saved messages
+        """
+        try:
+            db.add_all(messages)
 
-            # Update chat's last_message_at
-            chat = db.query(Chat).filter(Chat.id == chat_id).first()
-            if chat:
-                chat.last_message_at = datetime.utcnow()
-                chat.updated_at = datetime.utcnow()
+            now = datetime.utcnow()
+            chat.last_message_at = now
+            chat.updated_at = now
+            if title:
+                chat.title = title
 
-            db.commit()
-            db.refresh(message)
+            await db.commit()
 
-            app_logger.info(f"Added {role} message to chat {chat_id}")
-            return message
+            app_logger.info(f"Added {len(messages)} message(s) to chat {chat.id}")
+            return messages
 
         except Exception as e:
-            app_logger.error(f"Error adding message to chat {chat_id}: {str(e)}")
-            db.rollback()
+            app_logger.error(f"Error adding messages to chat {chat.id}: {str(e)}")
+            await db.rollback()
             raise
 
     @staticmethod
-    def update_chat_title(
-        db: Session, chat_id: int, user_id: int, new_title: str
+    async def add_message(
+        db: AsyncSession,
+        chat_id: int,
+        content: str,
+        role: str,
+        message_type: str = "text",
+        file_metadata: dict = None,
+        model_used: str = None,
+        tokens_used: int = None,
+        processing_time: float = None,
+        is_internal: bool = False,
+    ) -> Message:
+        """Add a message to a chat."""
+        chat = await db.get(Chat, chat_id)
+        if not chat:
+            raise ValueError(f"Chat {chat_id} not found")
+
+        message = ChatService.build_message(
+            chat_id,
+            content,
+            role,
+            message_type=message_type,
+            file_metadata=file_metadata,
+            model_used=model_used,
+            tokens_used=tokens_used,
+            processing_time=processing_time,
+            is_internal=is_internal,
+        )
+        await ChatService.add_messages(db, chat, [message])
+        return message
+
+    @staticmethod
+    async def update_chat_title(
+        db: AsyncSession, chat_id: int, user_id: int, new_title: str
     ) -> Optional[Chat]:
         """Update chat title."""
         try:
-            chat = (
-                db.query(Chat)
-                .filter(and_(Chat.id == chat_id, Chat.user_id == user_id))
-                .first()
-            )
+            chat = await ChatService._get_owned_chat(db, chat_id, user_id)
 
             if not chat:
                 return None
 
             chat.title = new_title
             chat.updated_at = datetime.utcnow()
-            db.commit()
-            db.refresh(chat)
+            await db.commit()
 
             app_logger.info(f"Updated title for chat {chat_id}")
             return chat
 
         except Exception as e:
             app_logger.error(f"Error updating chat title: {str(e)}")
-            db.rollback()
+            await db.rollback()
+            raise
+
+    @staticmethod
+    async def mark_message_cancelled(db: AsyncSession, message: Message) -> None:
+        """Mark a saved message whose reply was abandoned by the client."""
+        try:
+            message.processing_status = "cancelled"
+            message.error_message = "Client disconnected before the reply was ready"
+            await db.commit()
+        except Exception as e:
+            app_logger.error(f"Error marking message {message.id} cancelled: {str(e)}")
+            await db.rollback()
             raise
 
     @staticmethod
-    def archive_chat(
-        db: Session, chat_id: int, user_id: int, archived: bool = True
+    def resolve_generated_title(chat: Chat, title_task: asyncio.Task) -> Optional[str]:
+        """
+        Take a generated title if it is ready, without waiting for it.
+
+        A title still being generated is saved in the background once it
+        arrives (see save_generated_title), so it never delays the reply;
+        clients pick it up on their next chat fetch.
+
+        Args:
+            chat: Chat the title is for
+            title_task: Task running AIService.generate_chat_title
+
+        Returns:
+            Optional[str]: The title to save with the reply, or None if it
+            is not ready yet
+        """
+        if title_task.done():
+            return title_task.result()
+
+        task = asyncio.create_task(
+            ChatService.save_generated_title(chat.id, chat.title, title_task)
+        )
+        # Keep a reference so the task is not garbage collected mid-flight
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+        return None
+
+    @staticmethod
+    async def save_generated_title(
+        chat_id: int,
+        placeholder: str,
+        title_task: Awaitable[str],
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+    ) -> None:
+        """
+        Save a title that finished after the reply, in its own session.
+
+        The title is only applied while the chat still has its placeholder
+        title, so a rename by the user in the meantime wins.
+
+        Args:
+            chat_id: Chat ID
+            placeholder: The chat's title when generation started
+            title_task: Pending title generation
+            session_factory: Session factory (the request's session is gone)
+        """
+        try:
+            title = await title_task
+
+            async with session_factory() as db:
+                result = await db.execute(
+                    update(Chat)
+                    .where(Chat.id == chat_id, Chat.title == placeholder)
+                    .values(title=title, updated_at=datetime.utcnow())
+                )
+                await db.commit()
+
+            if result.rowcount:
+                app_logger.info(f"Updated title for chat {chat_id} after reply")
+
+        except Exception as e:
+            app_logger.error(f"Error saving generated title for chat {chat_id}: {str(e)}")
+
+    @staticmethod
+    def save_summary_in_background(
+        chat: Chat, summarized: List[Message], summary: Awaitable[Optional[str]]
+    ) -> None:
+        """
+        Save a chat's extended rolling summary once it is ready.
+
+        Called after the reply has been saved, so summarizing the turns that
+        fell out of the context window never delays it.
+
+        Args:
+            chat: Chat the summary is for, as loaded for the request
+            summarized: The turns the new summary folds in
+            summary: Pending AIService.summarize_conversation call
+        """
+        task = asyncio.create_task(
+            ChatService.save_context_summary(
+                chat.id, chat.summarized_until_id, summarized[-1].id, summary
+            )
+        )
+        # Keep a reference so the task is not garbage collected mid-flight
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    @staticmethod
+    async def save_context_summary(
+        chat_id: int,
+        previous_until_id: Optional[int],
+        summarized_until_id: int,
+        summary: Awaitable[Optional[str]],
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+    ) -> None:
+        """
+        Save a rolling summary in its own session.
+
+        The summary is only applied while the chat's stored summary still
+        ends where this one started, so a concurrent request's summary is
+        never overwritten with an older one. A failed or skipped summary
+        leaves the turns unsummarized, to be retried on the next message.
+
+        Args:
+            chat_id: Chat ID
+            previous_until_id: The chat's summarized_until_id when the
+                summary was started
+            summarized_until_id: Last message the new summary covers
+            summary: Pending summary (None if summarizing failed)
+            session_factory: Session factory (the request's session is gone)
+        """
+        try:
+            summary = await summary
+            if not summary:
+                return
+
+            unchanged = (
+                Chat.summarized_until_id.is_(None)
+                if previous_until_id is None
+                else Chat.summarized_until_id == previous_until_id
+            )
+            async with session_factory() as db:
+                result = await db.execute(
+                    update(Chat)
+                    .where(Chat.id == chat_id, unchanged)
+                    .values(context_summary=summary, summarized_until_id=summarized_until_id)
+                )
+                await db.commit()
+
+            if result.rowcount:
+                app_logger.info(
+                    f"Updated context summary for chat {chat_id} "
+                    f"(through message {summarized_until_id})"
+                )
+
+        except Exception as e:
+            app_logger.error(f"Error saving context summary for chat {chat_id}: {str(e)}")
+
+    @staticmethod
+    async def archive_chat(
+        db: AsyncSession, chat_id: int, user_id: int, archived: bool = True
     ) -> bool:
         """Archive or unarchive a chat."""
         try:
-            chat = (
-                db.query(Chat)
-                .filter(and_(Chat.id == chat_id, Chat.user_id == user_id))
-                .first()
-            )
+            chat = await ChatService._get_owned_chat(db, chat_id, user_id)
 
             if not chat:
                 return False
 
             chat.is_archived = archived
             chat.updated_at = datetime.utcnow()
-            db.commit()
+            await db.commit()
 
             action = "archived" if archived else "unarchived"
             app_logger.info(f"Chat {chat_id} {action}")
@@ -205,25 +474,23 @@ class ChatService:
 
         except Exception as e:
             app_logger.error(f"Error archiving chat: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise
 
     @staticmethod
-    def pin_chat(db: Session, chat_id: int, user_id: int, pinned: bool = True) -> bool:
+    async def pin_chat(
+        db: AsyncSession, chat_id: int, user_id: int, pinned: bool = True
+    ) -> bool:
         """Pin or unpin a chat."""
         try:
-            chat = (
-                db.query(Chat)
-                .filter(and_(Chat.id == chat_id, Chat.user_id == user_id))
-                .first()
-            )
+            chat = await ChatService._get_owned_chat(db, chat_id, user_id)
 
             if not chat:
                 return False
 
             chat.is_pinned = pinned
             chat.updated_at = datetime.utcnow()
-            db.commit()
+            await db.commit()
 
             action = "pinned" if pinned else "unpinned"
             app_logger.info(f"Chat {chat_id} {action}")
@@ -231,60 +498,59 @@ class ChatService:
 
         except Exception as e:
             app_logger.error(f"Error pinning chat: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise
 
     @staticmethod
-    def delete_chat(db: Session, chat_id: int, user_id: int) -> bool:
+    async def delete_chat(db: AsyncSession, chat_id: int, user_id: int) -> bool:
         """Delete a chat and all its messages."""
         try:
-            chat = (
-                db.query(Chat)
-                .filter(and_(Chat.id == chat_id, Chat.user_id == user_id))
-                .first()
-            )
+            chat = await ChatService._get_owned_chat(db, chat_id, user_id)
 
             if not chat:
                 return False
 
-            # Delete the chat (messages will be deleted automatically due to cascade)
-            db.delete(chat)
-            db.commit()
+            # Delete the messages in one statement instead of loading them
+            # for the ORM cascade, then mark the collection empty
+            result = await db.execute(delete(Message).filter(Message.chat_id == chat_id))
+            await db.run_sync(
+                CounterService.adjust, user_id, CounterName.MESSAGES, -result.rowcount
+            )
+            set_committed_value(chat, "messages", [])
+
+            await db.delete(chat)
+            await db.commit()
 
             app_logger.info(f"Deleted chat {chat_id} for user {user_id}")
             return True
 
         except Exception as e:
             app_logger.error(f"Error deleting chat {chat_id}: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise
 
     @staticmethod
-    def get_chat_stats(db: Session, user_id: int) -> dict:
+    async def get_chat_stats(db: AsyncSession, user_id: int) -> dict:
         """Get user's chat statistics."""
         try:
-            total_chats = db.query(Chat).filter(Chat.user_id == user_id).count()
-            archived_chats = (
-                db.query(Chat)
-                .filter(and_(Chat.user_id == user_id, Chat.is_archived == True))
-                .count()
-            )
-            pinned_chats = (
-                db.query(Chat)
-                .filter(and_(Chat.user_id == user_id, Chat.is_pinned == True))
-                .count()
-            )
-
-            total_messages = (
-                db.query(Message).join(Chat).filter(Chat.user_id == user_id).count()
+            counts = await CounterService.get_counts_async(
+                db,
+                user_id,
+                [
+                    CounterName.CHATS,
+                    CounterName.CHATS_ARCHIVED,
+                    CounterName.CHATS_PINNED,
+                    CounterName.MESSAGES,
+                ],
             )
 
             return {
-                "total_chats": total_chats,
-                "active_chats": total_chats - archived_chats,
-                "archived_chats": archived_chats,
-                "pinned_chats": pinned_chats,
-                "total_messages": total_messages,
+                "total_chats": counts[CounterName.CHATS],
+                "active_chats": counts[CounterName.CHATS]
+                - counts[CounterName.CHATS_ARCHIVED],
+                "archived_chats": counts[CounterName.CHATS_ARCHIVED],
+                "pinned_chats": counts[CounterName.CHATS_PINNED],
+                "total_messages": counts[CounterName.MESSAGES],
             }
 
         except Exception as e:
@@ -4,12 +4,17 @@ Classifier Service - Business logic for classifier management
 
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
+from datetime import datetime
 from fastapi import HTTPException, UploadFile
 
 from app.models.classifier import Classifier, ModalityType
 from app.models.disease import Disease
 from app.schemas.classifier import ClassifierCreate, ClassifierUpdate
 from app.services.storage_service import StorageService
+from app.engines.model_profiler import run_profile
+from app.core.config import settings
+from app.utils.uploads import ingest_upload
+from contextlib import ExitStack
 import logging
 
 logger = logging.getLogger(__name__)
@@ -111,10 +116,11 @@ class ClassifierService:
         """
         import pickle
 
+        upload = ingest_upload(features_file, settings.max_model_file_size)
         try:
             # Read features from file
-            features_content = features_file.file.read()
-            features_file.file.seek(0)  # Reset file pointer
+            with upload, upload.open() as f:
+                features_content = f.read()
             
             # Extract features from the uploaded file
             features = pickle.loads(features_content)
@@ -174,10 +180,26 @@ class ClassifierService:
         if not disease:
             raise HTTPException(status_code=404, detail="Associated disease not found")
 
+        # Read every file in chunks under the size cap before saving
+        with ExitStack() as stack:
+            uploads = {
+                name: stack.enter_context(
+                    ingest_upload(upload_file, settings.max_model_file_size)
+                )
+                for name, upload_file in (
+                    ("features.pkl", features_file),
+                    ("scaler.pkl", scaler_file),
+                    ("imputer.pkl", imputer_file),
+                    ("model.pkl", model_file),
+                    ("class.pkl", class_file),
+                )
+            }
+            uploads_open = stack.pop_all()
+
         try:
             # Read features from features_file before saving
-            features_content = features_file.file.read()
-            features_file.file.seek(0)  # Reset file pointer for saving
+            with uploads["features.pkl"].open() as f:
+                features_content = f.read()
             
             # Extract features from the uploaded file
             try:
@@ -199,11 +221,8 @@ class ClassifierService:
 
             # Prepare files dictionary
             files = {
-                "features.pkl": features_file.file,
-                "scaler.pkl": scaler_file.file,
-                "imputer.pkl": imputer_file.file,
-                "model.pkl": model_file.file,
-                "class.pkl": class_file.file,
+                name: uploads_open.enter_context(upload.open())
+                for name, upload in uploads.items()
             }
 
             # Save files to storage
@@ -211,6 +230,21 @@ class ClassifierService:
                 disease.storage_path, classifier.model_path, files
             )
 
+            # Load the saved artifacts in a sandboxed subprocess before activating
+            ClassifierService.profile_classifier(db, classifier)
+            violations = ClassifierService.get_profile_violations(classifier)
+            if violations:
+                classifier.is_active = False
+                db.commit()
+                logger.warning(
+                    f"⚠️ Refused to activate classifier {classifier.name} (ID: {classifier.id}): "
+                    f"{'; '.join(violations)}"
+                )
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"Model files saved but activation refused: {'; '.join(violations)}",
+                )
+
             # Activate classifier after successful file upload
             classifier.is_active = True
             db.commit()
@@ -223,14 +257,116 @@ class ClassifierService:
             return {
                 "saved_files": saved_paths,
                 "extracted_features": features,
-                "feature_count": len(features)
+                "feature_count": len(features),
+                "profile": ClassifierService.get_profile_summary(classifier),
             }
 
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"❌ Failed to upload model files: {str(e)}")
             raise HTTPException(
                 status_code=500, detail=f"Failed to upload model files: {str(e)}"
             )
+        finally:
+            uploads_open.close()
+
+    @staticmethod
+    def profile_classifier(db: Session, classifier: Classifier) -> Classifier:
+        """
+        Profile a tabular classifier's saved model files and store the results.
+
+        The artifacts are loaded in a separate process with a timeout and a
+        memory limit (see app/engines/model_profiler.py), so a broken or
+        pathologically slow model cannot affect the API process.
+
+        Args:
+            db: Database session
+            classifier: Classifier whose files have already been saved
+
+        Returns:
+            Classifier: Classifier with updated profile_* fields
+        """
+        model_dir = StorageService.get_classifier_directory(
+            classifier.disease.storage_path, classifier.model_path
+        )
+
+        logger.info(f"🔬 Profiling model files for classifier: {classifier.name}")
+        profile = run_profile(
+            str(model_dir),
+            timeout=settings.model_profile_timeout,
+            memory_limit_mb=settings.model_profile_memory_limit_mb,
+            batch_size=settings.model_profile_batch_size,
+        )
+
+        classifier.profile_load_time = profile.get("load_time")
+        classifier.profile_predict_latency = profile.get("predict_latency")
+        classifier.profile_batch_latency = profile.get("batch_latency")
+        classifier.profile_batch_size = profile.get("batch_size")
+        classifier.profile_memory_mb = profile.get("memory_mb")
+        classifier.profile_error = profile.get("error") or None
+        classifier.profiled_at = datetime.utcnow()
+        db.commit()
+        db.refresh(classifier)
+
+        if classifier.profile_error:
+            logger.error(
+                f"❌ Profiling failed for classifier {classifier.name}: {classifier.profile_error}"
+            )
+        else:
+            logger.info(
+                f"✅ Profiled classifier {classifier.name}: "
+                f"load={classifier.profile_load_time:.3f}s, "
+                f"predict={classifier.profile_predict_latency:.4f}s, "
+                f"batch({classifier.profile_batch_size})={classifier.profile_batch_latency:.4f}s, "
+                f"memory={classifier.profile_memory_mb:.1f}MB"
+            )
+
+        return classifier
+
+    @staticmethod
+    def get_profile_violations(classifier: Classifier) -> List[str]:
+        """
+        Check a classifier's stored profile against the configured ceilings.
+
+        Classifiers that were never profiled (e.g. uploaded before profiling
+        existed) have no violations.
+
+        Returns:
+            List of human-readable reasons activation must be refused
+        """
+        if classifier.profiled_at is None:
+            return []
+
+        if classifier.profile_error:
+            return [f"profiling failed: {classifier.profile_error}"]
+
+        ceilings = [
+            ("cold load time", classifier.profile_load_time, settings.model_max_load_time, "s"),
+            ("single-row predict latency", classifier.profile_predict_latency, settings.model_max_predict_latency, "s"),
+            ("batch predict latency", classifier.profile_batch_latency, settings.model_max_batch_latency, "s"),
+            ("memory footprint", classifier.profile_memory_mb, settings.model_max_memory_mb, "MB"),
+        ]
+
+        violations = []
+        for label, value, ceiling, unit in ceilings:
+            if value is not None and value > ceiling:
+                violations.append(
+                    f"{label} {value:.3f}{unit} exceeds limit of {ceiling}{unit}"
+                )
+        return violations
+
+    @staticmethod
+    def get_profile_summary(classifier: Classifier) -> Dict[str, Any]:
+        """Get the stored profile numbers for API responses."""
+        return {
+            "load_time": classifier.profile_load_time,
+            "predict_latency": classifier.profile_predict_latency,
+            "batch_latency": classifier.profile_batch_latency,
+            "batch_size": classifier.profile_batch_size,
+            "memory_mb": classifier.profile_memory_mb,
+            "error": classifier.profile_error,
+        }
 
     @staticmethod
     def get_classifier(db: Session, classifier_id: int) -> Classifier:
@@ -376,6 +512,8 @@ class ClassifierService:
         if classifier_data.version is not None:
             classifier.version = classifier_data.version
         if classifier_data.is_active is not None:
+            if classifier_data.is_active and not classifier.is_active:
+                ClassifierService._ensure_can_activate(classifier)
             classifier.is_active = classifier_data.is_active
 
         try:
@@ -436,12 +574,14 @@ class ClassifierService:
                 detail=f"Invalid file type. Must be one of: {', '.join(valid_extensions)}"
             )
 
+        upload = ingest_upload(model_file, settings.max_model_file_size)
         try:
             # Save single model file
-            files = {f"model{file_ext}": model_file.file}
-            saved_paths = StorageService.save_model_files(
-                disease.storage_path, classifier.model_path, files
-            )
+            with upload, upload.open() as f:
+                files = {f"model{file_ext}": f}
+                saved_paths = StorageService.save_model_files(
+                    disease.storage_path, classifier.model_path, files
+                )
 
             # Activate classifier after successful file upload
             classifier.is_active = True
@@ -604,6 +744,9 @@ class ClassifierService:
         if not classifier:
             raise HTTPException(status_code=404, detail="Classifier not found")
 
+        if not classifier.is_active:
+            ClassifierService._ensure_can_activate(classifier)
+
         try:
             # Toggle is_active status
             classifier.is_active = not classifier.is_active
@@ -623,6 +766,16 @@ class ClassifierService:
                 status_code=500, detail=f"Failed to toggle classifier status: {str(e)}"
             )
 
+    @staticmethod
+    def _ensure_can_activate(classifier: Classifier) -> None:
+        """Raise if the classifier's profile exceeds the configured ceilings."""
+        violations = ClassifierService.get_profile_violations(classifier)
+        if violations:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot activate classifier: {'; '.join(violations)}",
+            )
+
     @staticmethod
     def delete_classifier(db: Session, classifier_id: int) -> bool:
         """
@@ -0,0 +1,253 @@
+"""
+Context Service - Token-budgeted conversation context for the LLM
+
+Each chat request sends the system prompt, a rolling summary of older
+turns, as many recent turns as fit verbatim, and the new message, all
+within a per-model token budget:
+
+- Recent turns are kept verbatim, newest first, until the budget is spent.
+- Turns that fall out of that window are folded into Chat.context_summary,
+  which is extended in the background after each reply
+  (AIService.summarize_conversation) and covers messages up to
+  Chat.summarized_until_id.
+- Internal file analyses are cut down to their key findings, so one large
+  upload cannot crowd out the conversation.
+
+This module only plans and formats; it makes no LLM or database calls.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import re
+
+from app.core.config import settings
+from app.models.chat import Chat
+from app.models.message import Message
+from app.utils.ai_helpers import estimate_tokens
+
+
+# Context windows (tokens) of the Groq models the platform uses
+MODEL_CONTEXT_WINDOWS = {
+    "llama-3.3-70b-versatile": 131072,
+    "llama-3.1-8b-instant": 131072,
+    "meta-llama/llama-4-maverick-17b-128e-instruct": 131072,
+    "meta-llama/llama-4-scout-17b-16e-instruct": 131072,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Role and separator tokens the chat format adds around each message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Sections of a file analysis worth keeping when it must be shortened
+KEY_FINDING_PATTERN = re.compile(
+    r"key|finding|important|significan|abnormal|critical|summary|document type",
+    re.IGNORECASE,
+)
+HEADING_PATTERN = re.compile(r"^\s*(#{1,6}\s|\d+\.\s+\*\*|\*\*[^*]+\*\*:?\s*$)")
+TRUNCATION_NOTE = "[File analysis shortened to its key findings]"
+
+
+@dataclass
+class ConversationContext:
+    """The history to send with a message, and the turns left to summarize."""
+
+    summary: Optional[str]
+    recent: List[Message]
+    to_summarize: List[Message] = field(default_factory=list)
+    tokens: int = 0
+
+    def as_chat_history(self) -> List[Dict[str, str]]:
+        """Format as the chat_history expected by AIService.process_text_message."""
+        history = []
+        if self.summary:
+            history.append(
+                {
+                    "role": "system",
+                    "content": f"Summary of the earlier conversation:\n{self.summary}",
+                }
+            )
+        history.extend(
+            {"role": msg.role, "content": ContextService.message_content(msg)}
+            for msg in self.recent
+        )
+        return history
+
+
+class ContextService:
+    """Service for fitting conversation history into a token budget."""
+
+    @staticmethod
+    def get_token_budget(model: str) -> int:
+        """
+        Get the input token budget for a model.
+
+        Args:
+            model: Model name
+
+        Returns:
+            int: The configured budget, capped so the prompt plus a full
+            reply fits the model's context window
+        """
+        window = MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+        return min(settings.context_token_budget, window - settings.max_tokens)
+
+    @staticmethod
+    def message_content(message: Message) -> str:
+        """Get a message's content as sent to the LLM."""
+        if message.is_internal:
+            return ContextService.extract_key_findings(
+                message.content, settings.context_file_analysis_max_tokens
+            )
+        return message.content
+
+    @staticmethod
+    def message_tokens(message: Message) -> int:
+        """Count the tokens a message costs in the context."""
+        return (
+            estimate_tokens(ContextService.message_content(message))
+            + MESSAGE_OVERHEAD_TOKENS
+        )
+
+    @staticmethod
+    def truncate_to_tokens(text: str, max_tokens: int) -> str:
+        """Cut text to at most max_tokens, at a word boundary where possible."""
+        tokens = estimate_tokens(text)
+        if tokens <= max_tokens:
+            return text
+
+        cut = len(text) * max_tokens // tokens
+        while cut > 0 and estimate_tokens(text[:cut]) > max_tokens:
+            cut = cut * 9 // 10
+        space = text.rfind(" ", 0, cut)
+        if space > cut // 2:
+            cut = space
+        return text[:cut].rstrip() + " …"
+
+    @staticmethod
+    def extract_key_findings(text: str, max_tokens: int) -> str:
+        """
+        Shorten a file analysis to its key findings.
+
+        Sections whose heading mentions findings, important or abnormal
+        values, or a summary are kept in their original order; the rest are
+        dropped. If no section matches, the start of the analysis is kept.
+
+        Args:
+            text: Analysis text
+            max_tokens: Token limit for the result
+
+        Returns:
+            str: The text itself if within the limit, otherwise its key
+            findings with a note that it was shortened
+        """
+        if estimate_tokens(text) <= max_tokens:
+            return text
+
+        sections: List[List[str]] = [[]]
+        for line in text.splitlines():
+            if HEADING_PATTERN.match(line) and sections[-1]:
+                sections.append([])
+            sections[-1].append(line)
+
+        key_sections = [
+            "\n".join(lines).strip()
+            for lines in sections
+            if lines and KEY_FINDING_PATTERN.search(lines[0])
+        ]
+        findings = "\n\n".join(section for section in key_sections if section)
+
+        budget = max_tokens - estimate_tokens(TRUNCATION_NOTE) - 2
+        findings = ContextService.truncate_to_tokens(findings or text, budget)
+        return f"{findings}\n\n{TRUNCATION_NOTE}"
+
+    @staticmethod
+    def build_context(
+        chat: Chat,
+        history: List[Message],
+        message: str,
+        system_prompt: str,
+        model: str,
+    ) -> ConversationContext:
+        """
+        Choose which turns to send verbatim and which to summarize.
+
+        Args:
+            chat: The chat, with its current summary
+            history: Recent messages in chronological order
+            message: The new user message
+            system_prompt: System prompt sent with the request
+            model: Model the request goes to
+
+        Returns:
+            ConversationContext: The recent turns that fit the budget after
+            the system prompt, message and summary, and the older
+            unsummarized turns that should be folded into the summary
+        """
+        fixed = (
+            estimate_tokens(system_prompt)
+            + estimate_tokens(message)
+            + 2 * MESSAGE_OVERHEAD_TOKENS
+        )
+        # Room for the summary as it will be after folding in more turns
+        summary_reserve = settings.context_summary_max_tokens + MESSAGE_OVERHEAD_TOKENS
+        available = ContextService.get_token_budget(model) - fixed - summary_reserve
+
+        # Turns already covered by the summary are never sent again
+        unsummarized = [
+            msg
+            for msg in history
+            if chat.summarized_until_id is None or msg.id > chat.summarized_until_id
+        ]
+
+        recent: List[Message] = []
+        used = 0
+        for msg in reversed(unsummarized):
+            cost = ContextService.message_tokens(msg)
+            if used + cost > available:
+                break
+            recent.append(msg)
+            used += cost
+        recent.reverse()
+
+        to_summarize = unsummarized[: len(unsummarized) - len(recent)]
+
+        summary_tokens = (
+            estimate_tokens(chat.context_summary) + MESSAGE_OVERHEAD_TOKENS
+            if chat.context_summary
+            else 0
+        )
+        return ConversationContext(
+            summary=chat.context_summary,
+            recent=recent,
+            to_summarize=to_summarize,
+            tokens=fixed + summary_tokens + used,
+        )
+
+    @staticmethod
+    def format_transcript(messages: List[Message], max_tokens: int) -> str:
+        """
+        Format messages as a plain transcript for summarization.
+
+        Args:
+            messages: Messages in chronological order
+            max_tokens: Token limit; the oldest lines are dropped first
+
+        Returns:
+            str: One "Role: content" paragraph per message
+        """
+        lines = [
+            f"{msg.role.capitalize()}: {ContextService.message_content(msg)}"
+            for msg in messages
+        ]
+
+        kept: List[str] = []
+        used = 0
+        for line in reversed(lines):
+            cost = estimate_tokens(line) + 1
+            if used + cost > max_tokens:
+                if not kept:  # A single oversized message: keep its start
+                    kept.append(ContextService.truncate_to_tokens(line, max_tokens))
+                break
+            kept.append(line)
+            used += cost
+        return "\n\n".join(reversed(kept))
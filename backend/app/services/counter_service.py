@@ -0,0 +1,440 @@
+"""
+Counter Service - Denormalized counters for chats, messages, notifications
+and diagnoses
+
+Counts that list and badge endpoints need on every request are stored
+instead of recomputed:
+
+- chats.message_count: messages per chat
+- user_counters: chats (total/archived/pinned), messages, unread
+  notifications and diagnoses per status, per user
+
+A session flush listener turns inserts, deletes and changes of the counted
+columns into counter increments, executed on the flush's own connection so
+they commit or roll back together with the rows they describe. Bulk
+UPDATE/DELETE statements bypass the listener, so callers adjust counters
+themselves (see NotificationService.mark_all_as_read).
+
+reconcile() recomputes every counter from the source tables and repairs
+drift; run_reconciliation_job() runs it periodically in the background.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+import asyncio
+import logging
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, event, func, select, update
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.chat import Chat
+from app.models.counter import CounterName, UserCounter
+from app.models.diagnosis import Diagnosis
+from app.models.message import Message
+from app.models.notification import Notification
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+CounterKey = Tuple[int, str]  # (user_id, counter name)
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+# Columns whose changes move a counter. Their previous value is loaded on
+# assignment even when expired, so a change is never mistaken for a new value.
+_COUNTED_ATTRIBUTES = (
+    Chat.is_archived,
+    Chat.is_pinned,
+    Notification.is_read,
+    Diagnosis.status,
+)
+
+
+def _track_previous_value(target, value, oldvalue, initiator):
+    pass  # Registered only for active_history
+
+
+for _attribute in _COUNTED_ATTRIBUTES:
+    event.listen(_attribute, "set", _track_previous_value, active_history=True)
+
+
+def _changed(obj, attr: str):
+    """Return (old, new) if a column changed in this flush, else None."""
+    history = sa_inspect(obj).attrs[attr].history
+    if not history.has_changes():
+        return None
+    old = history.deleted[0] if history.deleted else None
+    new = history.added[0] if history.added else None
+    return old, new
+
+
+def _chat_counter_names(chat: Chat):
+    names = [CounterName.CHATS]
+    if chat.is_archived:
+        names.append(CounterName.CHATS_ARCHIVED)
+    if chat.is_pinned:
+        names.append(CounterName.CHATS_PINNED)
+    return names
+
+
+def _chat_owners(session: Session, chat_ids: Iterable[int]) -> Dict[int, int]:
+    """Map chat id -> user id, from the session where possible."""
+    owners = {
+        obj.id: obj.user_id
+        for obj in list(session.identity_map.values()) + list(session.deleted)
+        if isinstance(obj, Chat)
+    }
+    missing = set(chat_ids) - owners.keys()
+    if missing:
+        chats = Chat.__table__
+        rows = session.connection().execute(
+            select(chats.c.id, chats.c.user_id).where(chats.c.id.in_(missing))
+        )
+        owners.update({chat_id: user_id for chat_id, user_id in rows})
+    return owners
+
+
+def _collect_deltas(session: Session):
+    """Turn the flushed inserts, deletes and updates into counter deltas."""
+    user_deltas: Dict[CounterKey, int] = defaultdict(int)
+    message_deltas: Dict[int, int] = defaultdict(int)  # chat_id -> delta
+
+    for sign, objects in ((1, session.new), (-1, session.deleted)):
+        for obj in objects:
+            if isinstance(obj, Chat):
+                for name in _chat_counter_names(obj):
+                    user_deltas[(obj.user_id, name)] += sign
+            elif isinstance(obj, Message):
+                message_deltas[obj.chat_id] += sign
+            elif isinstance(obj, Notification):
+                if not obj.is_read:
+                    user_deltas[(obj.user_id, CounterName.NOTIFICATIONS_UNREAD)] += sign
+            elif isinstance(obj, Diagnosis):
+                user_deltas[(obj.user_id, CounterName.diagnoses(obj.status))] += sign
+
+    for obj in session.dirty:
+        if isinstance(obj, Chat):
+            for attr, name in (
+                ("is_archived", CounterName.CHATS_ARCHIVED),
+                ("is_pinned", CounterName.CHATS_PINNED),
+            ):
+                change = _changed(obj, attr)
+                if change and bool(change[0]) != bool(change[1]):
+                    user_deltas[(obj.user_id, name)] += 1 if change[1] else -1
+        elif isinstance(obj, Notification):
+            change = _changed(obj, "is_read")
+            if change and bool(change[0]) != bool(change[1]):
+                key = (obj.user_id, CounterName.NOTIFICATIONS_UNREAD)
+                user_deltas[key] += -1 if change[1] else 1
+        elif isinstance(obj, Diagnosis):
+            change = _changed(obj, "status")
+            if change and change[0] != change[1]:
+                old, new = change
+                if old is not None:
+                    user_deltas[(obj.user_id, CounterName.diagnoses(old))] -= 1
+                user_deltas[(obj.user_id, CounterName.diagnoses(new))] += 1
+
+    # Messages count towards their chat and the chat owner's total
+    message_deltas = {k: v for k, v in message_deltas.items() if v}
+    if message_deltas:
+        owners = _chat_owners(session, message_deltas)
+        for chat_id, delta in message_deltas.items():
+            if chat_id in owners:
+                user_deltas[(owners[chat_id], CounterName.MESSAGES)] += delta
+
+    return user_deltas, message_deltas
+
+
+def _upsert_counters(connection: Connection, deltas: Dict[CounterKey, int]) -> None:
+    """Add deltas to user counters, creating missing rows."""
+    rows = [
+        {"user_id": user_id, "name": name, "value": delta}
+        for (user_id, name), delta in deltas.items()
+        if delta
+    ]
+    if not rows:
+        return
+
+    table = UserCounter.__table__
+    insert = _UPSERT_INSERTS.get(connection.dialect.name)
+    if insert is not None:
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.name],
+            set_={"value": table.c.value + stmt.excluded.value},
+        )
+        connection.execute(stmt, rows)
+        return
+
+    for row in rows:
+        result = connection.execute(
+            update(table)
+            .where(table.c.user_id == row["user_id"], table.c.name == row["name"])
+            .values(value=table.c.value + row["value"])
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_counters(session: Session, flush_context) -> None:
+    """Apply counter deltas for this flush on the same transaction."""
+    user_deltas, message_deltas = _collect_deltas(session)
+
+    # Rows going away with their user or chat need no counter updates
+    deleted_users = {obj.id for obj in session.deleted if isinstance(obj, User)}
+    deleted_chats = {obj.id for obj in session.deleted if isinstance(obj, Chat)}
+    user_deltas = {
+        key: delta
+        for key, delta in user_deltas.items()
+        if delta and key[0] not in deleted_users
+    }
+    message_deltas = {
+        chat_id: delta
+        for chat_id, delta in message_deltas.items()
+        if chat_id not in deleted_chats
+    }
+    if not user_deltas and not message_deltas:
+        return
+
+    connection = session.connection()
+    _upsert_counters(connection, user_deltas)
+
+    if message_deltas:
+        chats = Chat.__table__
+        connection.execute(
+            update(chats)
+            .where(chats.c.id == bindparam("chat_id_"))
+            .values(message_count=chats.c.message_count + bindparam("delta")),
+            [{"chat_id_": k, "delta": v} for k, v in message_deltas.items()],
+        )
+
+        # Keep loaded chats in step without marking them dirty
+        for obj in session.identity_map.values():
+            if isinstance(obj, Chat) and obj.id in message_deltas:
+                if "message_count" in obj.__dict__:
+                    current = obj.__dict__["message_count"] or 0
+                    set_committed_value(
+                        obj, "message_count", current + message_deltas[obj.id]
+                    )
+
+
+class CounterService:
+    """Service for reading and repairing denormalized counters."""
+
+    @staticmethod
+    def adjust(db: Session, user_id: int, name: str, delta: int) -> None:
+        """
+        Adjust a user counter inside the current transaction.
+
+        For changes made with bulk UPDATE/DELETE, which skip the flush listener.
+
+        Args:
+            db: Database session
+            user_id: User ID
+            name: Counter name (see CounterName)
+            delta: Amount to add (negative to subtract)
+        """
+        _upsert_counters(db.connection(), {(user_id, name): delta})
+
+    @staticmethod
+    def get_counts(db: Session, user_id: int, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Read several counters for a user in one query.
+
+        Args:
+            db: Database session
+            user_id: User ID
+            names: Counter names (see CounterName)
+
+        Returns:
+            Dict[str, int]: Counter values, 0 for counters never incremented
+        """
+        names = list(names)
+        rows = db.execute(CounterService._counts_query(user_id, names)).all()
+        return CounterService._as_counts(names, rows)
+
+    @staticmethod
+    async def get_counts_async(
+        db: AsyncSession, user_id: int, names: Iterable[str]
+    ) -> Dict[str, int]:
+        """Async variant of get_counts()."""
+        names = list(names)
+        rows = (await db.execute(CounterService._counts_query(user_id, names))).all()
+        return CounterService._as_counts(names, rows)
+
+    @staticmethod
+    def _counts_query(user_id: int, names):
+        return select(UserCounter.name, UserCounter.value).filter(
+            UserCounter.user_id == user_id, UserCounter.name.in_(names)
+        )
+
+    @staticmethod
+    def _as_counts(names, rows) -> Dict[str, int]:
+        counts = dict.fromkeys(names, 0)
+        counts.update({name: value for name, value in rows})
+        return counts
+
+    @staticmethod
+    def compute_user_counters(
+        db: Session, user_id: Optional[int] = None
+    ) -> Dict[CounterKey, int]:
+        """
+        Recompute user counters from the source tables.
+
+        Args:
+            db: Database session
+            user_id: Only compute this user's counters
+
+        Returns:
+            Dict[CounterKey, int]: Non-zero counts keyed by (user_id, name)
+        """
+        def scoped(stmt, column):
+            return stmt if user_id is None else stmt.filter(column == user_id)
+
+        counts: Dict[CounterKey, int] = {}
+
+        chat_counts = [
+            (CounterName.CHATS, None),
+            (CounterName.CHATS_ARCHIVED, Chat.is_archived == True),
+            (CounterName.CHATS_PINNED, Chat.is_pinned == True),
+        ]
+        for name, condition in chat_counts:
+            stmt = select(Chat.user_id, func.count(Chat.id)).group_by(Chat.user_id)
+            if condition is not None:
+                stmt = stmt.filter(condition)
+            for owner, count in db.execute(scoped(stmt, Chat.user_id)):
+                counts[(owner, name)] = count
+
+        stmt = (
+            select(Chat.user_id, func.count(Message.id))
+            .join(Message, Message.chat_id == Chat.id)
+            .group_by(Chat.user_id)
+        )
+        for owner, count in db.execute(scoped(stmt, Chat.user_id)):
+            counts[(owner, CounterName.MESSAGES)] = count
+
+        stmt = (
+            select(Notification.user_id, func.count(Notification.id))
+            .filter(Notification.is_read == False)
+            .group_by(Notification.user_id)
+        )
+        for owner, count in db.execute(scoped(stmt, Notification.user_id)):
+            counts[(owner, CounterName.NOTIFICATIONS_UNREAD)] = count
+
+        stmt = select(
+            Diagnosis.user_id, Diagnosis.status, func.count(Diagnosis.id)
+        ).group_by(Diagnosis.user_id, Diagnosis.status)
+        for owner, status, count in db.execute(scoped(stmt, Diagnosis.user_id)):
+            counts[(owner, CounterName.diagnoses(status))] = count
+
+        return counts
+
+    @staticmethod
+    def reconcile(db: Session, user_id: Optional[int] = None) -> int:
+        """
+        Repair counters that drifted from the source tables, and commit.
+
+        Writes racing with a run can leave a counter off until the next run,
+        which recomputes it again.
+
+        Args:
+            db: Database session
+            user_id: Only reconcile this user's counters
+
+        Returns:
+            int: Number of counters that were corrected
+        """
+        try:
+            expected = CounterService.compute_user_counters(db, user_id)
+
+            stmt = select(UserCounter.user_id, UserCounter.name, UserCounter.value)
+            if user_id is not None:
+                stmt = stmt.filter(UserCounter.user_id == user_id)
+            actual = {(owner, name): value for owner, name, value in db.execute(stmt)}
+
+            table = UserCounter.__table__
+            fixed = 0
+            for key in expected.keys() | actual.keys():
+                value = expected.get(key, 0)
+                if actual.get(key) == value or (key not in actual and value == 0):
+                    continue
+                if key in actual:
+                    db.execute(
+                        update(table)
+                        .where(table.c.user_id == key[0], table.c.name == key[1])
+                        .values(value=value)
+                    )
+                else:
+                    db.execute(
+                        table.insert().values(user_id=key[0], name=key[1], value=value)
+                    )
+                fixed += 1
+
+            # Chat message counts: one correlated UPDATE for drifted chats only
+            chats = Chat.__table__
+            actual_count = (
+                select(func.count(Message.id))
+                .where(Message.chat_id == chats.c.id)
+                .scalar_subquery()
+            )
+            stmt = (
+                update(chats)
+                .where(chats.c.message_count != actual_count)
+                .values(message_count=actual_count)
+            )
+            if user_id is not None:
+                stmt = stmt.where(chats.c.user_id == user_id)
+            fixed += db.execute(stmt).rowcount
+
+            db.commit()
+
+            if fixed:
+                logger.warning(f"⚠️ Reconciled {fixed} drifted counters")
+            else:
+                logger.info("✅ Counters are consistent")
+            return fixed
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Counter reconciliation failed: {str(e)}")
+            raise
+
+
+def reconcile_all_counters() -> int:
+    """Reconcile every counter using a fresh session."""
+    from app.db.connection import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return CounterService.reconcile(db)
+    finally:
+        db.close()
+
+
+async def run_reconciliation_job(interval_seconds: float) -> None:
+    """
+    Reconcile counters every interval until cancelled.
+
+    Args:
+        interval_seconds: Time between runs
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(reconcile_all_counters)
+        except Exception:
+            pass  # Already logged; try again next interval
+
+
+if __name__ == "__main__":
+    # Manual run: python -m app.services.counter_service
+    print(f"Corrected {reconcile_all_counters()} counters")
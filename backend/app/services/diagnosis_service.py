@@ -2,7 +2,7 @@
 Diagnosis Service - Business logic for diagnosis requests with async processing
 """
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import Dict, Any, Optional
 from datetime import datetime
 from pathlib import Path
@@ -11,11 +11,14 @@ import logging
 
 from app.models.diagnosis import Diagnosis, DiagnosisStatus
 from app.models.classifier import Classifier, ModalityType
+from app.models.counter import CounterName
 from app.models.notification import NotificationType
 from app.services.notification_service import NotificationService
+from app.services.counter_service import CounterService
 from app.services.email_service import EmailService
-from app.engines.gentabengine import load_model
 from app.core.config import settings
+from app.core.logging import request_context
+from app.utils.pagination import Page, paginate
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +26,9 @@ logger = logging.getLogger(__name__)
 class DiagnosisService:
     """Service for managing diagnosis requests."""
 
+    # Keyset for list pagination: newest first, id breaks created_at ties
+    LIST_KEYS = [(Diagnosis.created_at, True), (Diagnosis.id, True)]
+
     @staticmethod
     def create_diagnosis(
         db: Session,
@@ -95,7 +101,7 @@ class DiagnosisService:
         return diagnosis
 
     @staticmethod
-    def process_diagnosis(db: Session, diagnosis_id: int):
+    def process_diagnosis(db: Session, diagnosis_id: int, request_id: Optional[str] = None):
         """
         Process a diagnosis request in the background.
 
@@ -104,10 +110,25 @@ class DiagnosisService:
         Args:
             db: Database session
             diagnosis_id: Diagnosis ID to process
+            request_id: Id of the request that created the diagnosis, so the
+                processing, email and notification logs can be traced to it
         """
-        logger.info(f"🔄 Starting diagnosis processing for ID={diagnosis_id}")
+        with request_context(request_id):
+            DiagnosisService._process_diagnosis(db, diagnosis_id)
+
+    @staticmethod
+    def _process_diagnosis(db: Session, diagnosis_id: int):
+        logger.info(
+            f"🔄 Starting diagnosis processing for ID={diagnosis_id}",
+            extra={"fields": {"diagnosis_id": diagnosis_id, "stage": "started"}},
+        )
 
-        diagnosis = db.query(Diagnosis).filter(Diagnosis.id == diagnosis_id).first()
+        diagnosis = (
+            DiagnosisService._query_with_details(db)
+            .options(joinedload(Diagnosis.user))
+            .filter(Diagnosis.id == diagnosis_id)
+            .first()
+        )
         if not diagnosis:
             logger.error(f"❌ Diagnosis {diagnosis_id} not found")
             return
@@ -151,12 +172,24 @@ class DiagnosisService:
             db.commit()
 
             # Send notifications
+            fields = {
+                "diagnosis_id": diagnosis_id,
+                "classifier_id": diagnosis.classifier_id,
+                "stage": diagnosis.status.value,
+                "duration_ms": round(result["processing_time"] * 1000, 1),
+            }
             if diagnosis.status == DiagnosisStatus.COMPLETED:
                 DiagnosisService._send_completion_notifications(db, diagnosis)
-                logger.info(f"✅ Diagnosis {diagnosis_id} completed successfully")
+                logger.info(
+                    f"✅ Diagnosis {diagnosis_id} completed successfully",
+                    extra={"fields": fields},
+                )
             else:
                 DiagnosisService._send_failure_notifications(db, diagnosis)
-                logger.error(f"❌ Diagnosis {diagnosis_id} failed: {result['error']}")
+                logger.error(
+                    f"❌ Diagnosis {diagnosis_id} failed: {result['error']}",
+                    extra={"fields": {**fields, "error": result["error"]}},
+                )
 
         except Exception as e:
             # Mark as failed
@@ -165,7 +198,12 @@ class DiagnosisService:
             diagnosis.completed_at = datetime.utcnow()
             db.commit()
 
-            logger.error(f"❌ Diagnosis {diagnosis_id} processing error: {str(e)}")
+            logger.error(
+                f"❌ Diagnosis {diagnosis_id} processing error: {str(e)}",
+                extra={
+                    "fields": {"diagnosis_id": diagnosis_id, "stage": "failed", "error": str(e)}
+                },
+            )
             DiagnosisService._send_failure_notifications(db, diagnosis)
 
     @staticmethod
@@ -200,6 +238,9 @@ class DiagnosisService:
             if not model_dir.exists():
                 raise FileNotFoundError(f"Model directory not found: {model_dir}")
 
+            # Imported here so pandas and joblib load with the first diagnosis
+            from app.engines.gentabengine import load_model
+
             # Load model and predict
             predictor = load_model(str(model_dir), classifier_name)
             result = predictor.predict(input_data)
@@ -291,12 +332,27 @@ class DiagnosisService:
         except Exception as e:
             logger.error(f"Failed to create failure notification: {str(e)}")
 
+    @staticmethod
+    def _query_with_details(db: Session):
+        """
+        Base diagnosis query with disease and classifier eager-loaded.
+
+        Both are many-to-one, so they are fetched in the same SELECT via
+        LEFT OUTER JOINs instead of one lazy query per row.
+        """
+        return db.query(Diagnosis).options(
+            joinedload(Diagnosis.disease),
+            joinedload(Diagnosis.classifier),
+        )
+
     @staticmethod
     def get_diagnosis(
         db: Session, diagnosis_id: int, user_id: Optional[int] = None
     ) -> Diagnosis:
         """Get a diagnosis by ID."""
-        query = db.query(Diagnosis).filter(Diagnosis.id == diagnosis_id)
+        query = DiagnosisService._query_with_details(db).filter(
+            Diagnosis.id == diagnosis_id
+        )
 
         if user_id is not None:
             query = query.filter(Diagnosis.user_id == user_id)
@@ -315,9 +371,12 @@ class DiagnosisService:
         status: Optional[str] = None,
         skip: int = 0,
         limit: int = 100,
-    ):
-        """Get diagnoses for a user."""
-        query = db.query(Diagnosis).filter(Diagnosis.user_id == user_id)
+        cursor: Optional[str] = None,
+    ) -> Page:
+        """Get diagnoses for a user, by cursor when given or by offset."""
+        query = DiagnosisService._query_with_details(db).filter(
+            Diagnosis.user_id == user_id
+        )
 
         if disease_id is not None:
             query = query.filter(Diagnosis.disease_id == disease_id)
@@ -325,8 +384,21 @@ class DiagnosisService:
         if status is not None:
             query = query.filter(Diagnosis.status == status)
 
-        query = query.order_by(Diagnosis.created_at.desc())
-        return query.offset(skip).limit(limit).all()
+        return paginate(
+            query, DiagnosisService.LIST_KEYS, limit, cursor=cursor, skip=skip
+        )
+
+    @staticmethod
+    def get_user_diagnosis_stats(db: Session, user_id: int) -> Dict[str, int]:
+        """Get a user's diagnosis counts per status from the stored counters."""
+        names = {
+            status.value: CounterName.diagnoses(status) for status in DiagnosisStatus
+        }
+        counts = CounterService.get_counts(db, user_id, names.values())
+
+        stats = {status: counts[name] for status, name in names.items()}
+        stats["total"] = sum(stats.values())
+        return stats
 
     @staticmethod
     def get_all_diagnoses(
@@ -335,9 +407,10 @@ class DiagnosisService:
         status: Optional[str] = None,
         skip: int = 0,
         limit: int = 100,
-    ):
-        """Get all diagnoses (admin only)."""
-        query = db.query(Diagnosis)
+        cursor: Optional[str] = None,
+    ) -> Page:
+        """Get all diagnoses (admin only), by cursor when given or by offset."""
+        query = DiagnosisService._query_with_details(db)
 
         if disease_id is not None:
             query = query.filter(Diagnosis.disease_id == disease_id)
@@ -345,5 +418,6 @@ class DiagnosisService:
         if status is not None:
             query = query.filter(Diagnosis.status == status)
 
-        query = query.order_by(Diagnosis.created_at.desc())
-        return query.offset(skip).limit(limit).all()
+        return paginate(
+            query, DiagnosisService.LIST_KEYS, limit, cursor=cursor, skip=skip
+        )
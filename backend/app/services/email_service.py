@@ -4,9 +4,11 @@ from sib_api_v3_sdk.rest import ApiException
 from typing import Optional
 from pathlib import Path
 from app.core.config import settings
-import logging
+from app.core.logging import get_logger
+import time
 
-logger = logging.getLogger("email")
+# logs/email.log; lines carry the id of the request that sent the email
+logger = get_logger("email")
 
 
 class EmailService:
@@ -45,7 +47,8 @@ class EmailService:
             if not settings.brevo_api_key or not settings.brevo_from_email:
                 # Log for development (when Brevo is not configured)
                 logger.warning(
-                    f"Brevo API not configured. Subject: {subject} to {to_email}"
+                    f"Brevo API not configured. Subject: {subject} to {to_email}",
+                    extra={"fields": {"to": to_email, "subject": subject, "success": False}},
                 )
                 print(f"📧 Email: {subject}")
                 print(f"📩 To: {to_email}")
@@ -68,21 +71,37 @@ class EmailService:
 
             # Send email via Brevo API
             logger.info(f"Attempting to send email to {to_email} via Brevo API")
+            start_time = time.time()
             api_response = api_instance.send_transac_email(send_smtp_email)
 
             # Get message ID if available
             message_id = getattr(api_response, "message_id", "N/A")
             logger.info(
-                f"Email sent successfully to {to_email}. Message ID: {message_id}"
+                f"Email sent successfully to {to_email}. Message ID: {message_id}",
+                extra={
+                    "fields": {
+                        "to": to_email,
+                        "subject": subject,
+                        "message_id": message_id,
+                        "duration_ms": round((time.time() - start_time) * 1000, 1),
+                        "success": True,
+                    }
+                },
             )
 
             return True
 
         except ApiException as e:
-            logger.error(f"Brevo API Exception when sending to {to_email}: {str(e)}")
+            logger.error(
+                f"Brevo API Exception when sending to {to_email}: {str(e)}",
+                extra={"fields": {"to": to_email, "subject": subject, "success": False, "status": e.status}},
+            )
             return False
         except Exception as e:
-            logger.error(f"Failed to send email to {to_email}: {str(e)}")
+            logger.error(
+                f"Failed to send email to {to_email}: {str(e)}",
+                extra={"fields": {"to": to_email, "subject": subject, "success": False}},
+            )
             import traceback
 
             logger.error(f"Full traceback: {traceback.format_exc()}")
@@ -1,16 +1,117 @@
-from typing import Optional
-import io
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, List, Optional, Tuple, Union
+import asyncio
+import copy
+from dataclasses import dataclass, field
+import hashlib
 import base64
-import PyPDF2
-from PIL import Image
+import multiprocessing
+import os
+import tempfile
 from langchain_core.messages import HumanMessage
 from app.core.config import settings
 from app.core.logging import app_logger
-from app.utils.ai_models import text_llm, vision_llm
+from app.utils.ai_helpers import estimate_tokens
+from app.utils.ai_models import get_text_llm, get_vision_llm
+from app.utils.cache import TTLCache
+from app.utils.image_preprocessing import prepare_image
+from app.utils.pdf_extraction import extract_page_range, read_pdf_metadata
+from app.utils.uploads import IngestedUpload
 
 
 import datetime
 
+# File bytes, a zero-copy view of them, or the path of a spooled upload
+FileContent = Union[bytes, memoryview, str]
+
+_PDF_ANALYSIS_PROMPT = """You are a medical assistant analyzing a health document. Please provide:
+
+📄 MEDICAL DOCUMENT ANALYSIS:
+1. **Document Type & Purpose**: (Lab report, medical study, treatment guideline, etc.)
+2. **Key Medical Findings**: Main test results, diagnoses, or medical information
+3. **Important Values & Metrics**: Extract and list specific numbers, dates, reference ranges
+4. **Medical Terminology**: Explain any technical terms or abbreviations
+5. **Clinical Significance**: Note anything marked as abnormal, urgent, or requiring attention
+6. **Summary**: Brief overview of the document's main points
+
+🎯 Focus on hepatitis C, liver health, and related medical information when present.
+
+⚠️ This is an informational analysis only. Clinical decisions require healthcare provider consultation.
+
+Provide a comprehensive medical summary:"""
+
+_PDF_CHUNK_PROMPT = """You are a medical assistant reading part {part} of a longer health document. Extract, as concise bullet points:
+- Document type and purpose, if stated
+- Every test result, value, unit, reference range and date
+- Diagnoses, medications and anything marked abnormal, urgent or critical
+
+Do not interpret or add advice; only record what this part contains:"""
+
+# Completed analyses by (content hash, content type), so re-uploading the
+# same report skips the vision/text LLM call
+analysis_cache = TTLCache(settings.file_cache_max_entries, settings.file_cache_ttl_seconds)
+
+# Decoding, extraction and hashing run here so uploads never block the
+# event loop; PIL, zlib and hashlib release the GIL for the heavy parts
+_file_workers = ThreadPoolExecutor(
+    max_workers=settings.file_worker_threads, thread_name_prefix="file-worker"
+)
+
+
+async def run_in_file_worker(func, *args):
+    """Run a blocking file operation in the file worker pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_file_workers, func, *args)
+
+
+# PyPDF2 is pure Python and holds the GIL, so page extraction uses
+# processes; created on first use, threads when pdf_worker_processes is 0
+_pdf_workers: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pdf_workers() -> Executor:
+    global _pdf_workers
+    if settings.pdf_worker_processes <= 0:
+        return _file_workers
+    if _pdf_workers is None:
+        _pdf_workers = ProcessPoolExecutor(
+            max_workers=settings.pdf_worker_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pdf_workers
+
+
+def _reset_pdf_workers() -> None:
+    """Drop a pool whose worker died so the next upload starts a new one."""
+    global _pdf_workers
+    if _pdf_workers is not None:
+        _pdf_workers.shutdown(wait=False, cancel_futures=True)
+        _pdf_workers = None
+
+
+def shutdown_file_workers() -> None:
+    """Stop the file and PDF worker pools (application shutdown)."""
+    _file_workers.shutdown(wait=False, cancel_futures=True)
+    _reset_pdf_workers()
+
+
+def _write_temp_pdf(file_content: FileContent) -> str:
+    """Write PDF bytes to a temporary file for the worker processes to read."""
+    with tempfile.NamedTemporaryFile(
+        prefix="pdf-", suffix=".pdf", dir=settings.upload_spool_dir, delete=False
+    ) as temp_file:
+        temp_file.write(file_content)
+    return temp_file.name
+
+
+@dataclass
+class _ExtractedPdf:
+    """Page text read so far, and whether page or size caps cut it short."""
+
+    pages: List[str] = field(default_factory=list)
+    truncated: bool = False
+
 
 class FileProcessor:
     """Service class for processing uploaded files."""
@@ -53,32 +154,24 @@ class FileProcessor:
             return False
 
     @staticmethod
-    def encode_image_to_base64(image_file) -> str:
-        """Convert uploaded image to base64 string"""
-        try:
-            image = Image.open(image_file)
-            # Convert to RGB if necessary
-            if image.mode != "RGB":
-                image = image.convert("RGB")
-
-            # Resize image if too large (optional)
-            max_size = (1024, 1024)
-            image.thumbnail(max_size, Image.Resampling.LANCZOS)
-
-            # Convert to base64
-            buffered = io.BytesIO()
-            image.save(buffered, format="JPEG")
-            img_base64 = base64.b64encode(buffered.getvalue()).decode()
-            return img_base64
-        except Exception as e:
-            return str(e)
+    def _prepare_image(file_content: FileContent, content_type: str) -> Tuple[str, dict]:
+        """Encode an image for the vision model and read its metadata (blocking)."""
+        prepared = prepare_image(
+            file_content,
+            content_type,
+            max_side=settings.image_max_side,
+            jpeg_quality=settings.image_jpeg_quality,
+        )
+        img_base64 = base64.b64encode(prepared.data).decode()
+        return f"data:{prepared.mime_type};base64,{img_base64}", prepared.metadata
 
     @staticmethod
-    async def process_image(file_content: bytes, content_type: str) -> dict:
+    async def process_image(file_content: FileContent, content_type: str) -> dict:
         """Process image file and extract metadata with AI vision analysis."""
         try:
-            # Encode image to base64
-            img_base64 = FileProcessor.encode_image_to_base64(io.BytesIO(file_content))
+            image_url, metadata = await run_in_file_worker(
+                FileProcessor._prepare_image, file_content, content_type
+            )
 
             # Create message with image
             message_content = [
@@ -105,37 +198,16 @@ Provide a thorough, medically-focused description:""",
                 },
                 {
                     "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{img_base64}"},
+                    "image_url": {"url": image_url},
                 },
             ]
 
             messages = [HumanMessage(content=message_content)]
-            response = vision_llm.invoke(messages)
-
-            # Open image with PIL for metadata extraction
-            image = Image.open(io.BytesIO(file_content))
-
-            # Get image metadata
-            metadata = {
-                "format": image.format,
-                "mode": image.mode,
-                "size": image.size,  # (width, height)
-                "content_type": content_type,
-                "file_size": len(file_content),
-            }
-
-            # Get additional EXIF data if available
-            if hasattr(image, "_getexif") and image._getexif():
-                exif_data = image._getexif()
-                if exif_data:
-                    metadata["has_exif"] = True
-                else:
-                    metadata["has_exif"] = False
-            else:
-                metadata["has_exif"] = False
+            response = await get_vision_llm().ainvoke(messages)
 
             app_logger.info(
-                f"Processed image: {metadata['format']} {metadata['size']} pixels"
+                f"Processed image: {metadata['format']} {metadata['size']} pixels, "
+                f"sent {metadata['sent_size']} as {metadata['sent_bytes']} bytes"
             )
 
             return {
@@ -153,97 +225,210 @@ Provide a thorough, medically-focused description:""",
             }
 
     @staticmethod
-    def process_pdf(file_content: bytes) -> dict:
-        """Process PDF file and extract text content."""
+    async def _iter_pdf_pages(
+        file_content: FileContent, num_pages: int
+    ) -> AsyncIterator[Tuple[int, str]]:
+        """
+        Yield (page number, text) in page order as page ranges finish.
+
+        Ranges are extracted in parallel in the PDF worker pool; earlier
+        pages are yielded while later ranges are still being extracted.
+        """
+        loop = asyncio.get_running_loop()
+        workers = _get_pdf_workers()
+        per_task = max(1, settings.pdf_pages_per_task)
+        starts = range(0, num_pages, per_task)
+
+        # Every process task gets its own pickled copy of in-memory bytes, so
+        # a PDF split into several ranges is written to disk once instead
+        temp_path = None
+        if isinstance(workers, ProcessPoolExecutor) and not isinstance(file_content, str):
+            if len(starts) > 1:
+                temp_path = await run_in_file_worker(_write_temp_pdf, file_content)
+                file_content = temp_path
+            else:
+                file_content = bytes(file_content)  # views cannot be pickled
+
+        futures = [
+            loop.run_in_executor(
+                workers,
+                extract_page_range,
+                file_content,
+                start,
+                min(start + per_task, num_pages),
+            )
+            for start in starts
+        ]
         try:
-            # Create BytesIO object from file content
-            pdf_file = io.BytesIO(file_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-
-            # Extract metadata
-            metadata = {
-                "num_pages": len(pdf_reader.pages),
-                "content_type": "application/pdf",
-                "file_size": len(file_content),
-            }
+            for future in futures:
+                for page in await future:
+                    yield page
+        except BrokenProcessPool:
+            _reset_pdf_workers()
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+            if temp_path:
+                os.unlink(temp_path)
 
-            # Try to get PDF metadata
-            try:
-                pdf_info = pdf_reader.metadata
-                if pdf_info:
-                    # Convert datetime objects to strings for JSON serialization
-                    creation_date = getattr(pdf_info, "creation_date", None)
-                    if creation_date:
-                        creation_date = (
-                            creation_date.isoformat()
-                            if hasattr(creation_date, "isoformat")
-                            else str(creation_date)
-                        )
-
-                    metadata.update(
-                        {
-                            "title": getattr(pdf_info, "title", None),
-                            "author": getattr(pdf_info, "author", None),
-                            "creator": getattr(pdf_info, "creator", None),
-                            "producer": getattr(pdf_info, "producer", None),
-                            "creation_date": creation_date,
-                        }
+    @staticmethod
+    def _split_text(text: str, max_tokens: int) -> List[str]:
+        """Split text at line boundaries into pieces of at most max_tokens."""
+        pieces, current, current_tokens = [], [], 0
+        for line in text.splitlines(keepends=True):
+            line_tokens = estimate_tokens(line)
+            if current and current_tokens + line_tokens > max_tokens:
+                pieces.append("".join(current))
+                current, current_tokens = [], 0
+            current.append(line)
+            current_tokens += line_tokens
+        if current:
+            pieces.append("".join(current))
+        return pieces
+
+    @staticmethod
+    async def _summarize_chunk(
+        chunk: str, part: int, semaphore: asyncio.Semaphore
+    ) -> str:
+        """Summarize one part of a long document (the map step)."""
+        async with semaphore:
+            response = await get_text_llm().ainvoke(
+                [
+                    HumanMessage(
+                        content=[
+                            {"type": "text", "text": _PDF_CHUNK_PROMPT.format(part=part)},
+                            {"type": "text", "text": chunk},
+                        ]
                     )
-            except Exception:
-                # Ignore metadata extraction errors
-                pass
-
-            # Extract text from all pages
-            extracted_text = ""
-            for page_num, page in enumerate(pdf_reader.pages):
-                try:
-                    page_text = page.extract_text()
-                    if page_text.strip():
-                        extracted_text += (
-                            f"\n--- Page {page_num + 1} ---\n{page_text}\n"
-                        )
-                except Exception as e:
-                    extracted_text += f"\n--- Page {page_num + 1} (Error) ---\nError extracting text: {str(e)}\n"
+                ]
+            )
+        return f"--- Part {part} ---\n{response.content}"
 
-            # Clean up the extracted text
-            extracted_text = extracted_text.strip()
+    @staticmethod
+    async def _analyze_pdf_text(text: str) -> str:
+        """Run the medical document analysis over text that fits one prompt."""
+        message_content = [
+            {"type": "text", "text": _PDF_ANALYSIS_PROMPT},
+            {"type": "text", "text": text},
+        ]
+        return (await get_text_llm().ainvoke([HumanMessage(content=message_content)])).content
 
-            if not extracted_text:
-                extracted_text = "No text content could be extracted from this PDF."
+    @staticmethod
+    async def _chunk_pdf_pages(
+        pages: AsyncIterator[Tuple[int, str]], extracted: "_ExtractedPdf"
+    ) -> AsyncIterator[str]:
+        """
+        Group page text into chunks of at most pdf_chunk_tokens.
+
+        Each page's formatted text is recorded in extracted as it arrives.
+        Stops once pdf_max_text_tokens of text has been read.
+        """
+        current: List[str] = []
+        current_tokens = total_tokens = 0
+        async for page_num, page_text in pages:
+            text = f"\n--- Page {page_num} ---\n{page_text}\n"
+            page_tokens = estimate_tokens(text)
+            if total_tokens + page_tokens > settings.pdf_max_text_tokens:
+                extracted.truncated = True
+                break
+            total_tokens += page_tokens
+            extracted.pages.append(text)
+
+            for piece in FileProcessor._split_text(text, settings.pdf_chunk_tokens):
+                piece_tokens = estimate_tokens(piece)
+                if current and current_tokens + piece_tokens > settings.pdf_chunk_tokens:
+                    yield "".join(current)
+                    current, current_tokens = [], 0
+                current.append(piece)
+                current_tokens += piece_tokens
+        if current:
+            yield "".join(current)
 
-            app_logger.info(
-                f"Processed PDF: {metadata['num_pages']} pages, {len(extracted_text)} characters extracted"
+    @staticmethod
+    async def _reduce_summaries(parts: List[str], semaphore: asyncio.Semaphore) -> str:
+        """Merge chunk summaries, re-summarizing while they exceed one chunk."""
+        merged = "\n\n".join(parts)
+        while len(parts) > 1 and estimate_tokens(merged) > settings.pdf_chunk_tokens:
+            groups = FileProcessor._split_text(merged, settings.pdf_chunk_tokens)
+            if len(groups) >= len(parts):
+                break  # summaries no longer shrink; send them as they are
+            parts = await asyncio.gather(
+                *[
+                    FileProcessor._summarize_chunk(group, part, semaphore)
+                    for part, group in enumerate(groups, 1)
+                ]
             )
+            merged = "\n\n".join(parts)
+        return merged
 
-            message_content = [
-                {
-                    "type": "text",
-                    "text": """You are a medical assistant analyzing a health document. Please provide:
+    @staticmethod
+    async def process_pdf(file_content: FileContent) -> dict:
+        """
+        Process PDF file and extract text content.
+
+        Pages are extracted in parallel and grouped into chunks of at most
+        pdf_chunk_tokens. A document that fits one chunk is analyzed
+        directly; a longer one is summarized chunk by chunk (at most
+        pdf_summary_concurrency at a time, starting while later pages are
+        still being extracted) and the summaries merged into one analysis.
+        Pages past pdf_max_pages and text past pdf_max_text_tokens are
+        skipped, bounding the worst-case latency.
+        """
+        summaries: List[asyncio.Task] = []
+        try:
+            metadata = await run_in_file_worker(read_pdf_metadata, file_content)
+            pages_to_read = min(metadata["num_pages"], settings.pdf_max_pages)
 
-📄 MEDICAL DOCUMENT ANALYSIS:
-1. **Document Type & Purpose**: (Lab report, medical study, treatment guideline, etc.)
-2. **Key Medical Findings**: Main test results, diagnoses, or medical information
-3. **Important Values & Metrics**: Extract and list specific numbers, dates, reference ranges
-4. **Medical Terminology**: Explain any technical terms or abbreviations
-5. **Clinical Significance**: Note anything marked as abnormal, urgent, or requiring attention
-6. **Summary**: Brief overview of the document's main points
+            semaphore = asyncio.Semaphore(settings.pdf_summary_concurrency)
+            extracted = _ExtractedPdf(truncated=pages_to_read < metadata["num_pages"])
+            chunks: List[str] = []
 
-🎯 Focus on hepatitis C, liver health, and related medical information when present.
+            def summarize(part: int) -> None:
+                summaries.append(
+                    asyncio.create_task(
+                        FileProcessor._summarize_chunk(chunks[part - 1], part, semaphore)
+                    )
+                )
 
-⚠️ This is an informational analysis only. Clinical decisions require healthcare provider consultation.
+            pages = FileProcessor._iter_pdf_pages(file_content, pages_to_read)
+            try:
+                async for chunk in FileProcessor._chunk_pdf_pages(pages, extracted):
+                    chunks.append(chunk)
+                    # Map as soon as the document needs more than one chunk
+                    if len(chunks) == 2:
+                        summarize(1)
+                    if len(chunks) >= 2:
+                        summarize(len(chunks))
+            finally:
+                # Stop extraction and remove its temporary file now, also on errors
+                await pages.aclose()
 
-Provide a comprehensive medical summary:""",
-                },
-                {"type": "text", "text": extracted_text},
-            ]
+            # Clean up the extracted text
+            extracted_text = "".join(extracted.pages).strip()
+
+            if not extracted_text:
+                extracted_text = "No text content could be extracted from this PDF."
+
+            metadata["pages_analyzed"] = len(extracted.pages)
+            metadata["chunks"] = len(chunks)
+            metadata["truncated"] = extracted.truncated
+
+            app_logger.info(
+                f"Processed PDF: {metadata['num_pages']} pages, {len(extracted_text)} characters extracted in {len(chunks)} chunk(s)"
+            )
 
-            processed_text = text_llm.invoke(
-                [HumanMessage(content=message_content)]
-            ).content
+            if len(chunks) <= 1:
+                processed_text = await FileProcessor._analyze_pdf_text(extracted_text)
+            else:
+                parts = await asyncio.gather(*summaries)
+                merged = await FileProcessor._reduce_summaries(parts, semaphore)
+                processed_text = await FileProcessor._analyze_pdf_text(merged)
 
             return {
                 "content": processed_text,
                 "metadata": metadata,
+                "extracted_text": extracted_text,
                 "processing_status": "completed",
             }
 
@@ -254,26 +439,52 @@ Provide a comprehensive medical summary:""",
                 "metadata": {"error": str(e)},
                 "processing_status": "error",
             }
+        finally:
+            for task in summaries:
+                task.cancel()
 
     @staticmethod
     async def process_file(
-        file_content: bytes, content_type: str, filename: str
+        file_content: FileContent,
+        content_type: str,
+        filename: str,
+        content_hash: Optional[str] = None,
     ) -> dict:
-        """Process any supported file type."""
+        """
+        Process any supported file type.
+
+        Args:
+            file_content: The file's bytes, a view of them, or the path of an
+                upload spooled to disk (see app.utils.uploads)
+            content_type: The file's content type
+            filename: The uploaded file name
+            content_hash: SHA-256 of the file if already computed
+        """
         try:
             # Validate file first
-            if not FileProcessor.validate_file(content_type, len(file_content)):
+            if not FileProcessor.validate_file(content_type, FileProcessor._size(file_content)):
                 return {
                     "content": "Invalid file type or size",
                     "metadata": {"error": "Validation failed"},
                     "processing_status": "error",
                 }
 
+            if content_hash is None:
+                content_hash = await run_in_file_worker(
+                    FileProcessor.hash_content, file_content
+                )
+            cache_key = (content_hash, content_type)
+            cached = analysis_cache.get(cache_key) if settings.file_cache_enabled else None
+
             # Process based on content type
-            if content_type.startswith("image/"):
+            if cached is not None:
+                app_logger.info(f"Reused cached analysis for {filename} ({content_hash[:12]})")
+                result = copy.deepcopy(cached)
+                result["metadata"]["cache_hit"] = True
+            elif content_type.startswith("image/"):
                 result = await FileProcessor.process_image(file_content, content_type)
             elif content_type == "application/pdf":
-                result = FileProcessor.process_pdf(file_content)
+                result = await FileProcessor.process_pdf(file_content)
             else:
                 return {
                     "content": f"Unsupported file type: {content_type}",
@@ -281,6 +492,11 @@ Provide a comprehensive medical summary:""",
                     "processing_status": "error",
                 }
 
+            if cached is None and result["processing_status"] == "completed":
+                result["metadata"]["content_hash"] = content_hash
+                if settings.file_cache_enabled:
+                    analysis_cache.set(cache_key, copy.deepcopy(result))
+
             # Add common metadata
             result["metadata"]["filename"] = filename
             result["metadata"][
@@ -302,6 +518,35 @@ Provide a comprehensive medical summary:""",
                 "processing_status": "error",
             }
 
+    @staticmethod
+    async def process_upload(upload: IngestedUpload) -> dict:
+        """Process an upload read by app.utils.uploads, reusing its hash."""
+        return await FileProcessor.process_file(
+            upload.content, upload.content_type, upload.filename, upload.sha256
+        )
+
+    @staticmethod
+    def hash_content(file_content: FileContent) -> str:
+        """SHA-256 hex digest identifying an upload by its bytes."""
+        if isinstance(file_content, str):
+            digest = hashlib.sha256()
+            with open(file_content, "rb") as f:
+                for chunk in iter(lambda: f.read(settings.upload_chunk_bytes), b""):
+                    digest.update(chunk)
+            return digest.hexdigest()
+        return hashlib.sha256(file_content).hexdigest()
+
+    @staticmethod
+    def _size(file_content: FileContent) -> int:
+        if isinstance(file_content, str):
+            return os.path.getsize(file_content)
+        return len(file_content)
+
+    @staticmethod
+    def get_cache_stats() -> dict:
+        """Hit rate and size of the file analysis cache."""
+        return analysis_cache.stats()
+
     @staticmethod
     def get_file_type_description(content_type: str) -> str:
         """Get user-friendly description of file type."""
@@ -0,0 +1,227 @@
+"""
+Model Router - Send each assistant task to the model that fits it
+
+Cheap tasks (chat titles, and short conversational follow-ups such as
+"thanks" or "what do you mean?") go to a small, fast model; substantive
+medical answers and conversation summaries stay on the large model.
+
+Each model has a latency SLO. A model counts as degraded while its
+gateway's circuit breaker is not closed, or while the p95 of its recent
+latencies (time to first token for streams, total time otherwise) is over
+its SLO. A task whose preferred model is degraded goes to the other model
+if that one is healthy. Latency samples expire after a window, so a model
+that was routed around is tried again once its slow samples age out.
+
+Latency, errors and fallbacks are recorded per route (task and model).
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import re
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from app.core.logging import app_logger
+from app.utils.ai_helpers import estimate_tokens
+
+LARGE = "large"
+FAST = "fast"
+
+# Tasks the router knows; anything else is treated as "chat"
+TASKS = ("chat", "title", "summary")
+
+
+@dataclass
+class ModelTier:
+    """One routable model and its latency objective."""
+
+    name: str  # model id, stored as Message.model_used
+    llm: BaseChatModel
+    latency_slo_ms: float
+
+
+@dataclass
+class Route:
+    """Where one assistant call was sent, and why."""
+
+    task: str
+    intent: str  # "medical" or "clarification"
+    tier: str  # LARGE or FAST
+    model_name: str
+    llm: BaseChatModel
+    fallback: bool = False  # the preferred model was degraded
+
+    @property
+    def key(self) -> str:
+        return f"{self.task}:{self.tier}"
+
+
+class _Latencies:
+    """Timestamped latency samples within a sliding window."""
+
+    def __init__(self, window_seconds: float, clock: Callable[[], float]):
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=1000)
+
+    def add(self, ms: float) -> None:
+        self._samples.append((self._clock(), ms))
+
+    def recent(self) -> List[float]:
+        cutoff = self._clock() - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        return [ms for _, ms in self._samples]
+
+
+def _p(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))], 1)
+
+
+class ModelRouter:
+    """Rule-based routing between a large and a fast chat model."""
+
+    def __init__(
+        self,
+        large: ModelTier,
+        fast: Optional[ModelTier],
+        fast_tasks: List[str],
+        fast_message_max_tokens: int,
+        fast_message_pattern: str,
+        window_seconds: float = 300.0,
+        min_samples: int = 5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.tiers = {LARGE: large}
+        if fast is not None:
+            self.tiers[FAST] = fast
+        self.fast_tasks = set(fast_tasks)
+        self.fast_message_max_tokens = fast_message_max_tokens
+        self.fast_message_pattern = re.compile(fast_message_pattern, re.IGNORECASE)
+        self.min_samples = min_samples
+        self._latencies = {tier: _Latencies(window_seconds, clock) for tier in self.tiers}
+        self._routes: Dict[str, Dict[str, Any]] = {}
+        self._lock = Lock()
+
+    def classify(self, message: str) -> str:
+        """
+        Classify a chat message's intent without calling a model.
+
+        Returns "clarification" for short conversational follow-ups with
+        no numbers (which would be lab values or doses), else "medical".
+        """
+        text = message.strip()
+        if (
+            estimate_tokens(text) <= self.fast_message_max_tokens
+            and not any(char.isdigit() for char in text)
+            and self.fast_message_pattern.search(text)
+        ):
+            return "clarification"
+        return "medical"
+
+    def is_degraded(self, tier: str) -> bool:
+        """
+        Whether a model's circuit rejects calls or its recent p95 is over SLO.
+
+        A half-open circuit is not degraded until its trial call is under
+        way, so the trial is routed to the model and can close the circuit.
+        """
+        gateway = getattr(self.tiers[tier].llm, "gateway", None)
+        if gateway is not None and not gateway.breaker.allows_call():
+            return True
+        recent = self._latencies[tier].recent()
+        if len(recent) < self.min_samples:
+            return False
+        return _p(recent, 95) > self.tiers[tier].latency_slo_ms
+
+    def route(self, task: str, message: str = "") -> Route:
+        """
+        Choose the model for an assistant task.
+
+        Args:
+            task: "chat", "title" or "summary"
+            message: The user's message, for chat intent
+
+        Returns:
+            Route: The chosen model, with the task, intent and tier
+        """
+        task = task if task in TASKS else "chat"
+        intent = self.classify(message) if task == "chat" else "medical"
+        preferred = (
+            FAST
+            if FAST in self.tiers and (task in self.fast_tasks or intent == "clarification")
+            else LARGE
+        )
+
+        tier, fallback = preferred, False
+        other = FAST if preferred == LARGE else LARGE
+        if other in self.tiers and self.is_degraded(preferred) and not self.is_degraded(other):
+            tier, fallback = other, True
+            app_logger.warning(
+                f"⚠️ {self.tiers[preferred].name} is degraded; routing {task} to {self.tiers[other].name}"
+            )
+
+        model = self.tiers[tier]
+        return Route(task, intent, tier, model.name, model.llm, fallback)
+
+    def record(self, route: Route, seconds: float, ok: bool = True) -> None:
+        """
+        Record the outcome of a routed call.
+
+        Args:
+            route: The route the call took
+            seconds: Time to first token for streams, total time otherwise
+            ok: Whether the call succeeded
+        """
+        ms = seconds * 1000
+        with self._lock:
+            if ok:
+                self._latencies[route.tier].add(ms)
+            stats = self._routes.setdefault(
+                route.key,
+                {
+                    "model": route.model_name,
+                    "calls": 0,
+                    "errors": 0,
+                    "fallbacks": 0,
+                    "latencies": deque(maxlen=500),
+                },
+            )
+            stats["calls"] += 1
+            stats["errors"] += 0 if ok else 1
+            stats["fallbacks"] += 1 if route.fallback else 0
+            if ok:
+                stats["latencies"].append(ms)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-route latency and per-model health."""
+        with self._lock:
+            routes = {
+                key: {
+                    "model": stats["model"],
+                    "calls": stats["calls"],
+                    "errors": stats["errors"],
+                    "fallbacks": stats["fallbacks"],
+                    "latency_ms": {
+                        "p50": _p(list(stats["latencies"]), 50),
+                        "p95": _p(list(stats["latencies"]), 95),
+                    },
+                }
+                for key, stats in self._routes.items()
+            }
+        models = {
+            tier: {
+                "model": model.name,
+                "latency_slo_ms": model.latency_slo_ms,
+                "recent_p95_ms": _p(self._latencies[tier].recent(), 95),
+                "degraded": self.is_degraded(tier),
+            }
+            for tier, model in self.tiers.items()
+        }
+        return {"models": models, "routes": routes}
@@ -2,12 +2,17 @@
 Notification Service - Business logic for user notifications
 """
 
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Optional
 from datetime import datetime
 import logging
 
+from app.models.counter import CounterName
 from app.models.notification import Notification, NotificationType
+from app.services.counter_service import CounterService
+from app.utils.pagination import Page, paginate, paginate_async
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +20,9 @@ logger = logging.getLogger(__name__)
 class NotificationService:
     """Service for managing user notifications."""
 
+    # Keyset for list pagination: newest first, id breaks created_at ties
+    LIST_KEYS = [(Notification.created_at, True), (Notification.id, True)]
+
     @staticmethod
     def create_notification(
         db: Session,
@@ -54,7 +62,17 @@ class NotificationService:
             db.commit()
             db.refresh(notification)
 
-            logger.info(f"✅ Created notification for user {user_id}: {title}")
+            logger.info(
+                f"✅ Created notification for user {user_id}: {title}",
+                extra={
+                    "fields": {
+                        "notification_id": notification.id,
+                        "user_id": user_id,
+                        "type": notification_type,
+                        "diagnosis_id": diagnosis_id,
+                    }
+                },
+            )
             return notification
 
         except Exception as e:
@@ -69,7 +87,8 @@ class NotificationService:
         is_read: Optional[bool] = None,
         skip: int = 0,
         limit: int = 50,
-    ) -> List[Notification]:
+        cursor: Optional[str] = None,
+    ) -> Page:
         """
         Get notifications for a user.
 
@@ -77,19 +96,21 @@ class NotificationService:
             db: Database session
             user_id: User ID
             is_read: Optional filter by read status
-            skip: Number of records to skip
+            skip: Number of records to skip (ignored when cursor is given)
             limit: Maximum number of records
+            cursor: Cursor from a previous page's next_cursor
 
         Returns:
-            List[Notification]: List of notifications
+            Page: Notifications, with next_cursor set if more exist
         """
         query = db.query(Notification).filter(Notification.user_id == user_id)
 
         if is_read is not None:
             query = query.filter(Notification.is_read == is_read)
 
-        query = query.order_by(Notification.created_at.desc())
-        return query.offset(skip).limit(limit).all()
+        return paginate(
+            query, NotificationService.LIST_KEYS, limit, cursor=cursor, skip=skip
+        )
 
     @staticmethod
     def get_unread_count(db: Session, user_id: int) -> int:
@@ -103,11 +124,10 @@ class NotificationService:
         Returns:
             int: Count of unread notifications
         """
-        return (
-            db.query(Notification)
-            .filter(Notification.user_id == user_id, Notification.is_read == False)
-            .count()
+        counts = CounterService.get_counts(
+            db, user_id, [CounterName.NOTIFICATIONS_UNREAD]
         )
+        return counts[CounterName.NOTIFICATIONS_UNREAD]
 
     @staticmethod
     def mark_as_read(db: Session, notification_id: int, user_id: int) -> Notification:
@@ -165,6 +185,8 @@ class NotificationService:
             )
         )
 
+        # Bulk UPDATE skips the flush listener that maintains counters
+        CounterService.adjust(db, user_id, CounterName.NOTIFICATIONS_UNREAD, -count)
         db.commit()
         logger.info(f"✅ Marked {count} notifications as read for user {user_id}")
         return count
@@ -199,3 +221,224 @@ class NotificationService:
 
         logger.info(f"✅ Deleted notification {notification_id}")
         return True
+
+
+class AsyncNotificationService:
+    """
+    Async variant of NotificationService for async routes.
+
+    Uses an AsyncSession so listing and updating notifications never blocks
+    the event loop. NotificationService stays for sync callers such as
+    DiagnosisService.
+    """
+
+    @staticmethod
+    async def create_notification(
+        db: AsyncSession,
+        user_id: int,
+        notification_type: NotificationType,
+        title: str,
+        message: str,
+        link: Optional[str] = None,
+        diagnosis_id: Optional[int] = None,
+    ) -> Notification:
+        """
+        Create a new notification for a user.
+
+        Args:
+            db: Async database session
+            user_id: User ID
+            notification_type: Type of notification
+            title: Notification title
+            message: Notification message
+            link: Optional link to related resource
+            diagnosis_id: Optional diagnosis ID
+
+        Returns:
+            Notification: Created notification
+        """
+        notification = Notification(
+            user_id=user_id,
+            type=notification_type,
+            title=title,
+            message=message,
+            link=link,
+            diagnosis_id=diagnosis_id,
+        )
+
+        try:
+            db.add(notification)
+            await db.commit()
+            await db.refresh(notification)
+
+            logger.info(
+                f"✅ Created notification for user {user_id}: {title}",
+                extra={
+                    "fields": {
+                        "notification_id": notification.id,
+                        "user_id": user_id,
+                        "type": notification_type,
+                        "diagnosis_id": diagnosis_id,
+                    }
+                },
+            )
+            return notification
+
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"❌ Failed to create notification: {str(e)}")
+            raise
+
+    @staticmethod
+    async def get_user_notifications(
+        db: AsyncSession,
+        user_id: int,
+        is_read: Optional[bool] = None,
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Page:
+        """
+        Get notifications for a user.
+
+        Args:
+            db: Async database session
+            user_id: User ID
+            is_read: Optional filter by read status
+            skip: Number of records to skip (ignored when cursor is given)
+            limit: Maximum number of records
+            cursor: Cursor from a previous page's next_cursor
+
+        Returns:
+            Page: Notifications, with next_cursor set if more exist
+        """
+        stmt = select(Notification).filter(Notification.user_id == user_id)
+
+        if is_read is not None:
+            stmt = stmt.filter(Notification.is_read == is_read)
+
+        return await paginate_async(
+            db, stmt, NotificationService.LIST_KEYS, limit, cursor=cursor, skip=skip
+        )
+
+    @staticmethod
+    async def get_unread_count(db: AsyncSession, user_id: int) -> int:
+        """
+        Get count of unread notifications for a user.
+
+        Args:
+            db: Async database session
+            user_id: User ID
+
+        Returns:
+            int: Count of unread notifications
+        """
+        counts = await CounterService.get_counts_async(
+            db, user_id, [CounterName.NOTIFICATIONS_UNREAD]
+        )
+        return counts[CounterName.NOTIFICATIONS_UNREAD]
+
+    @staticmethod
+    async def mark_as_read(
+        db: AsyncSession, notification_id: int, user_id: int
+    ) -> Notification:
+        """
+        Mark a notification as read.
+
+        Args:
+            db: Async database session
+            notification_id: Notification ID
+            user_id: User ID (for authorization)
+
+        Returns:
+            Notification: Updated notification
+
+        Raises:
+            ValueError: If notification not found or unauthorized
+        """
+        notification = await AsyncNotificationService._get_owned(
+            db, notification_id, user_id
+        )
+
+        if not notification.is_read:
+            notification.is_read = True
+            notification.read_at = datetime.utcnow()
+            await db.commit()
+            await db.refresh(notification)
+
+            logger.info(f"✅ Marked notification {notification_id} as read")
+
+        return notification
+
+    @staticmethod
+    async def mark_all_as_read(db: AsyncSession, user_id: int) -> int:
+        """
+        Mark all notifications as read for a user.
+
+        Args:
+            db: Async database session
+            user_id: User ID
+
+        Returns:
+            int: Number of notifications marked as read
+        """
+        result = await db.execute(
+            update(Notification)
+            .filter(Notification.user_id == user_id, Notification.is_read == False)
+            .values(is_read=True, read_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        count = result.rowcount
+
+        # Bulk UPDATE skips the flush listener that maintains counters
+        await db.run_sync(
+            CounterService.adjust, user_id, CounterName.NOTIFICATIONS_UNREAD, -count
+        )
+        await db.commit()
+        logger.info(f"✅ Marked {count} notifications as read for user {user_id}")
+        return count
+
+    @staticmethod
+    async def delete_notification(
+        db: AsyncSession, notification_id: int, user_id: int
+    ) -> bool:
+        """
+        Delete a notification.
+
+        Args:
+            db: Async database session
+            notification_id: Notification ID
+            user_id: User ID (for authorization)
+
+        Returns:
+            bool: True if deleted
+
+        Raises:
+            ValueError: If notification not found or unauthorized
+        """
+        notification = await AsyncNotificationService._get_owned(
+            db, notification_id, user_id
+        )
+
+        await db.delete(notification)
+        await db.commit()
+
+        logger.info(f"✅ Deleted notification {notification_id}")
+        return True
+
+    @staticmethod
+    async def _get_owned(
+        db: AsyncSession, notification_id: int, user_id: int
+    ) -> Notification:
+        """Load a notification owned by the user or raise ValueError."""
+        result = await db.execute(
+            select(Notification).filter(
+                Notification.id == notification_id, Notification.user_id == user_id
+            )
+        )
+        notification = result.scalars().first()
+
+        if not notification:
+            raise ValueError("Notification not found or unauthorized")
+
+        return notification
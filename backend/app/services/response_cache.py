@@ -0,0 +1,168 @@
+"""
+Response Cache - Reuse assistant replies to repeated questions
+
+Replies are cached per scope: a hash of the system prompt version, model,
+temperature and conversation context, so a reply is only reused where the
+LLM would have seen the same prompt. Messages are normalized (case,
+whitespace, trailing punctuation) before lookup.
+
+Near-duplicate mode additionally matches differently worded questions in
+the same scope by cosine similarity of their word unigrams and bigrams,
+computed locally. A match also requires the same numbers, so "ALT of 120"
+never reuses the reply for "ALT of 20".
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, FrozenSet, Optional, Tuple
+import math
+import re
+
+from app.utils.cache import TTLCache
+
+_WORDS = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_NUMBERS = re.compile(r"\d+(?:\.\d+)?")
+
+
+def normalize_message(message: str) -> str:
+    """Lower-case, collapse whitespace and drop trailing punctuation."""
+    return " ".join(message.lower().split()).rstrip("?!.")
+
+
+def _terms(normalized: str) -> Counter:
+    words = _WORDS.findall(normalized)
+    return Counter(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    dot = sum(count * b[term] for term, count in a.items() if term in b)
+    if not dot:
+        return 0.0
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(
+        sum(v * v for v in b.values())
+    )
+    return dot / norm
+
+
+@dataclass
+class CachedResponse:
+    """A cached reply and what reusing it saves."""
+
+    content: str
+    tokens: int  # prompt + reply tokens a hit avoids
+    terms: Counter
+    numbers: FrozenSet[str]
+
+
+class ResponseCache:
+    """TTL/LRU cache of assistant replies with optional near-duplicate hits."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        near_duplicates: bool = False,
+        similarity_threshold: float = 0.9,
+    ):
+        self._cache = TTLCache(max_entries, ttl_seconds)
+        self.near_duplicates = near_duplicates
+        self.similarity_threshold = similarity_threshold
+        self._lock = Lock()
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.tokens_saved = 0
+
+    def lookup(self, message: str, scope: str) -> Optional[str]:
+        """
+        Find a cached reply for a message.
+
+        Args:
+            message: The user's message
+            scope: Hash of everything else in the prompt (see AIService)
+
+        Returns:
+            Optional[str]: The cached reply, or None on a miss
+        """
+        normalized = normalize_message(message)
+        entry = self._cache.get((scope, normalized))
+        if entry is not None:
+            self._record_hit(entry, near=False)
+            return entry.content
+
+        if self.near_duplicates:
+            match = self._find_near_duplicate(normalized, scope)
+            if match is not None:
+                key, entry = match
+                self._cache.touch(key)
+                self._record_hit(entry, near=True)
+                return entry.content
+
+        return None
+
+    def store(self, message: str, scope: str, content: str, tokens: int) -> None:
+        """
+        Cache a reply.
+
+        Args:
+            message: The user's message
+            scope: Hash of everything else in the prompt
+            content: The assistant's reply
+            tokens: Prompt plus reply tokens, counted as saved on each hit
+        """
+        normalized = normalize_message(message)
+        self._cache.set(
+            (scope, normalized),
+            CachedResponse(
+                content=content,
+                tokens=tokens,
+                terms=_terms(normalized),
+                numbers=frozenset(_NUMBERS.findall(normalized)),
+            ),
+        )
+
+    def stats(self) -> Dict[str, object]:
+        """Hit rates and tokens saved since startup."""
+        stats = self._cache.stats()
+        # Near-duplicate hits follow an exact-key miss, so count lookups once
+        lookups = stats["hits"] + stats["misses"]
+        with self._lock:
+            hits = self.exact_hits + self.near_hits
+            stats.update(
+                {
+                    "hits": hits,
+                    "exact_hits": self.exact_hits,
+                    "near_duplicate_hits": self.near_hits,
+                    "misses": lookups - hits,
+                    "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                    "tokens_saved": self.tokens_saved,
+                    "near_duplicates": self.near_duplicates,
+                }
+            )
+        return stats
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def _find_near_duplicate(
+        self, normalized: str, scope: str
+    ) -> Optional[Tuple[tuple, CachedResponse]]:
+        terms = _terms(normalized)
+        numbers = frozenset(_NUMBERS.findall(normalized))
+
+        best, best_score = None, self.similarity_threshold
+        for key, entry in self._cache.items():
+            if key[0] != scope or entry.numbers != numbers:
+                continue
+            score = _cosine(terms, entry.terms)
+            if score >= best_score:
+                best, best_score = (key, entry), score
+        return best
+
+    def _record_hit(self, entry: CachedResponse, near: bool) -> None:
+        with self._lock:
+            if near:
+                self.near_hits += 1
+            else:
+                self.exact_hits += 1
+            self.tokens_saved += entry.tokens
@@ -160,9 +160,9 @@ class StorageService:
             file_path = classifier_dir / filename
 
             # Write the file
-            if hasattr(content, "read"):  # File-like object
+            if hasattr(content, "read"):  # File-like object, copied in chunks
                 with open(file_path, "wb") as f:
-                    f.write(content.read())
+                    shutil.copyfileobj(content, f, settings.upload_chunk_bytes)
             else:  # Bytes content
                 with open(file_path, "wb") as f:
                     f.write(content)
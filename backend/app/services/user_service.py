@@ -5,9 +5,13 @@ from typing import Optional
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, GoogleUser
 from app.utils.security import get_password_hash, verify_password, is_super_user
+from app.utils.pagination import Page, paginate
 
 
 class UserService:
+
+    # Keyset for admin user list pagination: oldest first, id breaks ties
+    LIST_KEYS = [(User.created_at, False), (User.id, False)]
     
     @staticmethod
     def get_user_by_email(db: Session, email: str) -> Optional[User]:
@@ -260,6 +264,10 @@ class UserService:
         return user
     
     @staticmethod
-    def get_all_users(db: Session, skip: int = 0, limit: int = 100) -> list[User]:
-        """Get all users (admin only operation)."""
-        return db.query(User).offset(skip).limit(limit).all()
\ No newline at end of file
+    def get_all_users(
+        db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> Page:
+        """Get all users (admin only operation), by cursor when given or by offset."""
+        return paginate(
+            db.query(User), UserService.LIST_KEYS, limit, cursor=cursor, skip=skip
+        )
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""
+Shared test fixtures
+"""
+
+from app.core.config import settings
+import pytest
+
+
+@pytest.fixture
+def make_ai_service(monkeypatch):
+    """
+    Build AIService instances without a Groq key or client.
+
+    The service runs on the fake LLM backend with models of its own rather
+    than the shared (cached) ones of app.utils.ai_models, and the settings
+    are restored after the test.
+
+    Returns:
+        Callable: make(llm=None) -> AIService; every model tier answers
+        with `llm` when given
+    """
+    from app.services import ai_service
+    from app.utils.llm_backends import FakeChatModel
+
+    def fake_model():
+        return FakeChatModel(
+            latency_ms=1, latency_sigma=0, tokens_per_second=10_000, reply_tokens=20
+        )
+
+    monkeypatch.setattr(settings, "llm_backend", "fake")
+    monkeypatch.setattr(ai_service, "get_text_llm", fake_model)
+    monkeypatch.setattr(ai_service, "get_fast_text_llm", fake_model)
+
+    def make(llm=None):
+        service = ai_service.AIService()
+        if llm is not None:
+            for tier in service.router.tiers.values():
+                tier.llm = llm
+        return service
+
+    return make
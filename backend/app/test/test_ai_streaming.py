@@ -0,0 +1,51 @@
+"""
+Tests for streamed assistant replies
+
+Feature: streaming-responses
+Validates: replies stream chunk by chunk through the same prompt chain as
+process_text_message, and errors part-way through reach the caller after
+the chunks already produced
+"""
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+import asyncio
+import pytest
+
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+
+def test_stream_yields_reply_in_chunks(make_ai_service):
+    """The streamed chunks join up to the full reply"""
+    reply = "Elevated ALT can indicate liver inflammation."
+    service = make_ai_service(FakeListChatModel(responses=[reply]))
+
+    chunks = asyncio.run(
+        collect(
+            service.stream_text_message(
+                "What does high ALT mean?",
+                [{"role": "system", "content": "Summary of the earlier conversation"}],
+            )
+        )
+    )
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == reply
+
+
+def test_stream_error_after_partial_reply(make_ai_service):
+    """A failure mid-stream is raised after the chunks already yielded"""
+    service = make_ai_service(
+        FakeListChatModel(responses=["Partial answer"], error_on_chunk_number=5)
+    )
+    received = []
+
+    async def consume():
+        async for chunk in service.stream_text_message("Hello"):
+            received.append(chunk)
+
+    with pytest.raises(Exception):
+        asyncio.run(consume())
+
+    assert "".join(received) == "Parti"
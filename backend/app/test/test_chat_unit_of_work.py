@@ -0,0 +1,211 @@
+"""
+Tests for the chat send-message unit of work
+
+Feature: chat-unit-of-work
+Validates: a message exchange loads the chat once, saves each phase in a
+single commit, and issues a fixed number of statements; a new chat's
+generated title never delays the reply; a rolling summary saved after the
+reply never overwrites a newer one
+"""
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.requests import Request
+from types import SimpleNamespace
+from app.db.connection import Base, get_async_database_url
+from app.models import User, Chat, Message
+from app.models import disease, classifier, diagnosis  # noqa: F401 - registers all tables
+from app.routers import aiassistant
+from app.schemas.message import MessageCreate
+from app.services.chat_service import ChatService
+from contextlib import asynccontextmanager
+import asyncio
+import tempfile
+import os
+
+
+# Statements for one exchange: chat + history reads, then per phase the
+# message INSERT, the chat UPDATE and the two counter statements
+EXPECTED_STATEMENTS = 10
+EXPECTED_COMMITS = 2
+
+
+@asynccontextmanager
+async def create_test_db():
+    """Create a temporary test database with one chat"""
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    sync_engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+
+    engine = create_async_engine(get_async_database_url(f"sqlite:///{db_path}"))
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            user = User(email="patient@example.com", username="patient")
+            db.add(user)
+            await db.commit()
+            chat = await ChatService.create_chat(db, user.id, "New Chat")
+            yield engine, user.id, chat.id
+    finally:
+        await engine.dispose()
+        os.close(db_fd)
+        try:
+            os.unlink(db_path)
+        except PermissionError:
+            pass  # File may still be locked on Windows
+
+
+async def send(db, chat_id, user_id, content):
+    """Call the router's send_message endpoint for a connected client"""
+
+    async def receive():
+        await asyncio.Event().wait()  # The client never leaves
+
+    request = Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": f"/aiassistant/chats/{chat_id}/messages",
+            "headers": [],
+            "client": ("127.0.0.1", 50000),
+        },
+        receive,
+    )
+    user = SimpleNamespace(id=user_id, email="patient@example.com")
+    return await aiassistant.send_message(
+        chat_id, MessageCreate(content=content), request, db=db, current_user=user
+    )
+
+
+def test_send_message_statement_and_commit_count(monkeypatch, make_ai_service):
+    """One exchange issues a fixed number of statements in two commits"""
+    service = make_ai_service()
+    service.router.tiers["large"].llm = FakeListChatModel(responses=["Reply"])
+    service.router.tiers["fast"].llm = FakeListChatModel(responses=["First question"])
+    monkeypatch.setattr(aiassistant, "_ai_service", lambda: service)
+
+    async def run():
+        async with create_test_db() as (engine, user_id, chat_id):
+            statements = []
+            commits = []
+            event.listen(
+                engine.sync_engine,
+                "before_cursor_execute",
+                lambda conn, cursor, statement, *args: statements.append(statement),
+            )
+            event.listen(engine.sync_engine, "commit", lambda conn: commits.append(1))
+
+            # A fresh session per request, as with get_async_db
+            for i in range(3):
+                statements.clear()
+                commits.clear()
+                async with AsyncSession(engine, expire_on_commit=False) as db:
+                    response = await send(db, chat_id, user_id, f"Question {i}")
+
+                assert len(statements) == EXPECTED_STATEMENTS, statements
+                assert len(commits) == EXPECTED_COMMITS
+                assert response["user_message"]["id"]
+                assert response["assistant_message"]["content"] == "Reply"
+                assert response["assistant_message"]["created_at"]
+                assert ("chat_title" in response) == (i == 0)
+
+            async with AsyncSession(engine) as db:
+                chat = await db.get(Chat, chat_id)
+                stored = await db.scalar(
+                    select(func.count(Message.id)).filter(Message.chat_id == chat_id)
+                )
+                assert chat.title == "First question"
+                assert chat.message_count == stored == 6
+                assert chat.last_message_at is not None
+
+    asyncio.run(run())
+
+
+def test_chat_context_denies_other_users():
+    """Loading another user's chat returns None without reading messages"""
+
+    async def run():
+        async with create_test_db() as (engine, user_id, chat_id):
+            async with AsyncSession(engine) as db:
+                assert await ChatService.get_chat_context(db, chat_id, user_id + 1) is None
+
+    asyncio.run(run())
+
+
+def test_generated_title_never_waits():
+    """A ready title is returned; a late one is saved unless the chat was renamed"""
+
+    async def run():
+        async with create_test_db() as (engine, user_id, chat_id):
+            sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+            async def generate(title, delay):
+                await asyncio.sleep(delay)
+                return title
+
+            async with sessions() as db:
+                chat = await db.get(Chat, chat_id)
+                ready = asyncio.create_task(generate("Ready title", 0))
+                await asyncio.sleep(0.01)
+                assert ChatService.resolve_generated_title(chat, ready) == "Ready title"
+
+            # Finishes after the reply: applied to the untouched chat
+            await ChatService.save_generated_title(
+                chat_id, "New Chat", generate("Late title", 0.01), session_factory=sessions
+            )
+            async with sessions() as db:
+                assert (await db.get(Chat, chat_id)).title == "Late title"
+
+            # Renamed while the title was being generated: the user's title wins
+            async with sessions() as db:
+                other = await ChatService.create_chat(db, user_id, "New Chat")
+            pending = asyncio.create_task(
+                ChatService.save_generated_title(
+                    other.id, "New Chat", generate("Stale title", 0.05), session_factory=sessions
+                )
+            )
+            async with sessions() as db:
+                await ChatService.update_chat_title(db, other.id, user_id, "My liver results")
+            assert not pending.done()
+            await pending
+            async with sessions() as db:
+                assert (await db.get(Chat, other.id)).title == "My liver results"
+
+    asyncio.run(run())
+
+
+def test_context_summary_saved_after_reply():
+    """A summary is saved unless another one advanced the chat's meanwhile"""
+
+    async def run():
+        async with create_test_db() as (engine, user_id, chat_id):
+            sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+            async def summarize(summary):
+                await asyncio.sleep(0)
+                return summary
+
+            await ChatService.save_context_summary(
+                chat_id, None, 10, summarize("Turns 1-10"), session_factory=sessions
+            )
+            # Started from the same point, finished later: discarded
+            await ChatService.save_context_summary(
+                chat_id, None, 12, summarize("Turns 1-12, stale"), session_factory=sessions
+            )
+            # A failed summary changes nothing
+            await ChatService.save_context_summary(
+                chat_id, 10, 20, summarize(None), session_factory=sessions
+            )
+            async with sessions() as db:
+                chat = await db.get(Chat, chat_id)
+                assert (chat.context_summary, chat.summarized_until_id) == ("Turns 1-10", 10)
+
+            await ChatService.save_context_summary(
+                chat_id, 10, 20, summarize("Turns 1-20"), session_factory=sessions
+            )
+            async with sessions() as db:
+                chat = await db.get(Chat, chat_id)
+                assert (chat.context_summary, chat.summarized_until_id) == ("Turns 1-20", 20)
+
+    asyncio.run(run())
@@ -0,0 +1,107 @@
+"""
+Tests for cancelling assistant work when the client disconnects
+
+Feature: client-disconnect
+Validates: work awaited for a request is cancelled soon after its client
+disconnects, releasing the gateway slot it held, and the cancellation is
+counted; work for a connected client completes normally; cancelling a
+streamed reply also releases its slot
+"""
+
+from app.utils import disconnect
+from app.utils.disconnect import ClientDisconnected, run_until_disconnect
+from app.utils.llm_gateway import LLMGateway
+import asyncio
+import pytest
+
+
+class FakeRequest:
+    """Reports a disconnect once `connected` is cleared"""
+
+    def __init__(self):
+        self.connected = True
+        self.checks = 0
+
+    async def is_disconnected(self):
+        self.checks += 1
+        return not self.connected
+
+
+def test_disconnect_cancels_llm_call_and_frees_slot():
+    """The call is cancelled within a poll interval and its slot released"""
+    gateway = LLMGateway("test-model", max_concurrency=1)
+    request = FakeRequest()
+    cancelled = []
+    before = disconnect.get_cancellation_stats().get("send_message", 0)
+
+    async def slow_completion():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        async def leave():
+            await asyncio.sleep(0.05)
+            request.connected = False
+
+        asyncio.create_task(leave())
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with pytest.raises(ClientDisconnected) as error:
+            await run_until_disconnect(
+                request, gateway.call(slow_completion), "send_message", poll_seconds=0.01
+            )
+        return loop.time() - started, error.value.status_code
+
+    elapsed, status_code = asyncio.run(run())
+
+    assert elapsed < 1 and status_code == 499
+    assert cancelled == [True]
+    assert gateway.stats()["in_flight"] == 0
+    assert disconnect.get_cancellation_stats()["send_message"] == before + 1
+
+
+def test_connected_client_gets_the_result():
+    """Work finishes normally while the client stays connected"""
+    request = FakeRequest()
+
+    async def completion():
+        await asyncio.sleep(0.05)
+        return "reply"
+
+    result = asyncio.run(
+        run_until_disconnect(request, completion(), "send_message", poll_seconds=0.01)
+    )
+
+    assert result == "reply" and request.checks >= 1
+
+
+def test_cancelled_stream_frees_slot():
+    """Cancelling a streamed reply mid-way releases the gateway slot"""
+    gateway = LLMGateway("test-model", max_concurrency=1)
+
+    async def tokens():
+        for n in range(100):
+            await asyncio.sleep(0.01)
+            yield f"token {n}"
+
+    async def run():
+        received = []
+
+        async def consume():
+            async for chunk in gateway.stream(tokens):
+                received.append(chunk)
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return received
+
+    received = asyncio.run(run())
+
+    assert 0 < len(received) < 100
+    assert gateway.stats()["in_flight"] == 0
@@ -0,0 +1,109 @@
+"""
+Tests for the token-budgeted conversation context
+
+Feature: conversation-context
+Validates: the context never exceeds the model budget, recent turns are
+kept verbatim and older ones are handed to the rolling summary once,
+oversized file analyses are cut to their key findings, and the context is
+budgeted for the model the message is routed to
+"""
+
+from app.core.config import settings
+from app.models import Chat, Message
+from app.services.context_service import MODEL_CONTEXT_WINDOWS, ContextService
+from app.utils.ai_helpers import estimate_tokens
+
+
+MODEL = "llama-3.3-70b-versatile"
+SYSTEM_PROMPT = "You are a helpful medical assistant."
+
+
+def make_history(count, words=300, internal=()):
+    """Alternate user/assistant messages with ids 1..count"""
+    return [
+        Message(
+            id=i,
+            chat_id=1,
+            role="user" if i % 2 else "assistant",
+            content=f"Turn {i}: " + "symptom " * words,
+            is_internal=i in internal,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def test_context_fits_budget_and_keeps_recent_turns():
+    """Newest turns are verbatim; the rest go to the summary"""
+    chat = Chat(id=1, user_id=1, title="Chat")
+    history = make_history(60)
+
+    context = ContextService.build_context(
+        chat, history, "How are my results?", SYSTEM_PROMPT, MODEL
+    )
+
+    assert context.tokens <= ContextService.get_token_budget(MODEL)
+    assert context.recent, "some recent turns must fit"
+    assert context.recent[-1] is history[-1]
+    assert context.to_summarize + context.recent == history
+    assert [m["content"] for m in context.as_chat_history()] == [
+        m.content for m in context.recent
+    ]
+
+
+def test_summarized_turns_are_not_resent():
+    """Turns covered by the stored summary are neither sent nor re-summarized"""
+    history = make_history(60)
+    chat = Chat(
+        id=1,
+        user_id=1,
+        title="Chat",
+        context_summary="The user reported symptoms.",
+        summarized_until_id=40,
+    )
+
+    context = ContextService.build_context(chat, history, "And now?", SYSTEM_PROMPT, MODEL)
+
+    assert all(m.id > 40 for m in context.recent + context.to_summarize)
+    assert context.to_summarize + context.recent == history[40:]
+    first = context.as_chat_history()[0]
+    assert first["role"] == "system"
+    assert "The user reported symptoms." in first["content"]
+
+
+def test_file_analysis_cut_to_key_findings():
+    """Internal file analyses keep their key sections within the limit"""
+    analysis = "\n".join(
+        [
+            "1. **Document Type**: Liver function lab report",
+            "2. **Visual Assessment**: " + "chart details " * 600,
+            "3. **Important Findings**: ALT 120 U/L (high), AST 95 U/L (high)",
+            "4. **Context & Terminology**: " + "definitions " * 600,
+        ]
+    )
+    message = Message(id=1, chat_id=1, role="assistant", content=analysis, is_internal=True)
+
+    content = ContextService.message_content(message)
+
+    assert estimate_tokens(content) <= 800
+    assert "ALT 120 U/L" in content
+    assert "Liver function lab report" in content
+    assert "definitions" not in content
+
+    # Visible messages are never shortened
+    message.is_internal = False
+    assert ContextService.message_content(message) == analysis
+
+
+def test_context_budgeted_for_the_routed_model(monkeypatch, make_ai_service):
+    """A message routed to a smaller-window model gets a smaller context"""
+    monkeypatch.setitem(MODEL_CONTEXT_WINDOWS, settings.groq_fast_model, 8192)
+    service = make_ai_service()
+    chat = Chat(id=1, user_id=1, title="Chat")
+    history = make_history(60)
+
+    large = service.prepare_context(chat, history, "And now?", service.router.route("chat"))
+    fast = service.prepare_context(chat, history, "And now?", service.router.route("title"))
+
+    assert fast.tokens <= ContextService.get_token_budget(settings.groq_fast_model)
+    assert len(fast.recent) < len(large.recent)
+    assert fast.to_summarize + fast.recent == history
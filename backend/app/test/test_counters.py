@@ -0,0 +1,195 @@
+"""
+Tests for denormalized counters
+
+Feature: denormalized-counters
+Validates: the flush listener keeps chat, message, notification and
+diagnosis counters in step with inserts, deletes and status changes,
+reconciliation repairs drift, and the stats endpoints read the counters
+"""
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.connection import Base, get_async_database_url
+from app.models import User, Chat, Message
+from app.models import disease, classifier  # noqa: F401 - diagnoses reference these
+from app.models.counter import CounterName, UserCounter
+from app.models.diagnosis import Diagnosis, DiagnosisStatus
+from app.models.notification import Notification, NotificationType
+from app.services.chat_service import ChatService
+from app.services.counter_service import CounterService
+from app.services.diagnosis_service import DiagnosisService
+from app.services.notification_service import NotificationService
+from contextlib import contextmanager
+import asyncio
+import tempfile
+import os
+
+
+@contextmanager
+def create_test_db():
+    """Create a temporary test database with one user"""
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    try:
+        user = User(email="patient@example.com", username="patient")
+        db.add(user)
+        db.commit()
+        yield db, user.id, db_path
+    finally:
+        db.close()
+        engine.dispose()
+        os.close(db_fd)
+        try:
+            os.unlink(db_path)
+        except PermissionError:
+            pass  # File may still be locked on Windows
+
+
+def counters(db, user_id):
+    return CounterService.get_counts(
+        db,
+        user_id,
+        [
+            CounterName.CHATS,
+            CounterName.CHATS_ARCHIVED,
+            CounterName.CHATS_PINNED,
+            CounterName.MESSAGES,
+            CounterName.NOTIFICATIONS_UNREAD,
+        ],
+    )
+
+
+def test_counters_follow_inserts_updates_and_deletes():
+    """Every counted change adjusts the counters in the same commit"""
+    with create_test_db() as (db, user_id, _):
+        chats = [Chat(user_id=user_id, title=f"Chat {i}") for i in range(3)]
+        db.add_all(chats)
+        db.commit()
+        db.add_all(
+            [Message(chat_id=chats[0].id, content="hi", role="user") for _ in range(4)]
+        )
+        db.add(Message(chat_id=chats[1].id, content="hi", role="user"))
+        chats[1].is_pinned = True
+        chats[2].is_archived = True
+        db.commit()
+
+        assert chats[0].message_count == 4
+        assert counters(db, user_id) == {
+            CounterName.CHATS: 3,
+            CounterName.CHATS_ARCHIVED: 1,
+            CounterName.CHATS_PINNED: 1,
+            CounterName.MESSAGES: 5,
+            CounterName.NOTIFICATIONS_UNREAD: 0,
+        }
+
+        # Deleting a chat takes its messages with it
+        db.delete(chats[0])
+        db.delete(chats[2])
+        db.commit()
+        assert counters(db, user_id)[CounterName.CHATS] == 1
+        assert counters(db, user_id)[CounterName.CHATS_ARCHIVED] == 0
+        assert counters(db, user_id)[CounterName.MESSAGES] == 1
+
+        # A rolled-back flush leaves the counters untouched
+        db.add(Chat(user_id=user_id, title="Discarded"))
+        db.flush()
+        db.rollback()
+        assert counters(db, user_id)[CounterName.CHATS] == 1
+
+
+def test_notification_and_diagnosis_counters():
+    """Unread and per-status counts track reads and status transitions"""
+    with create_test_db() as (db, user_id, _):
+        for i in range(3):
+            NotificationService.create_notification(
+                db, user_id, NotificationType.SYSTEM, "Title", f"Message {i}"
+            )
+        first = NotificationService.get_user_notifications(db, user_id, limit=1)[0]
+        NotificationService.mark_as_read(db, first.id, user_id)
+        assert NotificationService.get_unread_count(db, user_id) == 2
+
+        assert NotificationService.mark_all_as_read(db, user_id) == 2
+        assert NotificationService.get_unread_count(db, user_id) == 0
+
+        diagnoses = [
+            Diagnosis(user_id=user_id, disease_id=1, classifier_id=1, modality="Tabular")
+            for _ in range(3)
+        ]
+        db.add_all(diagnoses)
+        db.commit()
+        diagnoses[0].status = DiagnosisStatus.COMPLETED
+        diagnoses[1].status = DiagnosisStatus.FAILED
+        db.commit()
+
+        assert DiagnosisService.get_user_diagnosis_stats(db, user_id) == {
+            "pending": 1,
+            "processing": 0,
+            "completed": 1,
+            "failed": 1,
+            "total": 3,
+        }
+
+
+def test_reconcile_repairs_drift():
+    """Reconciliation recomputes counters changed behind the listener's back"""
+    with create_test_db() as (db, user_id, _):
+        chat = Chat(user_id=user_id, title="Chat")
+        db.add(chat)
+        db.commit()
+        db.add_all([Message(chat_id=chat.id, content="hi", role="user") for _ in range(2)])
+        db.add(
+            Notification(
+                user_id=user_id,
+                type=NotificationType.SYSTEM,
+                title="Title",
+                message="Message",
+            )
+        )
+        db.commit()
+        assert CounterService.reconcile(db) == 0
+
+        # Bulk statements skip the flush listener
+        db.execute(update(Notification).values(is_read=True))
+        db.execute(update(Chat).values(message_count=7))
+        db.execute(
+            update(UserCounter)
+            .filter(UserCounter.name == CounterName.CHATS)
+            .values(value=9)
+        )
+        db.commit()
+
+        assert CounterService.reconcile(db) == 3
+        db.expire_all()
+        assert chat.message_count == 2
+        assert counters(db, user_id)[CounterName.CHATS] == 1
+        assert counters(db, user_id)[CounterName.NOTIFICATIONS_UNREAD] == 0
+        assert CounterService.reconcile(db) == 0
+
+
+def test_async_chat_stats_read_counters():
+    """ChatService.get_chat_stats reads the counters through an AsyncSession"""
+    with create_test_db() as (db, user_id, db_path):
+        chat = Chat(user_id=user_id, title="Chat", is_pinned=True)
+        db.add(chat)
+        db.commit()
+        db.add(Message(chat_id=chat.id, content="hi", role="user"))
+        db.commit()
+
+        async def run():
+            engine = create_async_engine(get_async_database_url(f"sqlite:///{db_path}"))
+            try:
+                async with AsyncSession(engine) as session:
+                    return await ChatService.get_chat_stats(session, user_id)
+            finally:
+                await engine.dispose()
+
+        stats = asyncio.run(run())
+
+        assert stats["total_chats"] == 1
+        assert stats["pinned_chats"] == 1
+        assert stats["archived_chats"] == 0
+        assert stats["total_messages"] == 1
@@ -0,0 +1,149 @@
+"""
+Query-count regression test for diagnosis list and detail endpoints
+
+Feature: diagnosis-list-performance
+Validates: listing or fetching diagnoses with disease and classifier info
+costs a constant number of queries, not one per row and relationship
+"""
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.db.connection import Base
+from app.models import User  # noqa: F401 - registers User/Chat/Message mappers
+from app.models.disease import Disease
+from app.models.classifier import Classifier, ModalityType
+from app.models.diagnosis import Diagnosis, DiagnosisStatus
+from app.services.diagnosis_service import DiagnosisService
+from contextlib import contextmanager
+import tempfile
+import os
+
+
+PAGE_SIZE = 50
+
+
+@contextmanager
+def create_test_db():
+    """Create a temporary test database context manager"""
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    engine = create_engine(f"sqlite:///{db_path}")
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    try:
+        yield engine, SessionLocal
+    finally:
+        engine.dispose()
+        os.close(db_fd)
+        try:
+            os.unlink(db_path)
+        except PermissionError:
+            pass  # File may still be locked on Windows
+
+
+@contextmanager
+def count_queries(engine):
+    """Count SQL statements executed on the engine"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def seed_diagnoses(session):
+    """Create a user with PAGE_SIZE diagnoses spread over several classifiers"""
+    user = User(email="patient@example.com", username="patient")
+    session.add(user)
+
+    classifiers = []
+    for i in range(5):
+        disease = Disease(name=f"Disease {i}", available_modalities=["Tabular"])
+        session.add(disease)
+        session.flush()
+        classifier = Classifier(
+            name=f"Classifier {i}", disease_id=disease.id, modality=ModalityType.TABULAR
+        )
+        session.add(classifier)
+        classifiers.append(classifier)
+    session.flush()
+
+    for i in range(PAGE_SIZE):
+        classifier = classifiers[i % len(classifiers)]
+        session.add(
+            Diagnosis(
+                user_id=user.id,
+                disease_id=classifier.disease_id,
+                classifier_id=classifier.id,
+                modality="Tabular",
+                status=DiagnosisStatus.COMPLETED,
+            )
+        )
+    session.commit()
+    return user.id
+
+
+def test_user_diagnoses_page_is_single_query():
+    """Serializing a page of a user's diagnoses does not lazy-load relationships"""
+    with create_test_db() as (engine, SessionLocal):
+        session = SessionLocal()
+        try:
+            user_id = seed_diagnoses(session)
+            session.expunge_all()
+
+            with count_queries(engine) as statements:
+                diagnoses = DiagnosisService.get_user_diagnoses(
+                    session, user_id=user_id, limit=PAGE_SIZE
+                )
+                payload = [d.to_response_dict() for d in diagnoses]
+
+            assert len(payload) == PAGE_SIZE
+            assert all(item["disease_name"] for item in payload)
+            assert all(item["classifier_name"] for item in payload)
+            assert len(statements) == 1
+        finally:
+            session.close()
+
+
+def test_admin_diagnoses_page_is_single_query():
+    """Serializing a page of all diagnoses does not lazy-load relationships"""
+    with create_test_db() as (engine, SessionLocal):
+        session = SessionLocal()
+        try:
+            seed_diagnoses(session)
+            session.expunge_all()
+
+            with count_queries(engine) as statements:
+                diagnoses = DiagnosisService.get_all_diagnoses(session, limit=PAGE_SIZE)
+                payload = [d.to_response_dict() for d in diagnoses]
+
+            assert len(payload) == PAGE_SIZE
+            assert len(statements) == 1
+        finally:
+            session.close()
+
+
+def test_diagnosis_detail_is_single_query():
+    """Fetching one diagnosis with its details is a single query"""
+    with create_test_db() as (engine, SessionLocal):
+        session = SessionLocal()
+        try:
+            user_id = seed_diagnoses(session)
+            diagnosis_id = session.query(Diagnosis.id).first()[0]
+            session.expunge_all()
+
+            with count_queries(engine) as statements:
+                diagnosis = DiagnosisService.get_diagnosis(
+                    session, diagnosis_id=diagnosis_id, user_id=user_id
+                )
+                payload = diagnosis.to_response_dict()
+
+            assert payload["disease_name"] is not None
+            assert len(statements) == 1
+        finally:
+            session.close()
@@ -0,0 +1,61 @@
+"""
+Tests for the uploaded file analysis cache
+
+Feature: file-analysis-cache
+Validates: re-uploading identical bytes reuses the stored analysis without
+another LLM call, under the new filename, while different bytes or failed
+analyses are never served from the cache
+"""
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from PIL import Image
+import asyncio
+import io
+
+from app.services import file_processor
+from app.services.file_processor import FileProcessor
+
+
+def make_png(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_reupload_reuses_analysis(monkeypatch):
+    """The same bytes are analyzed once; other bytes get their own analysis"""
+    llm = FakeListChatModel(responses=["Lab report: ALT 120 U/L", "A red square"])
+    monkeypatch.setattr(file_processor, "get_vision_llm", lambda: llm)
+    file_processor.analysis_cache.clear()
+
+    report = make_png("white")
+
+    async def upload_all():
+        first = await FileProcessor.process_file(report, "image/png", "report.png")
+        again = await FileProcessor.process_file(report, "image/png", "copy.png")
+        other = await FileProcessor.process_file(make_png("red"), "image/png", "red.png")
+        return first, again, other
+
+    first, again, other = asyncio.run(upload_all())
+
+    assert again["content"] == first["content"] == "Lab report: ALT 120 U/L"
+    assert again["metadata"]["filename"] == "copy.png"
+    assert again["metadata"]["cache_hit"] and "cache_hit" not in first["metadata"]
+    assert again["metadata"]["content_hash"] == first["metadata"]["content_hash"]
+    assert other["content"] == "A red square"
+    assert FileProcessor.get_cache_stats()["hits"] == 1
+
+
+def test_failed_analysis_not_cached(monkeypatch):
+    """An analysis that errors is retried on the next upload"""
+    class FailingLLM:
+        async def ainvoke(self, messages):
+            raise RuntimeError("rate limited")
+
+    monkeypatch.setattr(file_processor, "get_vision_llm", lambda: FailingLLM())
+    file_processor.analysis_cache.clear()
+
+    scan = make_png("blue")
+    failed = asyncio.run(FileProcessor.process_file(scan, "image/png", "scan.png"))
+    assert failed["processing_status"] == "error"
+    assert len(file_processor.analysis_cache) == 0
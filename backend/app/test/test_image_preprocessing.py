@@ -0,0 +1,68 @@
+"""
+Tests for vision-model image preprocessing
+
+Feature: image-preprocessing
+Validates: uploads are decoded once at reduced size, turned upright,
+flattened and re-encoded within the size limit, with metadata describing
+both the upload and what is sent to the model
+"""
+
+from PIL import Image, ImageFile
+from app.utils.image_preprocessing import prepare_image
+import io
+
+
+def encode(image, format, **params):
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **params)
+    return buffer.getvalue()
+
+
+def test_phone_photo_is_drafted_and_turned_upright(monkeypatch):
+    """A large rotated JPEG is decoded in draft mode and sent upright"""
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Stored rotated 90 degrees clockwise
+    photo = encode(Image.new("RGB", (4000, 3000), "tan"), "JPEG", exif=exif)
+
+    loaded_sizes = []
+    original_load = ImageFile.ImageFile.load
+
+    def record_load(image):
+        loaded_sizes.append(image.size)
+        return original_load(image)
+
+    monkeypatch.setattr(ImageFile.ImageFile, "load", record_load)
+    prepared = prepare_image(photo, "image/jpeg", max_side=1000)
+
+    metadata = prepared.metadata
+    assert metadata["size"] == (4000, 3000) and metadata["has_exif"]
+    assert metadata["sent_format"] == "JPEG" and prepared.mime_type == "image/jpeg"
+    assert metadata["sent_size"] == (750, 1000)
+    assert metadata["sent_bytes"] == len(prepared.data)
+    # Decoded once, and never at full resolution
+    assert loaded_sizes == [(1000, 750)]
+    assert Image.open(io.BytesIO(prepared.data)).size == (750, 1000)
+
+
+def test_transparent_screenshot_is_flattened_on_white():
+    """Transparency becomes white, and the smaller of PNG and JPEG is sent"""
+    screenshot = Image.new("RGBA", (600, 400), (0, 0, 0, 0))
+    screenshot.paste((200, 0, 0, 255), (100, 100, 300, 200))
+
+    prepared = prepare_image(encode(screenshot, "PNG"), "image/png")
+
+    sent = Image.open(io.BytesIO(prepared.data))
+    assert prepared.metadata["sent_format"] in ("PNG", "JPEG")
+    assert sent.mode == "RGB" and sent.size == (600, 400)
+    assert sent.getpixel((10, 10))[0] > 240  # white, not black
+
+
+def test_grayscale_scan_stays_grayscale():
+    """Single-channel scans are not expanded to three channels"""
+    scan = encode(Image.new("L", (2480, 3508), 255), "JPEG", quality=90)
+
+    prepared = prepare_image(scan, "image/jpeg")
+
+    sent = Image.open(io.BytesIO(prepared.data))
+    assert sent.mode == "L"
+    assert max(sent.size) == 1024
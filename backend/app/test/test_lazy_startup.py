@@ -0,0 +1,52 @@
+"""
+Tests for lazy loading of heavy subsystems
+
+Feature: lazy-startup
+Validates: importing the API's routers and services does not load
+LangChain, the Groq client, PDF/image libraries, pandas/joblib or
+tiktoken, and the LLMs are built on first use (without needing a key at
+import) and shared
+"""
+
+import os
+import subprocess
+import sys
+
+from app.utils.startup_benchmark import measure
+
+
+def test_routers_import_without_heavy_modules(tmp_path, monkeypatch):
+    """Router and database modules leave the lazy modules unloaded"""
+    # An importable tiktoken, so an import-time load shows up where the
+    # real package is not installed
+    (tmp_path / "tiktoken.py").write_text("")
+    path = [str(tmp_path), os.environ.get("PYTHONPATH")]
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join(filter(None, path)))
+
+    for module in (
+        "app.routers.diagnosis",
+        "app.routers.admin_diagnosis",
+        "app.routers.aiassistant",
+        "app.db.database",
+    ):
+        result = measure(module)
+        assert result["lazy_loaded"] == [], module
+
+
+def test_models_are_built_on_first_use():
+    """ai_models imports without a key; each model is built once, when asked for"""
+    code = (
+        "import sys\n"
+        "from app.utils import ai_models\n"
+        "assert 'langchain_groq' not in sys.modules\n"
+        "from app.core.config import settings\n"
+        "settings.llm_backend = 'fake'\n"
+        "llm = ai_models.get_text_llm()\n"
+        "assert ai_models.get_text_llm() is llm\n"
+        "assert ai_models.get_fast_text_llm() is not llm\n"
+        "assert 'langchain_groq' not in sys.modules\n"
+    )
+    env = {**os.environ, "GROQ_API_KEY": ""}
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+
+    assert result.returncode == 0, result.stderr
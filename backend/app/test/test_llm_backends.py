@@ -0,0 +1,96 @@
+"""
+Tests for the offline LLM backends and load-test reporting
+
+Feature: llm-backends
+Validates: the fake model answers deterministically per prompt, streams
+the same text it returns, honours max_tokens and paces tokens at its
+configured rate; record mode saves real replies which replay mode serves
+without the model, and an unrecorded prompt fails clearly in replay;
+load-test percentiles use nearest rank
+"""
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from app.utils.llm_backends import FakeChatModel, RecordReplayChatModel, ReplayMissError
+from app.utils.load_test import FlowResult, percentile, summarize
+import asyncio
+import os
+import pytest
+
+
+def test_fake_model_is_deterministic_per_prompt():
+    """Same prompt and seed, same reply, whether invoked or streamed"""
+    fast = dict(latency_ms=1, latency_sigma=0, tokens_per_second=10_000, reply_tokens=20)
+    first, second = FakeChatModel(**fast), FakeChatModel(**fast)
+
+    async def run():
+        reply = (await first.ainvoke("ALT 80 U/L?")).content
+        streamed = "".join([chunk.content async for chunk in second.astream("ALT 80 U/L?")])
+        other = (await first.ainvoke("AST 40 U/L?")).content
+        short = (await first.bind(max_tokens=5).ainvoke("ALT 80 U/L?")).content
+        return reply, streamed, other, short
+
+    reply, streamed, other, short = asyncio.run(run())
+    assert reply == streamed and reply != other
+    assert len(reply.split(" ")) == 20
+    assert reply.startswith(short) and len(short.split(" ")) == 5
+
+
+def test_fake_model_paces_tokens():
+    """First token after the latency, the rest at tokens_per_second"""
+    llm = FakeChatModel(
+        latency_ms=50, latency_sigma=0, tokens_per_second=200,
+        tokens_per_second_sigma=0, reply_tokens=21,
+    )
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        times = [loop.time() - started async for _ in llm.astream("hi")]
+        return times
+
+    times = asyncio.run(run())
+    assert 0.04 <= times[0] < 0.2
+    assert 0.09 <= times[-1] - times[0] < 0.4  # 20 tokens at 200/s
+
+
+def test_record_then_replay(tmp_path):
+    """Recorded replies are served in replay mode without the real model"""
+    recordings = str(tmp_path)
+    recorder = RecordReplayChatModel(
+        mode="record", recordings_dir=recordings, model_name="groq-model",
+        model=FakeListChatModel(responses=["Normal range.", "Streamed reply here"]),
+    )
+    replayer = RecordReplayChatModel(
+        mode="replay", recordings_dir=recordings, model_name="groq-model"
+    )
+
+    async def run():
+        await recorder.ainvoke("Is ALT 30 normal?")
+        streamed = [chunk.content async for chunk in recorder.astream("Explain AST")]
+        replayed = (await replayer.ainvoke("Is ALT 30 normal?")).content
+        restreamed = "".join([chunk.content async for chunk in replayer.astream("Explain AST")])
+        return "".join(streamed), replayed, restreamed
+
+    streamed, replayed, restreamed = asyncio.run(run())
+    assert replayed == "Normal range."
+    assert restreamed == streamed
+    assert len(os.listdir(recordings)) == 2
+
+    with pytest.raises(ReplayMissError):
+        asyncio.run(replayer.ainvoke("Never recorded"))
+
+
+def test_load_test_percentiles():
+    """Nearest-rank percentiles, reported in milliseconds per flow"""
+    values = [i / 1000 for i in range(1, 101)]  # 1..100 ms
+    assert percentile(values, 50) == 0.05 and percentile(values, 99) == 0.099
+    assert percentile([0.2], 95) == 0.2 and percentile([], 50) is None
+
+    chat = FlowResult(latencies=values, first_tokens=values[:10])
+    chat.error("HTTP 503")
+    report = summarize({"chat": chat, "upload": FlowResult()}, elapsed=10)
+
+    assert report["chat"]["requests"] == 101 and report["chat"]["throughput_rps"] == 10
+    assert report["chat"]["latency_ms"] == {"p50": 50.0, "p95": 95.0, "p99": 99.0}
+    assert report["chat"]["time_to_first_token_ms"]["p99"] == 10.0
+    assert report["upload"]["latency_ms"] is None
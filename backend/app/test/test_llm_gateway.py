@@ -0,0 +1,213 @@
+"""
+Tests for the Groq call gateway
+
+Feature: llm-gateway
+Validates: concurrent calls are capped per model with the queue wait
+recorded, transient errors (429, timeouts) are retried with backoff while
+client errors are not, a run of failures opens the circuit so later calls
+fail fast, a cancelled half-open trial frees the trial slot, streams are retried only before their first chunk, and wrapped
+chat models route ainvoke and astream through the gateway
+"""
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from app.utils.llm_gateway import GatewayChatModel, LLMGateway, LLMUnavailableError, TokenBucket
+import asyncio
+import pytest
+
+
+class StatusError(Exception):
+    """Stands in for a groq.APIStatusError"""
+
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+def make_gateway(**overrides):
+    options = dict(
+        max_concurrency=2,
+        timeout_seconds=1.0,
+        max_retries=3,
+        retry_base_delay=0.001,
+        retry_max_delay=0.01,
+        failure_threshold=3,
+        reset_seconds=60,
+    )
+    options.update(overrides)
+    return LLMGateway("test-model", **options)
+
+
+def test_concurrency_is_capped_and_queue_wait_recorded():
+    """At most max_concurrency calls run at once; the rest wait their turn"""
+    gateway = make_gateway(max_concurrency=2)
+    running, peak = 0, 0
+
+    async def work():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return "ok"
+
+    async def run():
+        return await asyncio.gather(*(gateway.call(work) for _ in range(6)))
+
+    assert asyncio.run(run()) == ["ok"] * 6
+    assert peak == 2
+    stats = gateway.stats()
+    assert stats["calls"] == 6 and stats["in_flight"] == 0 and stats["waiting"] == 0
+    assert stats["queue_wait_ms"]["samples"] == 6
+    assert stats["queue_wait_ms"]["max"] >= 30  # the last pair waited two rounds
+
+
+def test_rate_limit_is_retried_until_success():
+    """429s and timeouts are retried; a 400 is raised straight away"""
+    gateway = make_gateway(timeout_seconds=0.05)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise StatusError(429)
+        if len(attempts) == 2:
+            await asyncio.sleep(1)  # times out
+        return "answer"
+
+    async def bad_request():
+        raise StatusError(400)
+
+    assert asyncio.run(gateway.call(flaky)) == "answer"
+    assert len(attempts) == 3
+    with pytest.raises(StatusError):
+        asyncio.run(gateway.call(bad_request))
+
+    stats = gateway.stats()
+    assert stats["retries"] == 2 and stats["timeouts"] == 1
+    assert stats["failures"] == 1 and stats["circuit"] == "closed"
+
+
+def test_circuit_opens_and_fails_fast():
+    """After failure_threshold upstream errors calls are rejected unsent"""
+    gateway = make_gateway(max_retries=10, failure_threshold=3)
+    attempts = []
+
+    async def down():
+        attempts.append(1)
+        raise StatusError(503)
+
+    with pytest.raises(StatusError):
+        asyncio.run(gateway.call(down))
+    assert len(attempts) == 3  # stopped retrying once the circuit opened
+
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(gateway.call(down))
+    assert len(attempts) == 3
+    assert gateway.stats()["circuit"] == "open" and gateway.stats()["rejected"] == 1
+
+    # After the reset period one trial call is let through, and closes it
+    gateway.breaker.reset_seconds = 0
+
+    async def up():
+        return "back"
+
+    assert asyncio.run(gateway.call(up)) == "back"
+    assert gateway.stats()["circuit"] == "closed"
+
+
+def test_cancelled_trial_does_not_wedge_the_circuit():
+    """A half-open trial cancelled mid-call (call or stream) lets the next call try"""
+    gateway = make_gateway(failure_threshold=1)
+    gateway.breaker.record_failure()
+    gateway.breaker.reset_seconds = 0
+    assert gateway.breaker.state == "half_open"
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def tokens():
+        yield "a"
+        await asyncio.sleep(10)
+        yield "b"
+
+    async def cancel_trials():
+        task = asyncio.create_task(gateway.call(hang))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert gateway.breaker.state == "half_open"
+
+        async def consume():
+            async for _ in gateway.stream(tokens):
+                pass
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        async def up():
+            return "back"
+
+        return await gateway.call(up)
+
+    assert asyncio.run(cancel_trials()) == "back"
+    assert gateway.stats()["circuit"] == "closed"
+    assert gateway.stats()["rejected"] == 0 and gateway.stats()["in_flight"] == 0
+
+
+def test_stream_is_retried_only_before_first_chunk():
+    """A failed start is retried; a failure mid-stream is raised"""
+    gateway = make_gateway()
+    starts = []
+
+    async def stream():
+        starts.append(1)
+        if len(starts) == 1:
+            raise StatusError(500)
+        yield "a"
+        yield "b"
+        if len(starts) == 2:
+            raise StatusError(500)
+
+    async def collect():
+        chunks = []
+        try:
+            async for chunk in gateway.stream(stream):
+                chunks.append(chunk)
+        except StatusError:
+            chunks.append("error")
+        return chunks
+
+    assert asyncio.run(collect()) == ["a", "b", "error"]
+    assert len(starts) == 2 and gateway.stats()["in_flight"] == 0
+
+
+def test_token_bucket_paces_prompt_tokens():
+    """Tokens beyond the bucket wait for it to refill"""
+    bucket = TokenBucket(rate_per_minute=6000)  # 100 per second
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await bucket.acquire(6000)
+        await bucket.acquire(5)  # needs 0.05s of refill
+        return loop.time() - started
+
+    assert 0.04 <= asyncio.run(run()) < 0.5
+
+
+def test_wrapped_model_goes_through_gateway():
+    """ainvoke and astream on the wrapped model are counted by the gateway"""
+    gateway = make_gateway()
+    llm = GatewayChatModel(model=FakeListChatModel(responses=["hello"]), gateway=gateway)
+
+    async def run():
+        reply = await llm.ainvoke("hi")
+        chunks = [chunk.content async for chunk in llm.astream("hi")]
+        return reply.content, "".join(chunks)
+
+    assert asyncio.run(run()) == ("hello", "hello")
+    assert gateway.stats()["calls"] == 2
@@ -0,0 +1,85 @@
+"""
+Tests for upload-time model profiling
+
+Feature: classifier-upload-profiling
+Validates: profiling runs in a subprocess, reports timings and memory, and
+activation is refused when a model is broken or exceeds the ceilings
+"""
+
+from datetime import datetime
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+from app.engines.model_profiler import run_profile
+from app.models.classifier import Classifier
+from app.services.classifier_service import ClassifierService
+from app.core.config import settings
+import joblib
+import numpy as np
+import pandas as pd
+
+
+FEATURES = ["Age", "ALB", "ALP", "AST"]
+
+
+def write_model_files(model_dir):
+    """Train a tiny model and save it in the layout StorageService uses"""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(50, len(FEATURES))), columns=FEATURES)
+    y = (X["AST"] > 0).astype(int)
+
+    imputer = SimpleImputer().fit(X)
+    scaler = StandardScaler().fit(X)
+    model = LogisticRegression().fit(scaler.transform(X), y)
+
+    joblib.dump(FEATURES, model_dir / "features.pkl")
+    joblib.dump(scaler, model_dir / "scaler.pkl")
+    joblib.dump(imputer, model_dir / "imputer.pkl")
+    joblib.dump(model, model_dir / "model.pkl")
+    joblib.dump({0: "Negative", 1: "Positive"}, model_dir / "class.pkl")
+
+
+def test_profile_reports_timings_and_memory(tmp_path):
+    """A valid model is loaded in the subprocess and all numbers are reported"""
+    write_model_files(tmp_path)
+
+    profile = run_profile(str(tmp_path), timeout=120, memory_limit_mb=2048, batch_size=10)
+
+    assert profile["error"] == ""
+    assert profile["load_time"] > 0
+    assert profile["predict_latency"] > 0
+    assert profile["batch_latency"] > 0
+    assert profile["batch_size"] == 10
+    assert profile["memory_mb"] >= 0
+
+
+def test_profile_reports_broken_model(tmp_path):
+    """A corrupt pickle is reported as an error instead of raising"""
+    write_model_files(tmp_path)
+    (tmp_path / "model.pkl").write_bytes(b"not a pickle")
+
+    profile = run_profile(str(tmp_path), timeout=120, memory_limit_mb=2048)
+
+    assert profile["error"]
+
+
+def test_profile_violations_against_ceilings():
+    """Activation is refused for failed profiles or values above the ceilings"""
+    classifier = Classifier(name="test")
+    assert ClassifierService.get_profile_violations(classifier) == []
+
+    classifier.profiled_at = datetime.utcnow()
+    classifier.profile_load_time = 0.1
+    classifier.profile_predict_latency = 0.01
+    classifier.profile_batch_latency = 0.05
+    classifier.profile_memory_mb = 10.0
+    assert ClassifierService.get_profile_violations(classifier) == []
+
+    classifier.profile_memory_mb = settings.model_max_memory_mb + 1
+    violations = ClassifierService.get_profile_violations(classifier)
+    assert len(violations) == 1
+    assert "memory footprint" in violations[0]
+
+    classifier.profile_error = "Profiling timed out after 120s"
+    violations = ClassifierService.get_profile_violations(classifier)
+    assert violations == ["profiling failed: Profiling timed out after 120s"]
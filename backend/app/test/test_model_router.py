@@ -0,0 +1,118 @@
+"""
+Tests for assistant model routing
+
+Feature: model-routing
+Validates: titles and short conversational follow-ups go to the fast
+model while medical questions stay on the large one, a model over its
+latency SLO or with an open circuit is routed around until its samples
+expire, a half-open model gets the trial call and recovers, routing can be turned off, and latency is reported per route
+"""
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from app.core.config import settings
+from app.services.model_router import FAST, LARGE, ModelRouter, ModelTier
+from app.utils.llm_gateway import GatewayChatModel, LLMGateway
+import asyncio
+
+
+class Clock:
+    now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_router(clock=None, fast=True, large_llm=None):
+    return ModelRouter(
+        ModelTier("large-model", large_llm or FakeListChatModel(responses=["a"]), 1000),
+        ModelTier("fast-model", FakeListChatModel(responses=["b"]), 300) if fast else None,
+        fast_tasks=["title"],
+        fast_message_max_tokens=settings.llm_fast_message_max_tokens,
+        fast_message_pattern=settings.llm_fast_message_pattern,
+        window_seconds=60,
+        min_samples=3,
+        clock=clock or Clock(),
+    )
+
+
+def test_cheap_tasks_go_to_the_fast_model():
+    """Titles and pleasantries go fast; medical questions and summaries do not"""
+    router = make_router()
+
+    assert router.route("title").tier == FAST
+    assert router.route("summary").tier == LARGE
+    for message in ["Thanks!", "ok, got it", "What do you mean?", "Explain that more simply please"]:
+        route = router.route("chat", message)
+        assert (route.tier, route.intent) == (FAST, "clarification"), message
+    for message in [
+        "What does an ALT of 120 mean?",
+        "no appetite and yellow skin",
+        "Can you explain hepatitis C treatment options?",
+        "thanks, and is 2 g of paracetamol a day safe?",
+    ]:
+        route = router.route("chat", message)
+        assert (route.tier, route.intent) == (LARGE, "medical"), message
+
+    unrouted = make_router(fast=False)
+    assert unrouted.route("title").model_name == "large-model"
+    assert unrouted.route("chat", "thanks").tier == LARGE
+
+
+def test_slow_model_is_routed_around_until_samples_expire():
+    """p95 over SLO sends traffic to the other model for the window"""
+    clock = Clock()
+    router = make_router(clock)
+
+    for _ in range(3):
+        router.record(router.route("chat", "Is my ALT high?"), 2.5)  # SLO is 1s
+    assert router.is_degraded(LARGE)
+
+    route = router.route("chat", "Is my ALT high?")
+    assert route.tier == FAST and route.fallback and route.model_name == "fast-model"
+    router.record(route, 0.2)
+
+    clock.now += 61
+    assert not router.is_degraded(LARGE)
+    assert router.route("chat", "Is my ALT high?").tier == LARGE
+
+    stats = router.stats()
+    assert stats["routes"]["chat:large"]["calls"] == 3
+    assert stats["routes"]["chat:large"]["latency_ms"]["p95"] == 2500.0
+    assert stats["routes"]["chat:fast"]["fallbacks"] == 1
+    assert stats["models"]["large"]["degraded"] is False
+
+
+def test_open_circuit_falls_back_to_the_other_model():
+    """A model whose gateway circuit is open is degraded immediately"""
+    gateway = LLMGateway("large-model", max_concurrency=1, failure_threshold=1)
+    router = make_router(
+        large_llm=GatewayChatModel(model=FakeListChatModel(responses=["a"]), gateway=gateway)
+    )
+    gateway.breaker.record_failure()
+
+    assert router.route("summary").tier == FAST
+    assert router.stats()["models"]["large"]["degraded"] is True
+
+
+def test_half_open_model_gets_the_trial_and_recovers():
+    """After the reset period medical questions go back to the large model"""
+    gateway = LLMGateway("large-model", max_concurrency=1, failure_threshold=1, reset_seconds=60)
+    router = make_router(
+        large_llm=GatewayChatModel(model=FakeListChatModel(responses=["a"]), gateway=gateway)
+    )
+    gateway.breaker.record_failure()
+    assert router.route("chat", "Is my ALT high?").tier == FAST
+
+    gateway.breaker.reset_seconds = 0  # reset period over: half open
+    route = router.route("chat", "Is my ALT high?")
+    assert (route.tier, route.fallback) == (LARGE, False)
+
+    # While a trial is under way other requests use the fast model
+    assert gateway.breaker.before_call() is True
+    assert router.route("chat", "Is my ALT high?").tier == FAST
+    gateway.breaker.release_trial()
+
+    # The routed trial succeeds; the circuit closes and the large model is back
+    asyncio.run(route.llm.ainvoke("Is my ALT high?"))
+    assert gateway.breaker.state == "closed"
+    assert router.route("chat", "Is my ALT high?").tier == LARGE
@@ -0,0 +1,265 @@
+"""
+Tests for keyset (cursor) pagination
+
+Feature: keyset-pagination
+Validates: cursor pages cover every row exactly once, stay stable while rows
+are inserted, and offset pagination keeps working
+"""
+
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.connection import Base, get_async_database_url
+from app.models import User, Chat, Message
+from app.models import disease, classifier, diagnosis  # noqa: F401 - notifications reference diagnoses
+from app.models.notification import Notification, NotificationType
+from app.services.chat_service import ChatService
+from app.services.notification_service import NotificationService
+from app.utils.pagination import decode_cursor, encode_cursor, paginate
+from contextlib import contextmanager
+import asyncio
+import pytest
+import tempfile
+import os
+
+
+@contextmanager
+def create_test_db():
+    """Create a temporary test database context manager"""
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    engine = create_engine(f"sqlite:///{db_path}")
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    try:
+        yield SessionLocal()
+    finally:
+        engine.dispose()
+        os.close(db_fd)
+        try:
+            os.unlink(db_path)
+        except PermissionError:
+            pass  # File may still be locked on Windows
+
+
+def seed_notifications(session, count):
+    """Create a user with notifications, several sharing the same created_at"""
+    user = User(email="patient@example.com", username="patient")
+    session.add(user)
+    session.flush()
+
+    base_time = datetime(2025, 1, 1)
+    for i in range(count):
+        session.add(
+            Notification(
+                user_id=user.id,
+                type=NotificationType.INFO,
+                title=f"Notification {i}",
+                message="Hello",
+                is_read=i % 3 == 0,
+                created_at=base_time + timedelta(minutes=i // 3),  # ties in threes
+            )
+        )
+    session.commit()
+    return user.id
+
+
+def collect_pages(fetch_page):
+    """Follow next_cursor until exhausted, returning every row seen"""
+    rows, cursor = [], None
+    while True:
+        page = fetch_page(cursor)
+        rows.extend(page)
+        if not page.next_cursor:
+            return rows
+        cursor = page.next_cursor
+
+
+def test_cursor_round_trip():
+    """Cursor tokens are opaque strings that decode to the original values"""
+    values = [True, datetime(2025, 1, 1, 12, 30), 42]
+    token = encode_cursor(values)
+    assert isinstance(token, str)
+    assert decode_cursor(token, 3) == values
+
+
+def test_invalid_cursor_is_rejected():
+    """Malformed or mismatched cursors raise a 400 error"""
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor", 2)
+    assert exc.value.status_code == 400
+
+    with pytest.raises(HTTPException):
+        decode_cursor(encode_cursor([1, 2, 3]), 2)
+
+
+def test_cursor_pages_match_offset_order():
+    """Walking all cursor pages returns every row once, in list order"""
+    with create_test_db() as session:
+        user_id = seed_notifications(session, 25)
+
+        everything = NotificationService.get_user_notifications(
+            session, user_id=user_id, limit=100
+        )
+        paged = collect_pages(
+            lambda cursor: NotificationService.get_user_notifications(
+                session, user_id=user_id, limit=4, cursor=cursor
+            )
+        )
+
+        assert [n.id for n in paged] == [n.id for n in everything]
+        assert len({n.id for n in paged}) == 25
+
+
+def test_cursor_pages_stable_under_inserts():
+    """Rows inserted at the head while paging don't shift later pages"""
+    with create_test_db() as session:
+        user_id = seed_notifications(session, 12)
+
+        first_page = NotificationService.get_user_notifications(
+            session, user_id=user_id, limit=5
+        )
+        session.add(
+            Notification(
+                user_id=user_id,
+                type=NotificationType.INFO,
+                title="Newest",
+                message="Inserted while paging",
+                created_at=datetime(2030, 1, 1),
+            )
+        )
+        session.commit()
+
+        rest = collect_pages(
+            lambda cursor: NotificationService.get_user_notifications(
+                session,
+                user_id=user_id,
+                limit=5,
+                cursor=cursor or first_page.next_cursor,
+            )
+        )
+
+        seen = [n.id for n in first_page] + [n.id for n in rest]
+        assert len(seen) == len(set(seen)) == 12
+
+
+def test_mixed_direction_keyset():
+    """Keysets mixing ascending and descending columns page correctly"""
+    with create_test_db() as session:
+        user_id = seed_notifications(session, 20)
+        keys = [
+            (Notification.is_read, False),
+            (Notification.created_at, True),
+            (Notification.id, False),
+        ]
+        query = session.query(Notification).filter(Notification.user_id == user_id)
+
+        everything = paginate(query, keys, limit=100)
+        paged = collect_pages(lambda cursor: paginate(query, keys, limit=3, cursor=cursor))
+
+        assert [n.id for n in paged] == [n.id for n in everything]
+
+
+def test_chat_list_cursor_pinned_first():
+    """Chat pages keep pinned chats first and cover every chat once"""
+    with create_test_db() as session:
+        user = User(email="patient@example.com", username="patient")
+        session.add(user)
+        session.flush()
+        for i in range(9):
+            session.add(
+                Chat(
+                    user_id=user.id,
+                    title=f"Chat {i}",
+                    is_pinned=i in (2, 7),
+                    last_message_at=datetime(2025, 1, 1) + timedelta(hours=i % 4),
+                )
+            )
+        session.commit()
+        user_id = user.id
+        db_url = session.get_bind().url
+
+        async def collect_chats():
+            engine = create_async_engine(get_async_database_url(str(db_url)))
+            try:
+                async with AsyncSession(engine, expire_on_commit=False) as db:
+                    rows, cursor = [], None
+                    while True:
+                        page = await ChatService.get_user_chats(
+                            db, user_id, limit=2, cursor=cursor
+                        )
+                        rows.extend(page)
+                        if not page.next_cursor:
+                            return rows
+                        cursor = page.next_cursor
+            finally:
+                await engine.dispose()
+
+        paged = asyncio.run(collect_chats())
+
+    assert len({c.id for c in paged}) == 9
+    assert [c.is_pinned for c in paged[:2]] == [True, True]
+    assert not any(c.is_pinned for c in paged[2:])
+
+
+def test_message_history_cursor_skips_internal():
+    """Older-message pages cover every visible message once, newest first"""
+    with create_test_db() as session:
+        user = User(email="patient@example.com", username="patient")
+        session.add(user)
+        session.flush()
+        chat = Chat(user_id=user.id, title="Chat")
+        session.add(chat)
+        session.flush()
+        for i in range(10):
+            session.add(
+                Message(
+                    chat_id=chat.id,
+                    content=f"Message {i}",
+                    role="user",
+                    is_internal=i % 4 == 0,
+                    created_at=datetime(2025, 1, 1) + timedelta(minutes=i // 2),
+                )
+            )
+        session.commit()
+        chat_id = chat.id
+        db_url = session.get_bind().url
+
+        async def collect_messages():
+            engine = create_async_engine(get_async_database_url(str(db_url)))
+            try:
+                async with AsyncSession(engine, expire_on_commit=False) as db:
+                    rows, cursor = [], None
+                    while True:
+                        page = await ChatService.get_messages(
+                            db, chat_id, limit=3, cursor=cursor, include_internal=False
+                        )
+                        assert len(page) <= 3
+                        rows.extend(page)
+                        if not page.next_cursor:
+                            return rows
+                        cursor = page.next_cursor
+            finally:
+                await engine.dispose()
+
+        paged = asyncio.run(collect_messages())
+
+    assert [m.content for m in paged] == [
+        f"Message {i}" for i in reversed(range(10)) if i % 4
+    ]
+
+
+def test_offset_pagination_still_supported():
+    """skip/limit without a cursor behaves like before"""
+    with create_test_db() as session:
+        user_id = seed_notifications(session, 10)
+
+        everything = NotificationService.get_user_notifications(session, user_id=user_id)
+        second_page = NotificationService.get_user_notifications(
+            session, user_id=user_id, skip=4, limit=4
+        )
+
+        assert [n.id for n in second_page] == [n.id for n in everything[4:8]]
+        assert second_page.next_cursor is not None
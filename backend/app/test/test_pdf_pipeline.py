@@ -0,0 +1,124 @@
+"""
+Tests for the large-PDF pipeline
+
+Feature: pdf-map-reduce
+Validates: pages are extracted in parallel but kept in order from one
+temporary copy of an in-memory PDF, which is removed afterwards, long
+documents are summarized in token-bounded chunks under the concurrency
+limit and merged into one analysis, and page caps bound the work
+"""
+
+from app.core.config import settings
+import asyncio
+import os
+
+from app.services import file_processor
+from app.services.file_processor import FileProcessor
+from app.utils.ai_helpers import estimate_tokens
+
+
+def make_pdf(page_texts):
+    """A minimal PDF with one line of Helvetica text per page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None]
+    font_id = 3 + 2 * len(page_texts)
+    kids = []
+    for i, text in enumerate(page_texts):
+        page_id, content_id = 3 + 2 * i, 4 + 2 * i
+        kids.append(f"{page_id} 0 R")
+        stream = f"BT /F1 10 Tf 20 700 Td ({text}) Tj ET".encode()
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return pdf
+
+
+class RecordingLLM:
+    """Answers every prompt, recording prompts and peak concurrency"""
+
+    def __init__(self):
+        self.prompts = []
+        self.active = self.peak = 0
+
+    async def ainvoke(self, messages):
+        self.prompts.append(messages[0].content)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return type("Response", (), {"content": f"Summary {len(self.prompts)}"})()
+
+
+def lab_page(number):
+    return f"Page {number} ALT 120 U/L AST 95 U/L " + "hepatic panel result " * 40
+
+
+def test_long_pdf_is_summarized_in_chunks(monkeypatch):
+    """Chunks stay under the budget, run under the limit and merge once"""
+    llm = RecordingLLM()
+    monkeypatch.setattr(file_processor, "get_text_llm", lambda: llm)
+    monkeypatch.setattr(settings, "pdf_chunk_tokens", 400)
+    monkeypatch.setattr(settings, "pdf_pages_per_task", 3)
+    monkeypatch.setattr(settings, "pdf_summary_concurrency", 2)
+    write_temp_pdf, written = file_processor._write_temp_pdf, []
+
+    def record_write(content):
+        written.append(write_temp_pdf(content))
+        return written[-1]
+
+    monkeypatch.setattr(file_processor, "_write_temp_pdf", record_write)
+
+    try:
+        result = asyncio.run(FileProcessor.process_pdf(make_pdf([lab_page(i) for i in range(1, 13)])))
+    finally:
+        file_processor._reset_pdf_workers()
+
+    assert result["processing_status"] == "completed", result
+    metadata = result["metadata"]
+    assert metadata["num_pages"] == metadata["pages_analyzed"] == 12
+    assert metadata["chunks"] > 1 and not metadata["truncated"]
+
+    # Pages come back in order despite parallel extraction
+    text = result["extracted_text"]
+    positions = [text.index(f"--- Page {i} ---") for i in range(1, 13)]
+    assert positions == sorted(positions)
+    assert len(written) == 1 and not os.path.exists(written[0])
+
+    # One summary per chunk, then one merged analysis over the summaries
+    chunk_prompts, final_prompt = llm.prompts[:-1], llm.prompts[-1]
+    assert len(chunk_prompts) == metadata["chunks"]
+    assert all(estimate_tokens(p[1]["text"]) <= 400 for p in chunk_prompts)
+    assert "--- Part 1 ---" in final_prompt[1]["text"]
+    assert llm.peak <= 2
+    assert result["content"] == f"Summary {len(llm.prompts)}"
+
+
+def test_page_cap_bounds_short_analysis(monkeypatch):
+    """Pages past the cap are skipped; text that fits is analyzed directly"""
+    llm = RecordingLLM()
+    monkeypatch.setattr(file_processor, "get_text_llm", lambda: llm)
+    monkeypatch.setattr(settings, "pdf_max_pages", 2)
+    monkeypatch.setattr(settings, "pdf_worker_processes", 0)
+
+    result = asyncio.run(FileProcessor.process_pdf(make_pdf(["Hemoglobin 13.5", "Platelets 250", "Page three"])))
+
+    metadata = result["metadata"]
+    assert metadata["pages_analyzed"] == 2 and metadata["truncated"]
+    assert "Page three" not in result["extracted_text"]
+    assert len(llm.prompts) == 1
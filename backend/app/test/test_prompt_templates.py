@@ -0,0 +1,65 @@
+"""
+Tests for the precompiled assistant prompts
+
+Feature: prompt-templates
+Validates: user messages and history containing braces reach the model
+verbatim instead of being parsed as template variables, history is sent
+as role-typed messages after the system prompt, and chains are built once
+per prompt and model
+"""
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+import asyncio
+
+
+class RecordingLLM(FakeListChatModel):
+    """Keeps the messages of every call"""
+
+    calls: list = []
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls.append(messages)
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+
+def test_braces_reach_the_model_verbatim(make_ai_service):
+    """JSON-like text in the message and history is not a template variable"""
+    llm = RecordingLLM(responses=["ALT is mildly raised."], calls=[])
+    service = make_ai_service(llm)
+    history = [
+        {"role": "system", "content": "Summary: patient shared {labs}"},
+        {"role": "user", "content": 'My report: {"ALT": 90, "AST": 40}'},
+        {"role": "assistant", "content": "Thanks, noted {ALT: 90}."},
+    ]
+    message = "What does {ALT} > 56 mean?"
+
+    result = asyncio.run(service.process_text_message(message, history))
+
+    assert result["processing_status"] == "completed"
+    sent = llm.calls[0]
+    assert [m.type for m in sent] == ["system", "system", "human", "ai", "human"]
+    assert sent[0].content == service._get_system_prompt()
+    assert [m.content for m in sent[1:]] == [h["content"] for h in history] + [message]
+
+
+def test_title_with_braces(make_ai_service):
+    """Title generation no longer fails on braces in the first message"""
+    llm = RecordingLLM(responses=["Liver Panel Questions"], calls=[])
+    service = make_ai_service(llm)
+
+    title = asyncio.run(service.generate_chat_title('Is {"ALT": 90} high?'))
+
+    assert title == "Liver Panel Questions"
+    assert llm.calls[0][-1].content == 'First message: Is {"ALT": 90} high?'
+
+
+def test_chains_are_built_once_per_model(make_ai_service):
+    """The same chain is reused; a different model gets its own"""
+    service = make_ai_service(FakeListChatModel(responses=["ok"]))
+    large = service.router.tiers["large"].llm
+    other = FakeListChatModel(responses=["ok"])
+
+    first = service._get_chain(service.chat_prompt, large)
+    assert service._get_chain(service.chat_prompt, large) is first
+    assert service._get_chain(service.chat_prompt, other) is not first
+    assert service._get_chain(service.chat_prompt, large, max_tokens=100) is not first
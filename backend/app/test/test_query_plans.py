@@ -0,0 +1,92 @@
+"""
+Tests for the migration pipeline and hot-query indexes
+
+Feature: schema-migrations
+Validates: fresh and tracked databases reach the head revision, the
+hot-path index migration upgrades and downgrades cleanly, and every hot
+query is answered from its index without a sort
+"""
+
+from alembic import command
+from sqlalchemy import create_engine, inspect
+from app.db.connection import Base
+from app.db.migrate import get_alembic_config, get_current_revision, upgrade_database
+from app.db.query_plans import check_query_plans
+from contextlib import contextmanager
+import tempfile
+import os
+
+
+HOT_PATH_INDEXES = {
+    "diagnoses": {"ix_diagnoses_user_id_created_at"},
+    "notifications": {
+        "ix_notifications_user_id_created_at",
+        "ix_notifications_user_id_unread",
+    },
+    "messages": {"ix_messages_chat_id_created_at"},
+    "chats": {"ix_chats_user_id_active_order"},
+}
+
+
+@contextmanager
+def create_test_engine():
+    """Create a temporary, empty test database engine"""
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    engine = create_engine(f"sqlite:///{db_path}")
+
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+        os.close(db_fd)
+        try:
+            os.unlink(db_path)
+        except PermissionError:
+            pass  # File may still be locked on Windows
+
+
+def index_names(engine, table):
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def test_fresh_database_is_created_at_head():
+    """An empty database gets the full schema, stamped at the head revision"""
+    with create_test_engine() as engine:
+        upgrade_database(engine)
+
+        with engine.connect() as connection:
+            assert get_current_revision(connection) == "add_message_first_token_time"
+        for table, indexes in HOT_PATH_INDEXES.items():
+            assert indexes <= index_names(engine, table)
+
+        # Running again on an up-to-date database is a no-op
+        upgrade_database(engine)
+
+
+def test_hot_path_index_migration_round_trip():
+    """The index revision upgrades and downgrades a tracked database"""
+    with create_test_engine() as engine:
+        upgrade_database(engine)
+
+        with engine.begin() as connection:
+            command.downgrade(get_alembic_config(connection), "add_classifier_profile")
+        assert not HOT_PATH_INDEXES["chats"] & index_names(engine, "chats")
+        assert "ix_notifications_user_id" in index_names(engine, "notifications")
+
+        upgrade_database(engine)
+        for table, indexes in HOT_PATH_INDEXES.items():
+            assert indexes <= index_names(engine, table)
+        assert "ix_notifications_user_id" not in index_names(engine, "notifications")
+
+
+def test_hot_queries_use_their_indexes():
+    """EXPLAIN shows each hot query reading its index without a sort"""
+    with create_test_engine() as engine:
+        Base.metadata.create_all(bind=engine)
+
+        results = check_query_plans(engine)
+
+        assert len(results) == 5
+        for result in results:
+            assert result.uses_index, f"{result.name}: {result.plan}"
+            assert not result.sorts, f"{result.name}: {result.plan}"
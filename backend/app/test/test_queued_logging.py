@@ -0,0 +1,96 @@
+"""
+Tests for queued logging
+
+Feature: queued-logging
+Validates: logging from a request returns without waiting on the log
+file, which the listener thread writes with the feature's records; the
+log writer process receives records from several workers and writes
+each to its feature's file inside the log directory
+"""
+
+from logging.handlers import QueueListener
+import logging
+import queue
+import threading
+import time
+
+from app.core.log_writer import LogWriterServer
+from app.core.logging import LogWriter, _FeatureQueueHandler, _LogWriterSocketHandler
+
+
+class SlowLogWriter(LogWriter):
+    """Every write takes 50 ms"""
+
+    def emit(self, record):
+        time.sleep(0.05)
+        super().emit(record)
+
+
+def make_logger(name, handler):
+    logger = logging.getLogger(f"test.queued.{name}")
+    logger.handlers.clear()
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def test_logging_does_not_wait_for_the_disk(tmp_path):
+    """Ten slow writes cost the caller far less than one of them"""
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, SlowLogWriter(tmp_path))
+    listener.start()
+    logger = make_logger("auth", _FeatureQueueHandler(log_queue, "auth"))
+
+    started = time.perf_counter()
+    for n in range(10):
+        logger.info("✅ Login | User: user%d@example.com", n)
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logger.exception("❌ Login failed")
+    elapsed = time.perf_counter() - started
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+    assert elapsed < 0.05
+    lines = (tmp_path / "auth.log").read_text(encoding="utf-8").splitlines()
+    assert "auth - INFO - ✅ Login | User: user0@example.com" in lines[0]
+    assert "ZeroDivisionError: division by zero" in lines[-1]
+
+
+def test_log_writer_process_owns_the_files(tmp_path):
+    """Records from two workers land in one file per feature, never outside the directory"""
+    writer = LogWriter(tmp_path / "logs")
+    server = LogWriterServer("127.0.0.1", 0, writer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    for worker in (1, 2):
+        sender = _LogWriterSocketHandler("127.0.0.1", port)
+        for log_file in ("users", "../escaped"):
+            record = logging.makeLogRecord(
+                {"name": log_file, "msg": "Profile_Update from worker %d", "args": (worker,),
+                 "levelname": "INFO", "levelno": logging.INFO, "log_file": log_file}
+            )
+            sender.handle(record)
+        sender.close()
+
+    deadline = time.monotonic() + 5
+    users_log = tmp_path / "logs" / "users.log"
+    while time.monotonic() < deadline:
+        if users_log.exists() and users_log.read_text(encoding="utf-8").count("\n") == 2:
+            break
+        time.sleep(0.02)
+    server.shutdown()
+    server.server_close()
+    writer.close()
+
+    lines = users_log.read_text(encoding="utf-8").splitlines()
+    assert [line.split(" - ")[-1] for line in lines] == [
+        "Profile_Update from worker 1",
+        "Profile_Update from worker 2",
+    ]
+    assert (tmp_path / "logs" / "escaped.log").exists()
+    assert not (tmp_path / "escaped.log").exists()
@@ -0,0 +1,79 @@
+"""
+Tests for the assistant response cache
+
+Feature: response-cache
+Validates: repeated questions are answered from the cache after
+normalization, entries expire and are evicted least recently used first,
+near-duplicates only match with the same numbers, and hits report the
+tokens they saved
+"""
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from app.services.response_cache import ResponseCache
+from app.utils.cache import TTLCache
+import asyncio
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expiry_and_lru_eviction():
+    """Entries expire after the TTL; the least recently used is evicted first"""
+    clock = FakeClock()
+    cache = TTLCache(max_entries=2, ttl_seconds=60, clock=clock)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    clock.now = 61
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats()["evictions"] == 1
+
+
+def test_near_duplicates_require_same_numbers():
+    """Reworded questions match; different lab values never do"""
+    cache = ResponseCache(100, 3600, near_duplicates=True, similarity_threshold=0.6)
+    cache.store("What does an ALT of 120 mean for my liver?", "scope", "High ALT", 50)
+
+    assert cache.lookup("what does an ALT of 120 mean for my liver", "scope") == "High ALT"
+    assert cache.lookup("What does ALT of 120 mean for my liver?", "scope") == "High ALT"
+    assert cache.lookup("What does an ALT of 20 mean for my liver?", "scope") is None
+    assert cache.lookup("What does an ALT of 120 mean for my liver?", "other") is None
+
+    stats = cache.stats()
+    assert stats["exact_hits"] == 1
+    assert stats["near_duplicate_hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["tokens_saved"] == 100
+
+
+def test_repeated_question_skips_llm(make_ai_service):
+    """A stateless question asked twice calls the model once"""
+    service = make_ai_service()
+    service.router.tiers["large"].llm = FakeListChatModel(responses=["Drink water and rest."])
+
+    async def ask_twice():
+        first = await service.process_text_message("How do I treat a mild fever?")
+        second = await service.process_text_message("how do I treat a mild fever")
+        streamed = [c async for c in service.stream_text_message("How do I treat a mild fever?")]
+        # Questions asked within a conversation are not cached by default
+        in_chat = service._cache_scope([{"role": "user", "content": "Hi"}])
+        return first, second, streamed, in_chat
+
+    first, second, streamed, in_chat = asyncio.run(ask_twice())
+
+    assert not first["cache_hit"] and second["cache_hit"]
+    assert second["content"] == first["content"] == "Drink water and rest."
+    assert streamed == ["Drink water and rest."]
+    assert in_chat is None
+    assert service.get_cache_stats()["responses"]["hits"] == 2
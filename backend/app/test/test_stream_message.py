@@ -0,0 +1,190 @@
+"""
+Tests for the streamed send-message endpoint
+
+Feature: streaming-responses
+Validates: POST /aiassistant/chats/{id}/messages/stream saves the
+assistant reply as completed, partial (text received before a failure),
+error (nothing received) or cancelled (client disconnected mid-stream),
+with its time to first token; the endpoint's timing is logged once the
+stream ends, not when the response object is returned
+"""
+
+from fastapi import FastAPI
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app.core.config import settings
+from app.db.connection import Base, get_async_database_url, get_async_db
+from app.models import User, Message
+from app.models import disease, classifier, diagnosis  # noqa: F401 - registers all tables
+from app.routers import aiassistant
+from app.routers.auth import get_current_user
+from app.services.chat_service import ChatService
+from app.utils.llm_backends import FakeChatModel
+import asyncio
+import json
+import logging
+import os
+import tempfile
+
+QUESTION = "What does a high ALT level mean for my liver?"
+
+
+class TimingCapture(logging.Handler):
+    """Keeps the aiassistant logger's stream_message timing lines"""
+
+    def __init__(self):
+        super().__init__()
+        self.timings = []
+
+    def emit(self, record):
+        fields = getattr(record, "fields", {})
+        if fields.get("action") == "stream_message" and "duration_ms" in fields:
+            self.timings.append(fields)
+
+
+def fake_model(**options):
+    defaults = dict(latency_ms=1, latency_sigma=0, tokens_per_second=10_000, reply_tokens=20)
+    return FakeChatModel(**{**defaults, **options})
+
+
+def make_app(engine, user):
+    app = FastAPI()
+    app.include_router(aiassistant.router)
+
+    async def test_db():
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = test_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    return app
+
+
+async def post_stream(app, chat_id, disconnect_after_first_token=False):
+    """Drive the endpoint over ASGI, optionally leaving after the first token"""
+    body = json.dumps({"content": QUESTION, "message_type": "text"}).encode()
+    left = asyncio.Event()
+    events = []
+    sent_body = False
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await left.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] != "http.response.body":
+            return
+        for block in message.get("body", b"").decode().split("\n\n"):
+            if block.startswith("event: "):
+                name, data = block.split("\n", 1)
+                events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+                if name == "event: token" and disconnect_after_first_token:
+                    left.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": f"/aiassistant/chats/{chat_id}/messages/stream",
+        "raw_path": f"/aiassistant/chats/{chat_id}/messages/stream".encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    await app(scope, receive, send)
+    return events
+
+
+def test_stream_endpoint_saves_each_outcome(monkeypatch, make_ai_service):
+    """Completed, partial, error and cancelled replies are saved with their timings"""
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+    # A late title is saved through the app's own database; not covered here
+    monkeypatch.setattr(aiassistant, "_start_title_generation", lambda *args: None)
+
+    cases = {
+        "completed": (fake_model(), False),
+        "partial": (FakeListChatModel(responses=["Partial answer"], error_on_chunk_number=5), False),
+        "error": (FakeListChatModel(responses=["Never sent"], error_on_chunk_number=0), False),
+        "cancelled": (fake_model(tokens_per_second=20, reply_tokens=60), True),
+    }
+
+    db_fd, db_path = tempfile.mkstemp(suffix=".db")
+    sync_engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+
+    async def run():
+        engine = create_async_engine(get_async_database_url(f"sqlite:///{db_path}"))
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                user = User(email="patient@example.com", username="patient")
+                db.add(user)
+                await db.commit()
+
+            app = make_app(engine, user)
+            results = {}
+            for outcome, (llm, disconnect) in cases.items():
+                service = make_ai_service()
+                service.router.tiers["large"].llm = llm
+                monkeypatch.setattr(aiassistant, "_ai_service", lambda: service)
+
+                async with AsyncSession(engine, expire_on_commit=False) as db:
+                    chat = await ChatService.create_chat(db, user.id, "New Chat")
+
+                events = await post_stream(app, chat.id, disconnect)
+                async with AsyncSession(engine) as db:
+                    reply = await db.scalar(
+                        select(Message).filter(
+                            Message.chat_id == chat.id, Message.role == "assistant"
+                        )
+                    )
+                results[outcome] = (events, reply)
+            return results
+        finally:
+            await engine.dispose()
+
+    capture = TimingCapture()
+    logging.getLogger("aiassistant").addHandler(capture)
+    try:
+        results = asyncio.run(run())
+    finally:
+        logging.getLogger("aiassistant").removeHandler(capture)
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    events, reply = results["completed"]
+    assert [name for name, _ in events][:2] == ["user_message", "token"]
+    assert events[-1][0] == "done"
+    streamed = "".join(data["content"] for name, data in events if name == "token")
+    assert reply.processing_status == "completed" and reply.content == streamed
+    assert reply.first_token_time is not None
+    assert reply.first_token_time <= reply.processing_time
+    assert events[-1][1]["assistant_message"]["first_token_time"] == reply.first_token_time
+
+    events, reply = results["partial"]
+    assert "error" in [name for name, _ in events]
+    assert (reply.processing_status, reply.content) == ("partial", "Parti")
+    assert reply.first_token_time is not None and reply.error_message is not None
+
+    events, reply = results["error"]
+    assert (reply.processing_status, reply.content) == ("error", "")
+    assert reply.first_token_time is None and reply.error_message is not None
+
+    events, reply = results["cancelled"]
+    assert events[-1][0] == "token"
+    assert reply.processing_status == "cancelled"
+    assert reply.content and reply.first_token_time is not None
+
+    # Timed once per stream, after it ended
+    assert [t["success"] for t in capture.timings] == [True, False, False, False]
+    cancelled_timing = capture.timings[-1]["duration_ms"] / 1000
+    assert cancelled_timing >= reply.first_token_time
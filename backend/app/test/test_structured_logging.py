@@ -0,0 +1,170 @@
+"""
+Tests for structured logs and request-id correlation
+
+Feature: structured-logging
+Validates: each request gets a request id (a well-formed incoming
+X-Request-ID is kept) that is returned in the response and carried by its
+API and activity log lines; a diagnosis processed on another thread logs
+its processing, email and notification lines under the id of the request
+that created it; JSON lines are flat objects with the structured fields,
+which never replace the line's own keys
+"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+
+from app.core.logging import JsonFormatter, _FeatureQueueHandler, log_endpoint_activity
+from app.db.connection import Base
+from app.middleware.logging import REQUEST_ID_HEADER, LoggingMiddleware
+from app.models import User  # noqa: F401 - registers User/Chat/Message mappers
+from app.models.classifier import Classifier, ModalityType
+from app.models.diagnosis import Diagnosis, DiagnosisStatus
+from app.models.disease import Disease
+from app.services.diagnosis_service import DiagnosisService
+
+
+class JsonCapture(logging.Handler):
+    """Prepares records as the queue handler does and keeps their JSON lines"""
+
+    def __init__(self, *logger_names):
+        super().__init__()
+        self.lines = []
+        self.loggers = [logging.getLogger(name) for name in logger_names]
+        self.preparer = _FeatureQueueHandler(queue.SimpleQueue(), "test")
+        self.formatter = JsonFormatter()
+
+    def emit(self, record):
+        self.lines.append(json.loads(self.formatter.format(self.preparer.prepare(record))))
+
+    def __enter__(self):
+        for logger in self.loggers:
+            logger.addHandler(self)
+        return self
+
+    def __exit__(self, *exc):
+        for logger in self.loggers:
+            logger.removeHandler(self)
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(LoggingMiddleware)
+
+    @app.get("/diagnoses/{diagnosis_id}")
+    def read_diagnosis(diagnosis_id: int):
+        log_endpoint_activity("diagnosis", "view", additional_info={"diagnosis_id": diagnosis_id})
+        return {"id": diagnosis_id}
+
+    return app
+
+
+def test_request_id_is_returned_and_logged():
+    """API and activity lines share the request's id, which the client receives"""
+    client = TestClient(make_app())
+
+    with JsonCapture("api", "diagnosis") as capture:
+        response = client.get("/diagnoses/7")
+        kept = client.get("/diagnoses/8", headers={REQUEST_ID_HEADER: "edge-4f2a.1"})
+        replaced = client.get("/diagnoses/9", headers={REQUEST_ID_HEADER: "x" * 100})
+
+    request_id = response.headers[REQUEST_ID_HEADER]
+    assert len(request_id) == 32
+    assert kept.headers[REQUEST_ID_HEADER] == "edge-4f2a.1"
+    assert replaced.headers[REQUEST_ID_HEADER] != "x" * 100
+
+    activity, api = [line for line in capture.lines if line["request_id"] == request_id]
+    assert activity["logger"] == "diagnosis"
+    assert (activity["action"], activity["diagnosis_id"], activity["success"]) == ("view", 7, True)
+    assert api["logger"] == "api"
+    assert (api["method"], api["path"], api["status"]) == ("GET", "/diagnoses/7", 200)
+    assert isinstance(api["duration_ms"], float) and isinstance(api["ts"], float)
+    assert [line["request_id"] for line in capture.lines].count("edge-4f2a.1") == 2
+
+
+def test_background_diagnosis_logs_carry_the_request_id():
+    """Processing, email and notification logs are traced to the creating request"""
+    db_fd, db_path = tempfile.mkstemp(suffix=".db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        user = User(email="patient@example.com", username="patient")
+        disease = Disease(name="Hepatitis C", available_modalities=["Tabular"], storage_path="hcv")
+        session.add_all([user, disease])
+        session.flush()
+        classifier = Classifier(
+            name="HCV", disease_id=disease.id, modality=ModalityType.TABULAR, model_path="missing"
+        )
+        session.add(classifier)
+        session.flush()
+        diagnosis = Diagnosis(
+            user_id=user.id,
+            disease_id=disease.id,
+            classifier_id=classifier.id,
+            modality="Tabular",
+            input_data={"ALT": 90},
+            status=DiagnosisStatus.PENDING,
+        )
+        session.add(diagnosis)
+        session.commit()
+        diagnosis_id = diagnosis.id
+
+        # A plain thread does not inherit the request's context
+        with JsonCapture("app", "email") as capture:
+            worker = threading.Thread(
+                target=DiagnosisService.process_diagnosis, args=(session, diagnosis_id, "req-42")
+            )
+            worker.start()
+            worker.join()
+    finally:
+        session.close()
+        engine.dispose()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    assert {line["request_id"] for line in capture.lines} == {"req-42"}
+    by_logger = {}
+    for line in capture.lines:
+        by_logger.setdefault(line["logger"], []).append(line)
+
+    processing = by_logger["app.services.diagnosis_service"]
+    assert processing[0]["stage"] == "started"
+    failed = [line for line in processing if line.get("stage") == "failed"]
+    assert failed and failed[0]["diagnosis_id"] == diagnosis_id
+    assert any(line.get("to") == "patient@example.com" for line in by_logger["email"])
+    notification = by_logger["app.services.notification_service"][0]
+    assert (notification["diagnosis_id"], notification["type"]) == (diagnosis_id, "diagnosis_failed")
+
+
+def test_fields_cannot_overwrite_reserved_keys():
+    """Colliding caller keys are kept under a field_ prefix"""
+    logger = logging.getLogger("collisions")
+    logger.propagate = False
+    with JsonCapture("collisions") as capture:
+        logger.info(
+            "Real message",
+            extra={"fields": {"msg": "forged", "request_id": "forged", "level": "DEBUG", "exc": "x"}},
+        )
+        log_endpoint_activity(
+            "collisions",
+            "view",
+            "patient@example.com",
+            additional_info={"action": "delete", "success": False, "ts": 0, "chat_id": 3},
+        )
+
+    direct, activity = capture.lines
+    assert (direct["msg"], direct["level"], direct["request_id"]) == ("Real message", "INFO", None)
+    assert "exc" not in direct
+    assert (direct["field_msg"], direct["field_request_id"], direct["field_exc"]) == ("forged", "forged", "x")
+
+    assert (activity["action"], activity["success"], activity["chat_id"]) == ("view", True, 3)
+    assert (activity["field_action"], activity["field_success"]) == ("delete", False)
+    assert activity["field_ts"] == 0 and activity["ts"] > 0
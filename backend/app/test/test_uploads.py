@@ -0,0 +1,108 @@
+"""
+Tests for size-capped upload ingestion
+
+Feature: upload-ingestion
+Validates: uploads are read in chunks and hashed on the fly, small ones
+stay in memory as a view while large ones are spooled to a temporary file
+that is removed afterwards, and an oversized upload is rejected with 413
+without being read to the end
+"""
+
+from fastapi import HTTPException, UploadFile
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from starlette.datastructures import Headers
+from app.core.config import settings
+from app.utils import uploads
+from app.utils.uploads import ingest_upload, ingest_upload_async
+from PIL import Image
+import asyncio
+import hashlib
+import io
+import os
+import pytest
+
+from app.services import file_processor
+from app.services.file_processor import FileProcessor
+
+
+class CountingReader(io.BytesIO):
+    """Records how many bytes were read"""
+
+    bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def make_upload(data, content_type="application/octet-stream", filename="upload.bin"):
+    return UploadFile(
+        file=CountingReader(data),
+        filename=filename,
+        headers=Headers({"content-type": content_type}),
+    )
+
+
+def test_small_upload_stays_in_memory():
+    """Below the spool threshold the content is a zero-copy view"""
+    data = b"lab values " * 100
+    with ingest_upload(make_upload(data), max_bytes=10_000, spool_bytes=4096) as upload:
+        assert isinstance(upload.content, memoryview)
+        assert upload.content == data and upload.path is None
+        assert upload.size == len(data)
+        assert upload.sha256 == hashlib.sha256(data).hexdigest()
+
+
+def test_large_upload_is_spooled_and_removed():
+    """Above the threshold the content is a temp file path, deleted on close"""
+    data = os.urandom(200_000)
+    with ingest_upload(make_upload(data), max_bytes=1_000_000, spool_bytes=50_000) as upload:
+        path = upload.content
+        assert isinstance(path, str) and os.path.getsize(path) == len(data)
+        with upload.open() as f:
+            assert f.read() == data
+        assert upload.sha256 == hashlib.sha256(data).hexdigest()
+    assert not os.path.exists(path)
+
+
+def test_oversized_upload_stops_early(monkeypatch):
+    """Reading stops one chunk past the cap and nothing is left on disk"""
+    monkeypatch.setattr(settings, "upload_chunk_bytes", 1024)
+    spooled = []
+    original = uploads.tempfile.NamedTemporaryFile
+
+    def recording_named_temporary_file(*args, **kwargs):
+        spool = original(*args, **kwargs)
+        spooled.append(spool.name)
+        return spool
+
+    monkeypatch.setattr(uploads.tempfile, "NamedTemporaryFile", recording_named_temporary_file)
+    upload_file = make_upload(os.urandom(100_000))
+
+    with pytest.raises(HTTPException) as error:
+        ingest_upload(upload_file, max_bytes=8 * 1024, spool_bytes=4 * 1024)
+
+    assert error.value.status_code == 413
+    assert upload_file.file.bytes_read <= 9 * 1024
+    assert spooled and not any(os.path.exists(path) for path in spooled)
+
+
+def test_spooled_image_is_processed_from_its_path(monkeypatch):
+    """Downstream processing reads a spooled upload by path, reusing its hash"""
+    monkeypatch.setattr(file_processor, "get_vision_llm", lambda: FakeListChatModel(responses=["X-ray"]))
+    file_processor.analysis_cache.clear()
+    buffer = io.BytesIO()
+    Image.effect_noise((300, 300), 50).save(buffer, format="PNG")
+
+    async def run():
+        upload_file = make_upload(buffer.getvalue(), "image/png", "xray.png")
+        with await ingest_upload_async(upload_file, settings.max_file_size, spool_bytes=1024) as upload:
+            assert upload.path
+            return upload.sha256, await FileProcessor.process_upload(upload)
+
+    sha256, result = asyncio.run(run())
+
+    assert result["processing_status"] == "completed"
+    assert result["metadata"]["content_hash"] == sha256
+    assert result["metadata"]["file_size"] == len(buffer.getvalue())
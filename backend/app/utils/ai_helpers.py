@@ -1,18 +1,23 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from app.models.chat import Chat
 from app.models.user import User
 from app.core.logging import app_logger
+from functools import lru_cache
 from typing import Optional
 import re
 
 
-def validate_chat_access(user_id: int, chat_id: int, db: Session) -> Chat:
+async def validate_chat_access(user_id: int, chat_id: int, db: AsyncSession) -> Chat:
     """Validate that user has access to the specified chat."""
-    chat = db.query(Chat).filter(
-        Chat.id == chat_id,
-        Chat.user_id == user_id
-    ).first()
+    result = await db.execute(
+        select(Chat).filter(
+            Chat.id == chat_id,
+            Chat.user_id == user_id
+        )
+    )
+    chat = result.scalars().first()
     
     if not chat:
         app_logger.warning(f"Unauthorized chat access attempt: user {user_id}, chat {chat_id}")
@@ -168,10 +173,42 @@ def format_chat_title(title: str) -> str:
     return title if title else "New Chat"
 
 
+# Word and symbol pieces, roughly how BPE tokenizers split text
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+# Loaded on the first count rather than at import, since fetching the
+# encoding file can hit the network on a cold start
+@lru_cache(maxsize=None)
+def _get_token_encoding():
+    """Return the tiktoken encoding, or None to use the approximation."""
+    try:
+        import tiktoken
+    except ImportError:  # Optional - estimate_tokens falls back to an approximation
+        return None
+    try:
+        # The Llama 3 tokenizer extends cl100k_base, so counts track closely
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:  # Encoding files unavailable (e.g. offline)
+        app_logger.warning(f"⚠️ tiktoken unavailable, approximating tokens: {e}")
+        return None
+
+
 def estimate_tokens(text: str) -> int:
-    """Rough estimation of token count for text."""
-    # Simple approximation: ~4 characters per token
-    return len(text) // 4
+    """
+    Count the tokens in text for budgeting LLM context.
+
+    Uses tiktoken when installed, otherwise approximates: one token per
+    symbol and per four characters of each word.
+    """
+    if not text:
+        return 0
+    encoding = _get_token_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(
+        max(1, (len(piece) + 3) // 4) for piece in _TOKEN_PIECES.findall(text)
+    )
 
 
 def should_regenerate_title(current_title: str, message_count: int) -> bool:
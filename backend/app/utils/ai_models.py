@@ -1,17 +1,103 @@
-from langchain_groq import ChatGroq
+from functools import lru_cache
+from langchain_core.language_models.chat_models import BaseChatModel
 from app.core.config import settings
+from app.utils.llm_backends import FakeChatModel, RecordReplayChatModel
+from app.utils.llm_gateway import GatewayChatModel, LLMGateway
 
-# Initialize Groq LLMs for text and vision
-text_llm = ChatGroq(
-    api_key=settings.groq_api_key,
-    model_name=settings.groq_model,
-    temperature=settings.groq_temperature,
-    max_tokens=settings.max_tokens
-)
-
-vision_llm = ChatGroq(
-    api_key=settings.groq_api_key,
-    model_name=settings.llama_vision_model,
-    temperature=settings.groq_temperature,
-    max_tokens=settings.max_tokens
-)
+LLM_BACKENDS = ("groq", "fake", "record", "replay")
+
+
+def _gateway(name: str, max_concurrency: int, requests_per_minute: int, tokens_per_minute: int) -> LLMGateway:
+    return LLMGateway(
+        name,
+        max_concurrency=max_concurrency,
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+        timeout_seconds=settings.llm_timeout_seconds,
+        max_retries=settings.llm_max_retries,
+        retry_base_delay=settings.llm_retry_base_delay,
+        retry_max_delay=settings.llm_retry_max_delay,
+        failure_threshold=settings.llm_circuit_failure_threshold,
+        reset_seconds=settings.llm_circuit_reset_seconds,
+    )
+
+
+def _backend(model_name: str) -> BaseChatModel:
+    """The chat model for settings.llm_backend."""
+    if settings.llm_backend not in LLM_BACKENDS:
+        raise ValueError(
+            f"LLM_BACKEND must be one of {', '.join(LLM_BACKENDS)}, not {settings.llm_backend!r}"
+        )
+
+    if settings.llm_backend == "fake":
+        return FakeChatModel(
+            model_name=model_name,
+            latency_ms=settings.llm_fake_latency_ms,
+            latency_sigma=settings.llm_fake_latency_sigma,
+            tokens_per_second=settings.llm_fake_tokens_per_second,
+            tokens_per_second_sigma=settings.llm_fake_tokens_per_second_sigma,
+            reply_tokens=settings.llm_fake_reply_tokens,
+            seed=settings.llm_fake_seed,
+        )
+    if settings.llm_backend == "replay":
+        return RecordReplayChatModel(
+            mode="replay", recordings_dir=settings.llm_recordings_dir, model_name=model_name
+        )
+
+    from langchain_groq import ChatGroq
+
+    # Retries and timeouts are left to the gateway
+    groq_llm = ChatGroq(
+        api_key=settings.groq_api_key,
+        model_name=model_name,
+        temperature=settings.groq_temperature,
+        max_tokens=settings.max_tokens,
+        max_retries=0,
+    )
+    if settings.llm_backend == "record":
+        return RecordReplayChatModel(
+            mode="record",
+            recordings_dir=settings.llm_recordings_dir,
+            model_name=model_name,
+            model=groq_llm,
+        )
+    return groq_llm
+
+
+# The LLMs for text and vision are built on first use, so importing this
+# module neither loads the Groq client nor needs an API key. The gateways cap
+# concurrency and pace calls to the Groq quota, whichever backend answers them.
+@lru_cache(maxsize=None)
+def get_text_llm() -> GatewayChatModel:
+    """The large text model, shared by all requests."""
+    gateway = _gateway(
+        settings.groq_model,
+        settings.llm_text_max_concurrency,
+        settings.llm_text_requests_per_minute,
+        settings.llm_text_tokens_per_minute,
+    )
+    return GatewayChatModel(model=_backend(settings.groq_model), gateway=gateway)
+
+
+@lru_cache(maxsize=None)
+def get_fast_text_llm() -> GatewayChatModel:
+    """Small model for titles and short follow-ups (see ModelRouter)."""
+    gateway = _gateway(
+        settings.groq_fast_model,
+        settings.llm_fast_max_concurrency,
+        settings.llm_fast_requests_per_minute,
+        settings.llm_fast_tokens_per_minute,
+    )
+    return GatewayChatModel(model=_backend(settings.groq_fast_model), gateway=gateway)
+
+
+@lru_cache(maxsize=None)
+def get_vision_llm() -> GatewayChatModel:
+    """The vision model used for image uploads."""
+    gateway = _gateway(
+        settings.llama_vision_model,
+        settings.llm_vision_max_concurrency,
+        settings.llm_vision_requests_per_minute,
+        settings.llm_vision_tokens_per_minute,
+    )
+    return GatewayChatModel(model=_backend(settings.llama_vision_model), gateway=gateway)
@@ -0,0 +1,86 @@
+"""
+Client disconnect detection for assistant requests
+
+While an endpoint waits on the LLM, run_until_disconnect polls the
+connection. If the client has gone, the work is cancelled so that its
+gateway slot and Groq tokens are not spent on a reply nobody will read,
+and ClientDisconnected (an HTTPException with the nginx-style 499 status)
+is raised for the endpoint to mark or roll back what it already saved.
+
+Cancellations are counted per endpoint for GET /aiassistant/llm/stats.
+"""
+
+from typing import Awaitable, Dict, Optional, TypeVar
+import asyncio
+
+from fastapi import HTTPException, Request
+
+from app.core.config import settings
+from app.core.logging import app_logger
+
+T = TypeVar("T")
+
+CLIENT_CLOSED_REQUEST = 499
+
+_cancellations: Dict[str, int] = {}
+
+
+class ClientDisconnected(HTTPException):
+    """The client went away before the response was ready."""
+
+    def __init__(self):
+        super().__init__(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+
+
+def record_cancellation(endpoint: str) -> None:
+    """Count a request abandoned by its client."""
+    _cancellations[endpoint] = _cancellations.get(endpoint, 0) + 1
+    app_logger.info(f"🚫 Cancelled {endpoint}: client disconnected")
+
+
+def get_cancellation_stats() -> Dict[str, int]:
+    """Requests cancelled after a client disconnect, per endpoint."""
+    return dict(_cancellations)
+
+
+async def run_until_disconnect(
+    request: Request,
+    awaitable: Awaitable[T],
+    endpoint: str,
+    poll_seconds: Optional[float] = None,
+) -> T:
+    """
+    Await work, cancelling it if the client disconnects first.
+
+    Args:
+        request: The request whose connection is watched
+        awaitable: The work, typically an LLM call
+        endpoint: Name the cancellation is counted under
+        poll_seconds: Interval between connection checks
+            (defaults to settings.client_disconnect_poll_seconds)
+
+    Returns:
+        The work's result
+
+    Raises:
+        ClientDisconnected: The client went away; the work was cancelled
+    """
+    poll_seconds = poll_seconds or settings.client_disconnect_poll_seconds
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_seconds)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                break
+    finally:
+        if not task.done():
+            task.cancel()
+
+    # Let the work unwind (releasing gateway slots) before reporting
+    await asyncio.wait({task})
+    if not task.cancelled() and task.exception() is None:
+        return task.result()  # Finished just as the client left
+    record_cancellation(endpoint)
+    raise ClientDisconnected()
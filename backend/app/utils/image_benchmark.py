@@ -0,0 +1,112 @@
+"""
+Benchmark for vision-model image preprocessing
+
+Compares the previous preprocessing (two decodes, full-resolution RGB
+conversion, LANCZOS thumbnail, default-quality JPEG) with
+app.utils.image_preprocessing, reporting CPU time per image and the bytes
+sent to the vision model.
+
+Run with your own uploads, or without arguments for synthetic samples
+(a phone photo, a screenshot and a scanned page):
+    python -m app.utils.image_benchmark [image ...]
+"""
+
+from typing import Callable, Dict, List, Tuple
+import base64
+import io
+import statistics
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+from app.utils.image_preprocessing import prepare_image
+
+RUNS = 5
+
+
+def legacy_prepare(file_content: bytes) -> bytes:
+    """The preprocessing used before the single-decode pipeline."""
+    image = Image.open(io.BytesIO(file_content))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    image.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
+    buffered = io.BytesIO()
+    image.save(buffered, format="JPEG")
+    payload = base64.b64encode(buffered.getvalue())
+
+    # Decoded again for metadata
+    image = Image.open(io.BytesIO(file_content))
+    image.load()
+    if hasattr(image, "_getexif"):
+        image._getexif()
+    return payload
+
+
+def current_prepare(file_content: bytes) -> bytes:
+    return base64.b64encode(prepare_image(file_content, "image").data)
+
+
+def synthetic_samples() -> Dict[str, bytes]:
+    """Typical uploads: a phone photo, a screenshot and a scanned page."""
+    samples = {}
+
+    photo = Image.merge(
+        "RGB",
+        [
+            Image.linear_gradient("L").resize((4032, 3024)),
+            Image.effect_noise((4032, 3024), 20).point(lambda v: v // 2 + 64),
+            Image.radial_gradient("L").resize((4032, 3024)),
+        ],
+    )
+    buffer = io.BytesIO()
+    photo.save(buffer, format="JPEG", quality=92)
+    samples["phone photo 4032x3024 JPEG"] = buffer.getvalue()
+
+    def text_page(mode, size, color):
+        page = Image.new(mode, size, color)
+        draw = ImageDraw.Draw(page)
+        for row in range(40, size[1] - 40, 28):
+            draw.text((40, row), f"ALT {row % 97} U/L   AST {row % 61} U/L   ref 7-56", fill=0)
+        return page
+
+    buffer = io.BytesIO()
+    text_page("RGB", (1600, 1200), "white").save(buffer, format="PNG")
+    samples["screenshot 1600x1200 PNG"] = buffer.getvalue()
+
+    buffer = io.BytesIO()
+    text_page("L", (2480, 3508), 255).save(buffer, format="JPEG", quality=90)
+    samples["scanned page 2480x3508 grayscale JPEG"] = buffer.getvalue()
+
+    return samples
+
+
+def measure(prepare: Callable[[bytes], bytes], file_content: bytes) -> Tuple[float, int]:
+    """Median CPU milliseconds over RUNS, and the base64 payload size."""
+    timings = []
+    for _ in range(RUNS):
+        started = time.process_time()
+        payload = prepare(file_content)
+        timings.append(time.process_time() - started)
+    return statistics.median(timings) * 1000, len(payload)
+
+
+def main(paths: List[str]) -> int:
+    if paths:
+        samples = {path: open(path, "rb").read() for path in paths}
+    else:
+        samples = synthetic_samples()
+
+    print(f"{'image':40} {'before ms':>10} {'after ms':>10} {'before KB':>10} {'after KB':>10}")
+    for name, file_content in samples.items():
+        before_ms, before_bytes = measure(legacy_prepare, file_content)
+        after_ms, after_bytes = measure(current_prepare, file_content)
+        print(
+            f"{name[:40]:40} {before_ms:10.1f} {after_ms:10.1f} "
+            f"{before_bytes / 1024:10.1f} {after_bytes / 1024:10.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
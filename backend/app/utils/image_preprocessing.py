@@ -0,0 +1,127 @@
+"""
+Image preprocessing for the vision model
+
+Decodes each upload once. JPEGs are decoded in draft mode, which scales by
+1/2, 1/4 or 1/8 inside the DCT, so a phone photo is never expanded to full
+resolution just to be shrunk. Metadata and EXIF come from the same image
+object, and the output format is picked to send the fewest bytes.
+"""
+
+from dataclasses import dataclass
+from typing import Tuple, Union
+import io
+import os
+
+from PIL import Image
+
+# Sources that are usually screenshots or scans rather than photos; PNG is
+# tried for these as well, since flat colors and text compress well in it
+_GRAPHIC_FORMATS = {"PNG", "GIF", "BMP", "TIFF"}
+
+# EXIF orientation tag values and the transpose that shows the image upright
+_ORIENTATION = 0x0112
+_UPRIGHT = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+@dataclass
+class PreparedImage:
+    """An image encoded for the vision model, with its upload metadata."""
+
+    data: bytes
+    mime_type: str
+    metadata: dict
+
+
+def _target_size(size: Tuple[int, int], max_side: int) -> Tuple[int, int]:
+    """The size thumbnail() will produce, for requesting a matching draft."""
+    scale = min(1.0, max_side / max(size))
+    return max(1, int(size[0] * scale)), max(1, int(size[1] * scale))
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """Convert to RGB or L, placing transparent images on white."""
+    if image.mode in ("RGB", "L"):
+        return image
+    if image.mode == "P" and "transparency" in image.info:
+        image = image.convert("RGBA")
+    if image.mode in ("RGBA", "LA", "PA"):
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image.convert("RGBA"), mask=image.getchannel("A"))
+        return background
+    if image.mode in ("1", "I;16", "I"):
+        return image.convert("L")
+    return image.convert("RGB")
+
+
+def _encode(image: Image.Image, format: str, quality: int = 0) -> bytes:
+    buffer = io.BytesIO()
+    if format == "JPEG":
+        image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    else:
+        # optimize=True triples PNG encode time for ~1% fewer bytes
+        image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def prepare_image(
+    source: Union[bytes, memoryview, str],
+    content_type: str,
+    max_side: int = 1024,
+    jpeg_quality: int = 80,
+) -> PreparedImage:
+    """
+    Decode, downscale and re-encode an upload for the vision model.
+
+    Args:
+        source: The uploaded bytes, or the path of an upload spooled to disk
+        content_type: The upload's content type, recorded in the metadata
+        max_side: Longest side of the image sent to the model
+        jpeg_quality: JPEG quality for the re-encoded image
+
+    Returns:
+        PreparedImage: The encoded image, its MIME type and the upload
+        metadata (format, mode and size as uploaded, EXIF presence, and the
+        format, size and bytes actually sent)
+    """
+    image = Image.open(source if isinstance(source, str) else io.BytesIO(source))
+    exif = image.getexif()
+    metadata = {
+        "format": image.format,
+        "mode": image.mode,
+        "size": image.size,  # (width, height)
+        "content_type": content_type,
+        "file_size": os.path.getsize(source) if isinstance(source, str) else len(source),
+        "has_exif": bool(exif),
+    }
+    graphic = image.format in _GRAPHIC_FORMATS
+    grayscale = image.mode in ("L", "LA", "1", "I;16", "I")
+
+    # No-op for formats without DCT scaling
+    image.draft("L" if grayscale else "RGB", _target_size(image.size, max_side))
+    # Flatten before resizing: palette images would resize with NEAREST
+    image = _flatten(image)
+    image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    # Phone photos are often stored rotated; turn them upright after
+    # shrinking, which is cheaper
+    orientation = exif.get(_ORIENTATION)
+    if orientation in _UPRIGHT:
+        image = image.transpose(_UPRIGHT[orientation])
+
+    data, format = _encode(image, "JPEG", jpeg_quality), "JPEG"
+    if graphic:
+        png = _encode(image, "PNG")
+        if len(png) < len(data):
+            data, format = png, "PNG"
+
+    metadata.update(
+        {"sent_format": format, "sent_size": image.size, "sent_bytes": len(data)}
+    )
+    return PreparedImage(data=data, mime_type=f"image/{format.lower()}", metadata=metadata)
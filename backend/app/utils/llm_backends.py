@@ -0,0 +1,264 @@
+"""
+Offline LLM backends for load testing and reproducible runs
+
+- FakeChatModel answers locally with deterministic text. Its time to first
+  token and token rate are drawn from configurable log-normal
+  distributions, so the assistant can be load-tested without spending
+  Groq quota or picking up upstream variance.
+- RecordReplayChatModel saves each real reply to disk, keyed by a hash of
+  the model, prompt and call options ("record"), then answers from those
+  files alone ("replay").
+
+Both are selected with settings.llm_backend in app.utils.ai_models.
+"""
+
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import tempfile
+import time
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict, PrivateAttr
+
+_FAKE_VOCABULARY = (
+    "patient symptoms results suggest mild moderate elevated normal levels "
+    "consult physician follow-up recommended monitoring hydration rest "
+    "liver function enzymes markers within reference range further testing "
+    "may indicate consider lifestyle diet exercise medication review"
+).split()
+
+
+class ReplayMissError(LookupError):
+    """Raised in replay mode when no recording matches the prompt."""
+
+
+def prompt_key(model_name: str, messages: List[BaseMessage], **kwargs: Any) -> str:
+    """Stable hash of a model call: model, message types and content, options."""
+    payload = {
+        "model": model_name,
+        "messages": [(message.type, message.content) for message in messages],
+        "options": {key: value for key, value in kwargs.items() if value is not None},
+    }
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic local stand-in for a Groq chat model.
+
+    The reply depends only on the prompt and seed. Timings come from a
+    generator seeded with the seed, so a run's sequence of latencies
+    repeats while still following the configured distributions.
+    """
+
+    model_name: str = "fake"
+    latency_ms: float = 400.0  # median time to first token
+    latency_sigma: float = 0.5  # log-normal spread; 0 for a fixed latency
+    tokens_per_second: float = 80.0  # median generation rate
+    tokens_per_second_sigma: float = 0.2
+    reply_tokens: int = 150
+    seed: int = 0
+
+    _timings: random.Random = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._timings = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "seed": self.seed}
+
+    def _reply_tokens(self, messages: List[BaseMessage], max_tokens: Optional[int]) -> List[str]:
+        key = prompt_key(self.model_name, messages)
+        words = random.Random(f"{self.seed}:{key}")
+        count = min(self.reply_tokens, max_tokens or self.reply_tokens)
+        tokens = [f"[fake-{key[:8]}]"]
+        tokens += [words.choice(_FAKE_VOCABULARY) for _ in range(count - 1)]
+        return [tokens[0]] + [" " + token for token in tokens[1:]]
+
+    def _sample_timing(self) -> tuple:
+        """(seconds to first token, seconds per further token)."""
+        first = self.latency_ms / 1000 * math.exp(
+            self._timings.gauss(0, self.latency_sigma)
+        )
+        rate = self.tokens_per_second * math.exp(
+            self._timings.gauss(0, self.tokens_per_second_sigma)
+        )
+        return first, 1 / rate
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = self._reply_tokens(messages, kwargs.get("max_tokens"))
+        first, per_token = self._sample_timing()
+        time.sleep(first + per_token * (len(tokens) - 1))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = self._reply_tokens(messages, kwargs.get("max_tokens"))
+        first, per_token = self._sample_timing()
+        await asyncio.sleep(first + per_token * (len(tokens) - 1))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        tokens = self._reply_tokens(messages, kwargs.get("max_tokens"))
+        first, per_token = self._sample_timing()
+        time.sleep(first)
+        for index, token in enumerate(tokens):
+            if index:
+                time.sleep(per_token)
+            if run_manager:
+                run_manager.on_llm_new_token(token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        tokens = self._reply_tokens(messages, kwargs.get("max_tokens"))
+        first, per_token = self._sample_timing()
+        await asyncio.sleep(first)
+        for index, token in enumerate(tokens):
+            if index:
+                await asyncio.sleep(per_token)
+            if run_manager:
+                await run_manager.on_llm_new_token(token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+class RecordReplayChatModel(BaseChatModel):
+    """Records a model's replies to disk, or replays them without it.
+
+    Recordings are one JSON file per distinct call in recordings_dir, so
+    they can be reviewed, committed with a test run or deleted one by one.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    mode: str  # "record" or "replay"
+    recordings_dir: str
+    model_name: str
+    model: Optional[BaseChatModel] = None  # the real model, for recording
+
+    @property
+    def _llm_type(self) -> str:
+        return f"{self.mode}-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "mode": self.mode}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.recordings_dir, f"{key}.json")
+
+    def _load(self, messages: List[BaseMessage], **kwargs: Any) -> str:
+        key = prompt_key(self.model_name, messages, **kwargs)
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)["content"]
+        except FileNotFoundError:
+            raise ReplayMissError(
+                f"No recorded {self.model_name} reply for prompt {key[:12]} in {self.recordings_dir}"
+            ) from None
+
+    def _save(self, content: str, messages: List[BaseMessage], **kwargs: Any) -> None:
+        key = prompt_key(self.model_name, messages, **kwargs)
+        os.makedirs(self.recordings_dir, exist_ok=True)
+        record = {
+            "model": self.model_name,
+            "prompt": [(message.type, str(message.content)[:200]) for message in messages],
+            "content": content,
+        }
+        # Written whole then renamed, so a concurrent replay never reads half a file
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.recordings_dir, suffix=".tmp", delete=False, encoding="utf-8"
+        ) as f:
+            json.dump(record, f, indent=2)
+        os.replace(f.name, self._path(key))
+
+    @staticmethod
+    def _result(content: str) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.mode == "replay":
+            return self._result(self._load(messages, **kwargs))
+        result = self.model._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        self._save(result.generations[0].message.content, messages, **kwargs)
+        return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.mode == "replay":
+            return self._result(self._load(messages, **kwargs))
+        result = await self.model._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        self._save(result.generations[0].message.content, messages, **kwargs)
+        return result
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if self.mode == "replay":
+            content = self._load(messages, **kwargs)
+            for index, word in enumerate(content.split(" ")):
+                token = word if index == 0 else " " + word
+                if run_manager:
+                    await run_manager.on_llm_new_token(token)
+                yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+            return
+
+        parts = []
+        async for chunk in self.model._astream(
+            messages, stop=stop, run_manager=run_manager, **kwargs
+        ):
+            parts.append(chunk.message.content)
+            yield chunk
+        # Only complete replies are recorded
+        self._save("".join(parts), messages, **kwargs)
@@ -0,0 +1,449 @@
+"""
+LLM gateway - admission control for the Groq chat models
+
+Every call to a wrapped model passes through its gateway, which:
+
+- caps in-flight calls per model with an asyncio semaphore,
+- paces requests and prompt tokens with token buckets sized to the Groq
+  quota (requests and tokens per minute),
+- retries rate-limit (429), server (5xx), connection and timeout errors
+  with jittered exponential backoff, honouring Retry-After,
+- bounds each call with a timeout (for streams: until the next chunk),
+- fails fast through a circuit breaker while Groq keeps failing.
+
+Time spent waiting for a semaphore slot or bucket tokens is recorded as
+queue wait and reported by stats().
+"""
+
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+import asyncio
+import random
+import time
+
+import groq
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict
+
+from app.core.logging import app_logger
+from app.utils.ai_helpers import estimate_tokens
+
+T = TypeVar("T")
+
+# Upstream failures worth retrying and counted by the circuit breaker
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+_RETRYABLE_ERRORS = (groq.APIConnectionError, asyncio.TimeoutError)
+
+
+class LLMUnavailableError(Exception):
+    """Raised without calling Groq while the circuit breaker is open."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an LLM error is transient (rate limit, 5xx, network, timeout)."""
+    if isinstance(error, _RETRYABLE_ERRORS):
+        return True
+    return getattr(error, "status_code", None) in _RETRYABLE_STATUS
+
+
+async def _wait_for(awaitable: Awaitable[T], timeout: float) -> T:
+    """
+    asyncio.wait_for that never loses a cancellation.
+
+    Before Python 3.12, wait_for returns the result instead of raising
+    CancelledError when the awaited step finishes in the same loop turn as
+    the cancel, so a disconnected client's stream would keep running.
+
+    Raises:
+        asyncio.TimeoutError: The awaitable did not finish in time
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        done, _ = await asyncio.wait({task}, timeout=timeout)
+    except BaseException:
+        await _cancel_and_wait(task)
+        raise
+    if not done:
+        await _cancel_and_wait(task)
+        raise asyncio.TimeoutError()
+    return task.result()
+
+
+async def _cancel_and_wait(task: "asyncio.Future") -> None:
+    """Cancel a task and wait until it has stopped (a stream step must end before aclose)."""
+    task.cancel()
+    await asyncio.wait({task})
+    if not task.cancelled():
+        task.exception()  # Retrieved so it is not reported as never retrieved
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait, if it said."""
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Refills at rate_per_minute, holding at most one minute's worth."""
+
+    def __init__(self, rate_per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self._tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """Wait until amount tokens are available, then take them."""
+        amount = min(amount, self.capacity)  # an oversized request waits for a full bucket
+        # The lock keeps waiters in arrival order
+        async with self._lock:
+            self._refill()
+            while self._tokens < amount:
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= amount
+
+
+class CircuitBreaker:
+    """Opens after consecutive upstream failures; one trial call after reset."""
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._clock() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allows_call(self) -> bool:
+        """Whether before_call would let a call through now."""
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self._trial_running)
+
+    def before_call(self) -> bool:
+        """
+        Raise LLMUnavailableError unless a call may go upstream now.
+
+        Returns:
+            True if the call is the half-open trial
+        """
+        if not self.allows_call():
+            raise LLMUnavailableError("AI service is temporarily unavailable")
+        if self.state == "half_open":
+            self._trial_running = True
+            return True
+        return False
+
+    def release_trial(self) -> None:
+        """Free the trial slot of a call that ended without an outcome (cancelled)."""
+        self._trial_running = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_running or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._trial_running:
+                app_logger.warning(
+                    f"⚠️ LLM circuit opened after {self.failures} consecutive failures"
+                )
+            self.opened_at = self._clock()
+        self._trial_running = False
+
+
+class LLMGateway:
+    """Concurrency, rate, retry, timeout and circuit policy for one model."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        timeout_seconds: float = 60.0,
+        max_retries: int = 3,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 8.0,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+    ):
+        self.name = name
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+
+        self.waiting = 0
+        self.in_flight = 0
+        self._queue_waits: Deque[float] = deque(maxlen=1000)
+        self._counts = {"calls": 0, "retries": 0, "timeouts": 0, "failures": 0, "rejected": 0}
+
+    async def _admit(self, prompt_tokens: int) -> None:
+        """Wait for a semaphore slot and rate budget, recording the wait."""
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+            try:
+                if self._requests:
+                    await self._requests.acquire()
+                if self._tokens and prompt_tokens:
+                    await self._tokens.acquire(prompt_tokens)
+            except BaseException:
+                self._semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+        self._queue_waits.append(time.perf_counter() - started)
+        self.in_flight += 1
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def _check_circuit(self) -> bool:
+        try:
+            return self.breaker.before_call()
+        except LLMUnavailableError:
+            self._counts["rejected"] += 1
+            raise
+
+    def _on_error(self, error: BaseException, attempt: int) -> Optional[float]:
+        """Record a failed attempt; return the delay before retrying, or None."""
+        if isinstance(error, asyncio.TimeoutError):
+            self._counts["timeouts"] += 1
+        if not is_retryable(error):
+            # Our request was at fault, not the upstream
+            self.breaker.record_success()
+            return None
+        self.breaker.record_failure()
+        if attempt >= self.max_retries or self.breaker.state == "open":
+            return None
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2**attempt)
+        delay = random.uniform(0, delay)  # full jitter
+        return max(delay, _retry_after(error) or 0.0)
+
+    async def call(self, func: Callable[[], Awaitable[T]], prompt_tokens: int = 0) -> T:
+        """
+        Run one LLM request under the gateway's policy.
+
+        Args:
+            func: Starts the request; called again for each retry
+            prompt_tokens: Estimated prompt size, charged to the token bucket
+
+        Returns:
+            The request's result
+        """
+        self._counts["calls"] += 1
+        attempt = 0
+        while True:
+            trial = self._check_circuit()
+            try:
+                await self._admit(prompt_tokens)
+            except BaseException:
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            try:
+                result = await _wait_for(func(), self.timeout_seconds)
+            except Exception as e:
+                delay = self._on_error(e, attempt)
+                if delay is None:
+                    self._counts["failures"] += 1
+                    raise
+            except BaseException:
+                # Cancelled: neither a success nor an upstream failure
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+            finally:
+                self._release()
+
+            attempt += 1
+            self._counts["retries"] += 1
+            app_logger.warning(
+                f"⚠️ Retrying {self.name} call in {delay:.2f}s (attempt {attempt}/{self.max_retries})"
+            )
+            await asyncio.sleep(delay)
+
+    async def stream(
+        self, func: Callable[[], AsyncIterator[T]], prompt_tokens: int = 0
+    ) -> AsyncIterator[T]:
+        """
+        Stream one LLM request under the gateway's policy.
+
+        The slot is held until the stream ends. Failures before the first
+        chunk are retried; after it they are raised, since the chunks
+        already yielded cannot be taken back. The timeout applies to each
+        wait for the next chunk.
+        """
+        self._counts["calls"] += 1
+        attempt = 0
+        while True:
+            trial = self._check_circuit()
+            try:
+                await self._admit(prompt_tokens)
+            except BaseException:
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            started = False
+            iterator = None
+            try:
+                iterator = func().__aiter__()
+                while True:
+                    try:
+                        chunk = await _wait_for(iterator.__anext__(), self.timeout_seconds)
+                    except StopAsyncIteration:
+                        break
+                    started = True
+                    yield chunk
+            except Exception as e:
+                delay = self._on_error(e, attempt)
+                if delay is None or started:
+                    self._counts["failures"] += 1
+                    raise
+            except BaseException:
+                # Cancelled or closed early: neither a success nor an upstream failure
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            else:
+                self.breaker.record_success()
+                return
+            finally:
+                self._release()
+                # Close the upstream response now, also when cancelled
+                if iterator is not None and hasattr(iterator, "aclose"):
+                    await iterator.aclose()
+
+            attempt += 1
+            self._counts["retries"] += 1
+            app_logger.warning(
+                f"⚠️ Retrying {self.name} stream in {delay:.2f}s (attempt {attempt}/{self.max_retries})"
+            )
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue wait, load, retry and circuit metrics since startup."""
+        waits = sorted(self._queue_waits)
+        return {
+            "model": self.name,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "circuit": self.breaker.state,
+            **self._counts,
+            "queue_wait_ms": {
+                "samples": len(waits),
+                "avg": round(1000 * sum(waits) / len(waits), 1) if waits else 0.0,
+                "p95": round(1000 * waits[int(0.95 * (len(waits) - 1))], 1) if waits else 0.0,
+                "max": round(1000 * waits[-1], 1) if waits else 0.0,
+            },
+        }
+
+
+def _prompt_tokens(messages: List[BaseMessage]) -> int:
+    total = 0
+    for message in messages:
+        if isinstance(message.content, str):
+            total += estimate_tokens(message.content)
+        else:  # Multimodal parts; images are not counted
+            total += sum(
+                estimate_tokens(part.get("text", ""))
+                for part in message.content
+                if isinstance(part, dict)
+            )
+    return total
+
+
+class GatewayChatModel(BaseChatModel):
+    """A chat model whose calls go through an LLMGateway.
+
+    Drop-in for the wrapped model in chains, ainvoke, astream and bind().
+    Synchronous calls bypass the gateway.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    model: BaseChatModel
+    gateway: LLMGateway
+
+    @property
+    def _llm_type(self) -> str:
+        return f"gateway-{self.model._llm_type}"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.model._identifying_params
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return self.model._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return await self.gateway.call(
+            lambda: self.model._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            _prompt_tokens(messages),
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async for chunk in self.gateway.stream(
+            lambda: self.model._astream(messages, stop=stop, run_manager=run_manager, **kwargs),
+            _prompt_tokens(messages),
+        ):
+            yield chunk
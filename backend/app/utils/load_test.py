@@ -0,0 +1,256 @@
+"""
+Load test for the AI assistant endpoints
+
+Drives chat (streamed replies) and file-upload flows against a running
+server at a fixed request rate. Requests start on schedule whether or not
+earlier ones have finished, so a slow server shows up as rising latency
+rather than a lower request rate. Reports p50/p95/p99 latency per flow and,
+for chat, time to first token.
+
+Run the server with a local backend to avoid spending Groq quota:
+    LLM_BACKEND=fake LLM_TEXT_REQUESTS_PER_MINUTE=0 LLM_TEXT_TOKENS_PER_MINUTE=0 \
+        LLM_VISION_REQUESTS_PER_MINUTE=0 uvicorn app.main:app
+
+then, with an access token for a test user:
+    python -m app.utils.load_test --token $TOKEN --rps 5 --duration 60 --upload-ratio 0.2
+
+Leave the *_PER_MINUTE limits set to measure the gateway pacing calls to
+the Groq quota instead (its queue wait is at GET /aiassistant/llm/stats).
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import time
+
+import httpx
+from PIL import Image
+
+PROMPTS = [
+    "What do elevated ALT and AST levels usually indicate?",
+    "How should I prepare for a liver function test?",
+    "Is a bilirubin of 1.4 mg/dL something to worry about?",
+    "What lifestyle changes help with fatty liver disease?",
+    "Can you explain what an albumin test measures?",
+    "What are early symptoms of hepatitis C?",
+]
+
+
+@dataclass
+class FlowResult:
+    """Timings of one flow's requests, in seconds."""
+
+    latencies: List[float] = field(default_factory=list)
+    first_tokens: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    def error(self, reason: str) -> None:
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile, or None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered) + 0.5 - 1e-9))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(results: Dict[str, FlowResult], elapsed: float) -> dict:
+    """Per-flow request counts, error reasons and latency percentiles (ms)."""
+
+    def distribution(values: List[float]) -> Optional[dict]:
+        if not values:
+            return None
+        return {
+            f"p{pct}": round(1000 * percentile(values, pct), 1) for pct in (50, 95, 99)
+        }
+
+    report = {}
+    for flow, result in results.items():
+        completed = len(result.latencies)
+        report[flow] = {
+            "requests": completed + sum(result.errors.values()),
+            "completed": completed,
+            "errors": result.errors,
+            "throughput_rps": round(completed / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": distribution(result.latencies),
+            "time_to_first_token_ms": distribution(result.first_tokens),
+        }
+    return report
+
+
+def sample_image(n: int) -> bytes:
+    """A small PNG that differs per request, so file analyses are not cached."""
+    image = Image.new("RGB", (256, 256), "white")
+    rng = random.Random(n)
+    image.paste(
+        (rng.randrange(256), rng.randrange(256), rng.randrange(256)),
+        (rng.randrange(200), rng.randrange(200), 256, 256),
+    )
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, args: argparse.Namespace):
+        self.client = client
+        self.args = args
+        self.chat_ids: List[int] = []
+        self.results = {"chat": FlowResult(), "upload": FlowResult()}
+        self.upload_file = None
+        if args.upload_file:
+            with open(args.upload_file, "rb") as f:
+                self.upload_file = (os.path.basename(args.upload_file), f.read())
+
+    async def create_chats(self) -> None:
+        for n in range(self.args.chats):
+            response = await self.client.post(
+                "/aiassistant/chats", json={"title": f"Load test {n + 1}"}
+            )
+            response.raise_for_status()
+            self.chat_ids.append(response.json()["id"])
+
+    async def delete_chats(self) -> None:
+        for chat_id in self.chat_ids:
+            await self.client.delete(f"/aiassistant/chats/{chat_id}/")
+
+    def prompt(self, n: int) -> str:
+        prompt = PROMPTS[n % len(PROMPTS)]
+        # Unique by default, so the reply cache does not answer
+        return prompt if self.args.repeat_prompts else f"{prompt} (request {n})"
+
+    async def chat(self, n: int) -> None:
+        result = self.results["chat"]
+        chat_id = self.chat_ids[n % len(self.chat_ids)]
+        started = time.perf_counter()
+        first_token = None
+        event = None
+        async with self.client.stream(
+            "POST",
+            f"/aiassistant/chats/{chat_id}/messages/stream",
+            json={"content": self.prompt(n)},
+        ) as response:
+            if response.status_code != 200:
+                return result.error(f"HTTP {response.status_code}")
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                    if event == "token" and first_token is None:
+                        first_token = time.perf_counter() - started
+                    elif event == "error":
+                        return result.error("stream error")
+        if event != "done":
+            return result.error("stream ended early")
+        result.latencies.append(time.perf_counter() - started)
+        if first_token is not None:
+            result.first_tokens.append(first_token)
+
+    async def upload(self, n: int) -> None:
+        result = self.results["upload"]
+        chat_id = self.chat_ids[n % len(self.chat_ids)]
+        filename, content = self.upload_file or (f"sample-{n}.png", sample_image(n))
+        content_type = "application/pdf" if filename.endswith(".pdf") else "image/png"
+        started = time.perf_counter()
+        response = await self.client.post(
+            f"/aiassistant/chats/{chat_id}/files",
+            files={"file": (filename, content, content_type)},
+            data={"prompt": "Summarize this file."},
+        )
+        if response.status_code != 200:
+            return result.error(f"HTTP {response.status_code}")
+        result.latencies.append(time.perf_counter() - started)
+
+    async def request(self, n: int, flow: str) -> None:
+        try:
+            await (self.upload(n) if flow == "upload" else self.chat(n))
+        except httpx.HTTPError as e:
+            self.results[flow].error(type(e).__name__)
+
+    async def run(self) -> dict:
+        await self.create_chats()
+        flows = random.Random(self.args.seed)
+        total = int(self.args.rps * self.args.duration)
+        tasks = []
+        started = time.perf_counter()
+        try:
+            for n in range(total):
+                # Open loop: start each request on schedule
+                delay = started + n / self.args.rps - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                flow = "upload" if flows.random() < self.args.upload_ratio else "chat"
+                tasks.append(asyncio.create_task(self.request(n, flow)))
+            await asyncio.gather(*tasks)
+        finally:
+            elapsed = time.perf_counter() - started
+            if not self.args.keep_chats:
+                await self.delete_chats()
+        return summarize(self.results, elapsed)
+
+
+def print_report(report: dict) -> None:
+    def cells(distribution: Optional[dict]) -> str:
+        if not distribution:
+            return f"{'-':>8} {'-':>8} {'-':>8}"
+        return " ".join(f"{distribution[p]:>8.0f}" for p in ("p50", "p95", "p99"))
+
+    print(f"{'flow':<8} {'done':>6} {'errors':>6} {'rps':>6}   "
+          f"{'latency p50/p95/p99 ms':>26}   {'first token p50/p95/p99 ms':>26}")
+    for flow, stats in report.items():
+        print(
+            f"{flow:<8} {stats['completed']:>6} {sum(stats['errors'].values()):>6} "
+            f"{stats['throughput_rps']:>6.2f}   {cells(stats['latency_ms']):>26}   "
+            f"{cells(stats['time_to_first_token_ms']):>26}"
+        )
+        for reason, count in stats["errors"].items():
+            print(f"{'':<8} {count} x {reason}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", default=os.environ.get("LOAD_TEST_TOKEN"),
+                        help="Access token of a test user (or LOAD_TEST_TOKEN)")
+    parser.add_argument("--rps", type=float, default=2.0, help="Requests started per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to send for")
+    parser.add_argument("--upload-ratio", type=float, default=0.0,
+                        help="Share of requests that upload a file (0-1)")
+    parser.add_argument("--upload-file", help="File to upload (default: generated PNGs)")
+    parser.add_argument("--chats", type=int, default=10, help="Chats to spread messages over")
+    parser.add_argument("--repeat-prompts", action="store_true",
+                        help="Reuse prompts verbatim, letting the reply cache answer")
+    parser.add_argument("--keep-chats", action="store_true")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+    if not args.token:
+        parser.error("--token or LOAD_TEST_TOKEN is required")
+
+    async def run() -> dict:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+        async with httpx.AsyncClient(
+            base_url=args.base_url,
+            headers={"Authorization": f"Bearer {args.token}"},
+            timeout=args.timeout,
+            limits=limits,
+        ) as client:
+            return await LoadTest(client, args).run()
+
+    report = asyncio.run(run())
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
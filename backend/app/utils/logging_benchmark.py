@@ -0,0 +1,180 @@
+"""
+Benchmark for logging overhead on the request path
+
+A request logs three lines: the API line from LoggingMiddleware, an
+activity line (log_endpoint_activity) and a timing line
+(track_endpoint_performance). This times those three calls on the
+request's thread, with loggers writing directly to their rotating file and
+stdout as before, and with the queue handlers of app.core.logging whose
+listener thread does the writing. The slow disk case adds a fixed delay
+to every file write, as on a busy or network-backed volume.
+
+Console output goes to /dev/null and files to a temporary directory.
+--format json writes the structured lines of LOG_FORMAT=json instead.
+
+    python -m app.utils.logging_benchmark [--requests 5000] [--format json]
+"""
+
+from logging.handlers import QueueListener, TimedRotatingFileHandler
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+import argparse
+import logging
+import os
+import queue
+import statistics
+import sys
+import tempfile
+import time
+
+from app.core.logging import LOG_FORMAT, JsonFormatter, LogWriter, _FeatureQueueHandler
+from app.utils.load_test import percentile
+
+FEATURES = ("api", "aiassistant")
+
+FORMATTERS: Dict[str, Callable[[], logging.Formatter]] = {
+    "text": lambda: logging.Formatter(LOG_FORMAT),
+    "json": JsonFormatter,
+}
+
+
+class SlowFile(TimedRotatingFileHandler):
+    """A log file whose every write takes at least `delay_ms`."""
+
+    delay_ms = 0.0
+
+    def emit(self, record):
+        if self.delay_ms:
+            time.sleep(self.delay_ms / 1000)
+        super().emit(record)
+
+
+class SlowLogWriter(LogWriter):
+    """The listener's LogWriter, with SlowFile log files."""
+
+    def __init__(self, log_dir: Path, make_formatter: Callable[[], logging.Formatter]):
+        super().__init__(log_dir)
+        self.make_formatter = make_formatter
+
+    def _file(self, name):
+        if name not in self.files:
+            handler = SlowFile(self.log_dir / f"{name}.log", when="midnight", encoding="utf-8")
+            handler.setFormatter(self.make_formatter())
+            self.files[name] = handler
+        return self.files[name]
+
+
+def direct_loggers(log_dir: Path, console, make_formatter) -> Dict[str, logging.Logger]:
+    """One file handler and one stdout handler per logger, as before."""
+    loggers = {}
+    for name in FEATURES:
+        logger = logging.getLogger(f"bench.direct.{name}")
+        logger.handlers.clear()
+        file_handler = SlowFile(log_dir / f"{name}.log", when="midnight", encoding="utf-8")
+        console_handler = logging.StreamHandler(console)
+        for handler in (file_handler, console_handler):
+            handler.setFormatter(make_formatter())
+            logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        loggers[name] = logger
+    return loggers
+
+
+def queued_loggers(
+    log_dir: Path, console, make_formatter
+) -> Tuple[Dict[str, logging.Logger], QueueListener]:
+    """Queue handlers drained by a listener thread, as in app.core.logging."""
+    log_queue = queue.SimpleQueue()
+    console_handler = logging.StreamHandler(console)
+    console_handler.setFormatter(make_formatter())
+    listener = QueueListener(log_queue, console_handler, SlowLogWriter(log_dir, make_formatter))
+    listener.start()
+    loggers = {}
+    for name in FEATURES:
+        logger = logging.getLogger(f"bench.queued.{name}")
+        logger.handlers.clear()
+        logger.addHandler(_FeatureQueueHandler(log_queue, name))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        loggers[name] = logger
+    return loggers, listener
+
+
+def request_logs(loggers: Dict[str, logging.Logger]) -> Callable[[int], None]:
+    """The lines one assistant request logs."""
+
+    def run(n: int):
+        path = f"/aiassistant/chats/{n}/messages"
+        loggers["api"].info(
+            f"API Call - Method: POST | Path: {path} | "
+            f"IP: 10.0.0.7 | Status: 200 | Process Time: 0.8123s",
+            extra={"fields": {"method": "POST", "path": path, "ip": "10.0.0.7",
+                              "status": 200, "duration_ms": 812.3}},
+        )
+        loggers["aiassistant"].info(
+            f"✅ Send_Message | User: user{n}@example.com | IP: 10.0.0.7 | chat_id: {n}",
+            extra={"fields": {"action": "send_message", "user": f"user{n}@example.com",
+                              "ip": "10.0.0.7", "success": True, "chat_id": n}},
+        )
+        loggers["aiassistant"].info(
+            "✅ Send_Message completed successfully in 0.812s",
+            extra={"fields": {"action": "send_message", "duration_ms": 812.0, "success": True}},
+        )
+
+    return run
+
+
+def time_requests(run: Callable[[int], None], requests: int) -> List[float]:
+    timings = []
+    for n in range(requests):
+        started = time.perf_counter()
+        run(n)
+        timings.append((time.perf_counter() - started) * 1e6)
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--slow-disk-ms", type=float, default=1.0,
+                        help="Delay per file write in the slow disk case")
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    args = parser.parse_args()
+    make_formatter = FORMATTERS[args.format]
+
+    print(f"{'disk':10} {'logging':8} {'mean us':>9} {'p50 us':>8} {'p99 us':>8} {'drain ms':>9}")
+    with open(os.devnull, "w") as console, tempfile.TemporaryDirectory() as tmp:
+        for disk, delay_ms in (("local", 0.0), ("slow", args.slow_disk_ms)):
+            SlowFile.delay_ms = delay_ms
+            requests = args.requests if not delay_ms else min(args.requests, 500)
+            for mode in ("direct", "queued"):
+                log_dir = Path(tmp) / f"{disk}-{mode}"
+                log_dir.mkdir()
+                listener = None
+                if mode == "direct":
+                    loggers = direct_loggers(log_dir, console, make_formatter)
+                else:
+                    loggers, listener = queued_loggers(log_dir, console, make_formatter)
+
+                timings = time_requests(request_logs(loggers), requests)
+                drain_started = time.perf_counter()
+                if listener is not None:
+                    listener.stop()  # Waits for the writer to catch up
+                drain_ms = (time.perf_counter() - drain_started) * 1000
+                for logger in loggers.values():
+                    for handler in logger.handlers:
+                        handler.close()
+                if listener is not None:
+                    for handler in listener.handlers:
+                        handler.close()
+
+                print(
+                    f"{disk:10} {mode:8} {statistics.mean(timings):9.1f} "
+                    f"{percentile(timings, 50):8.1f} {percentile(timings, 99):8.1f} {drain_ms:9.1f}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
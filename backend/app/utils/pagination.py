@@ -0,0 +1,191 @@
+"""
+Keyset (cursor) pagination helpers
+
+Offset pagination (OFFSET n LIMIT m) gets slower the deeper the page and can
+skip or repeat rows while new rows are being inserted. Keyset pagination
+instead remembers the sort key of the last row returned and asks for rows
+strictly after it, which an index on the sort columns answers directly.
+
+Cursors are opaque to clients: a URL-safe base64 encoding of the last row's
+sort-key values.
+
+Usage:
+    keys = [(Diagnosis.created_at, True), (Diagnosis.id, True)]  # (column, descending)
+    page = paginate(query, keys, limit=20, cursor=cursor, skip=skip)
+    page.next_cursor  # pass back as ?cursor=... to get the next page
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, and_, literal, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+# Response header carrying the cursor for the next page (exposed via CORS)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# (column, descending) pairs, most significant first, ending in a unique column
+KeysetSpec = Sequence[Tuple[Any, bool]]
+
+
+class Page(list):
+    """A list of results that also carries the cursor for the next page."""
+
+    def __init__(self, items, next_cursor: Optional[str] = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode sort-key values into an opaque cursor token."""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    """
+    Decode a cursor token back into sort-key values.
+
+    Raises:
+        HTTPException: If the token is malformed or doesn't match the keyset
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("cursor size mismatch")
+        return [_decode_value(v) for v in values]
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor",
+        )
+
+
+def _after(keys: KeysetSpec, values: Sequence[Any]):
+    """Build the WHERE clause selecting rows that sort after the cursor."""
+    columns = [column for column, _ in keys]
+    directions = {descending for _, descending in keys}
+
+    # Same direction for every key: a single row-value comparison, which
+    # Postgres and SQLite can answer straight from a matching composite index
+    if len(directions) == 1:
+        if directions.pop():
+            return tuple_(*columns) < tuple_(*values)
+        return tuple_(*columns) > tuple_(*values)
+
+    # Mixed directions: (k1 after v1) OR (k1 = v1 AND k2 after v2) OR ...
+    # (values are bound as literals so booleans compare with < and > too)
+    bound = [literal(value, column.type) for (column, _), value in zip(keys, values)]
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        equal_prefix = [keys[j][0] == bound[j] for j in range(i)]
+        after = column < bound[i] if descending else column > bound[i]
+        clauses.append(and_(*equal_prefix, after))
+    return or_(*clauses)
+
+
+def apply_keyset(
+    query, keys: KeysetSpec, limit: int, cursor: Optional[str] = None, skip: int = 0
+):
+    """Apply cursor filter, ORDER BY and OFFSET/LIMIT to a Query or select()."""
+    if cursor:
+        values = decode_cursor(cursor, len(keys))
+        query = query.filter(_after(keys, values))
+
+    query = query.order_by(
+        *[column.desc() if descending else column.asc() for column, descending in keys]
+    )
+
+    if not cursor and skip:
+        query = query.offset(skip)
+
+    # Fetch one extra row to know whether another page exists
+    return query.limit(limit + 1)
+
+
+def _build_page(rows: List[Any], keys: KeysetSpec, limit: int) -> Page:
+    """Trim the extra row and derive the next cursor from the last row kept."""
+    if len(rows) <= limit:
+        return Page(rows)
+
+    rows = rows[:limit]
+    last = rows[-1]
+    next_cursor = encode_cursor([getattr(last, column.key) for column, _ in keys])
+    return Page(rows, next_cursor)
+
+
+def paginate(
+    query: Query,
+    keys: KeysetSpec,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+) -> Page:
+    """
+    Order and page a query, by cursor when given or by offset otherwise.
+
+    Offset pagination is kept for backward compatibility; either way the
+    returned page carries a next_cursor so clients can switch to cursors.
+
+    Args:
+        query: Filtered query without ORDER BY/OFFSET/LIMIT
+        keys: (column, descending) pairs; the last column must be unique
+        limit: Maximum number of rows in the page
+        cursor: Cursor from a previous page's next_cursor
+        skip: Offset, only used when no cursor is given
+
+    Returns:
+        Page: Rows of the page with next_cursor set if more rows exist
+    """
+    rows = apply_keyset(query, keys, limit, cursor, skip).all()
+    return _build_page(rows, keys, limit)
+
+
+async def paginate_async(
+    db: AsyncSession,
+    stmt: Select,
+    keys: KeysetSpec,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+) -> Page:
+    """
+    Async counterpart of paginate() for select() statements.
+
+    Args:
+        db: Async database session
+        stmt: Filtered select() without ORDER BY/OFFSET/LIMIT
+        keys: (column, descending) pairs; the last column must be unique
+        limit: Maximum number of rows in the page
+        cursor: Cursor from a previous page's next_cursor
+        skip: Offset, only used when no cursor is given
+
+    Returns:
+        Page: Rows of the page with next_cursor set if more rows exist
+    """
+    result = await db.execute(apply_keyset(stmt, keys, limit, cursor, skip))
+    return _build_page(list(result.scalars().all()), keys, limit)
+
+
+def set_next_cursor_header(response: Response, page: Page) -> None:
+    """Expose a page's next cursor to the client as a response header."""
+    if getattr(page, "next_cursor", None):
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
@@ -0,0 +1,87 @@
+"""
+PDF text extraction for worker processes
+
+The functions here only use PyPDF2, but spawned workers importing this
+module also run app/utils/__init__ (the password helpers and settings);
+each pool worker pays that once, at start-up. Each call parses the
+document itself, since a PdfReader cannot be shared between processes.
+Documents are passed as a path (spooled uploads, or in-memory PDFs split
+across several tasks, written to disk once) or as bytes for a single task,
+so a file is never pickled into every task.
+"""
+
+from typing import List, Tuple, Union
+import io
+import os
+
+import PyPDF2
+
+PdfSource = Union[bytes, memoryview, str]
+
+
+def _open(source: PdfSource) -> PyPDF2.PdfReader:
+    return PyPDF2.PdfReader(source if isinstance(source, str) else io.BytesIO(source))
+
+
+def read_pdf_metadata(source: PdfSource) -> dict:
+    """Page count and document info of a PDF."""
+    pdf_reader = _open(source)
+
+    metadata = {
+        "num_pages": len(pdf_reader.pages),
+        "content_type": "application/pdf",
+        "file_size": os.path.getsize(source) if isinstance(source, str) else len(source),
+    }
+
+    # Try to get PDF metadata
+    try:
+        pdf_info = pdf_reader.metadata
+        if pdf_info:
+            # Convert datetime objects to strings for JSON serialization
+            creation_date = getattr(pdf_info, "creation_date", None)
+            if creation_date:
+                creation_date = (
+                    creation_date.isoformat()
+                    if hasattr(creation_date, "isoformat")
+                    else str(creation_date)
+                )
+
+            metadata.update(
+                {
+                    "title": getattr(pdf_info, "title", None),
+                    "author": getattr(pdf_info, "author", None),
+                    "creator": getattr(pdf_info, "creator", None),
+                    "producer": getattr(pdf_info, "producer", None),
+                    "creation_date": creation_date,
+                }
+            )
+    except Exception:
+        # Ignore metadata extraction errors
+        pass
+
+    return metadata
+
+
+def extract_page_range(source: PdfSource, start: int, stop: int) -> List[Tuple[int, str]]:
+    """
+    Extract the text of pages start..stop-1.
+
+    Args:
+        source: The PDF bytes or file path
+        start: First page index (0-based)
+        stop: Page index to stop before
+
+    Returns:
+        List[Tuple[int, str]]: (page number, text) for each non-empty page,
+        1-based; a page that fails to extract is reported in its text
+    """
+    pdf_reader = _open(source)
+    pages = []
+    for page_num in range(start, stop):
+        try:
+            page_text = pdf_reader.pages[page_num].extract_text()
+            if page_text.strip():
+                pages.append((page_num + 1, page_text))
+        except Exception as e:
+            pages.append((page_num + 1, f"(Error) Error extracting text: {str(e)}"))
+    return pages
@@ -0,0 +1,112 @@
+"""
+Micro-benchmark for assistant prompt construction
+
+Compares the previous per-message prompt handling (a ChatPromptTemplate
+parsed from the system prompt, history and message on every call, and a
+new chain around it) with AIService's precompiled chat prompt and cached
+chain. Reports microseconds per call for formatting the prompt alone and
+for a full chain call against an instant model, for a few history
+lengths. No LLM is called.
+
+    python -m app.utils.prompt_benchmark
+"""
+
+from typing import Callable, Dict, List
+import asyncio
+import statistics
+import sys
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.core.config import settings
+
+settings.llm_backend = "fake"  # Nothing reaches a model, so no Groq key is needed
+
+from app.services.ai_service import AIService  # noqa: E402
+
+CALLS = 300
+ROUNDS = 5
+
+
+def sample_history(turns: int) -> List[Dict]:
+    history = []
+    for n in range(turns):
+        history.append(
+            {"role": "user", "content": f"My ALT was {40 + n} U/L and AST {30 + n} U/L last week. " * 4}
+        )
+        history.append(
+            {"role": "assistant", "content": "Those values are within or near the reference range. " * 8}
+        )
+    return history
+
+
+def legacy_prompt(service: AIService, message: str, chat_history: List[Dict]) -> ChatPromptTemplate:
+    """The prompt as built for every message before it was precompiled."""
+    messages = [("system", service._get_system_prompt())]
+    for msg in chat_history:
+        role = msg["role"] if msg["role"] in ("user", "system") else "assistant"
+        messages.append((role, msg["content"]))
+    messages.append(("user", message))
+    return ChatPromptTemplate.from_messages(messages)
+
+
+def per_call_us(run: Callable[[], None]) -> float:
+    """Median over ROUNDS of mean microseconds per call."""
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for _ in range(CALLS):
+            run()
+        timings.append((time.perf_counter() - started) / CALLS)
+    return statistics.median(timings) * 1e6
+
+
+def main() -> int:
+    service = AIService()
+    llm = FakeListChatModel(responses=["Your results look normal."])
+    message = "Should I repeat the liver panel?"
+    loop = asyncio.new_event_loop()
+
+    print(f"{'history':>8} {'':12} {'before us':>10} {'after us':>10} {'speedup':>8}")
+    for turns in (0, 5, 20):
+        history = sample_history(turns)
+        cases = {
+            "prompt only": (
+                lambda: legacy_prompt(service, message, history).invoke({"input": message}),
+                lambda: service.chat_prompt.invoke(service._chat_input(message, history)),
+            ),
+            "chain call": (
+                lambda: loop.run_until_complete(
+                    (legacy_prompt(service, message, history) | llm | service.text_parser)
+                    .ainvoke({"input": message})
+                ),
+                lambda: loop.run_until_complete(
+                    service._get_chain(service.chat_prompt, llm)
+                    .ainvoke(service._chat_input(message, history))
+                ),
+            ),
+        }
+        for name, (before, after) in cases.items():
+            before_us, after_us = per_call_us(before), per_call_us(after)
+            print(
+                f"{turns * 2:>8} {name:12} {before_us:10.0f} {after_us:10.0f} "
+                f"{before_us / after_us:7.1f}x"
+            )
+
+    # Text with braces broke the old template parsing outright
+    braces = [{"role": "user", "content": 'My report says {"ALT": 90}'}]
+    try:
+        legacy_prompt(service, message, braces).invoke({"input": message})
+        print("\nbefore: braces in history formatted")
+    except KeyError:
+        print("\nbefore: braces in history fail with KeyError (missing template variable)")
+    service.chat_prompt.invoke(service._chat_input(message, braces))
+    print("after: braces in history formatted")
+    loop.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
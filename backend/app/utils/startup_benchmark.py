@@ -0,0 +1,141 @@
+"""
+Cold start benchmark for the API process
+
+Starts fresh interpreters that import the application (app.main by default)
+and reports the wall time from process start until the app object exists,
+the import time alone, and the resident memory once imported, which is
+what an idle worker holds before its first request. Heavy subsystems are
+imported on first use, so the modules in LAZY_MODULES must not be loaded
+at this point; any that are are listed.
+
+Targets for app.main on a single 2 GHz core with warm disk cache
+(CPython 3.12, SQLite):
+    cold start  <= 2.0 s   (process start to app imported)
+    idle RSS    <= 150 MB  (before the first request)
+The first assistant request then pays about a second more to import
+LangChain and build the models; the first diagnosis loads pandas, joblib
+and the classifier.
+
+    python -m app.utils.startup_benchmark [--runs 5] [--profile importtime.txt] [--check]
+
+--profile writes the `python -X importtime` profile of one import, with
+the slowest modules by cumulative time summarized on screen.
+"""
+
+from typing import Dict, List, Tuple
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+COLD_START_TARGET_SECONDS = 2.0
+IDLE_RSS_TARGET_MB = 150.0
+
+# Loaded by the endpoints that need them, never at import
+LAZY_MODULES = (
+    "langchain_core",
+    "langchain_groq",
+    "groq",
+    "PyPDF2",
+    "PIL",
+    "pandas",
+    "joblib",
+    "tiktoken",
+)
+
+_CHILD = """
+import importlib, json, sys, time
+started = time.perf_counter()
+importlib.import_module({module!r})
+imported = time.perf_counter() - started
+rss_kb = 0
+try:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                rss_kb = int(line.split()[1])
+except OSError:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_kb = peak // 1024 if sys.platform == "darwin" else peak
+print(json.dumps({{
+    "import_s": imported,
+    "rss_mb": rss_kb / 1024,
+    "lazy_loaded": [m for m in {lazy!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(module: str) -> Dict:
+    """Import the module in a fresh interpreter and time it."""
+    code = _CHILD.format(module=module, lazy=LAZY_MODULES)
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    cold_start = time.perf_counter() - started
+    # Application log lines may precede the result
+    return {"cold_start_s": cold_start, **json.loads(result.stdout.strip().splitlines()[-1])}
+
+
+def import_profile(module: str) -> Tuple[str, List[Tuple[int, str]]]:
+    """The -X importtime profile, and (cumulative us, module) slowest first."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            rows.append((int(cumulative), name.rstrip()))
+    return result.stderr, sorted(rows, reverse=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default="app.main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--profile", help="Write the -X importtime profile to this file")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit non-zero if a target is missed or a lazy module is loaded")
+    args = parser.parse_args()
+
+    measure(args.module)  # Warm the disk cache and __pycache__
+    runs = [measure(args.module) for _ in range(args.runs)]
+    cold_start = statistics.median(run["cold_start_s"] for run in runs)
+    import_s = statistics.median(run["import_s"] for run in runs)
+    rss_mb = statistics.median(run["rss_mb"] for run in runs)
+    lazy_loaded = runs[-1]["lazy_loaded"]
+
+    print(f"{args.module}, median of {args.runs} runs")
+    print(f"  cold start   {cold_start:6.2f} s   (target {COLD_START_TARGET_SECONDS} s)")
+    print(f"  imports      {import_s:6.2f} s")
+    print(f"  idle RSS     {rss_mb:6.1f} MB  (target {IDLE_RSS_TARGET_MB:.0f} MB)")
+    print(f"  lazy modules loaded at import: {', '.join(lazy_loaded) or 'none'}")
+
+    if args.profile:
+        profile, slowest = import_profile(args.module)
+        with open(args.profile, "w", encoding="utf-8") as output:
+            output.write(profile)
+        print(f"\nimport profile written to {args.profile}; slowest (cumulative):")
+        shallow = [(us, name) for us, name in slowest if not name.startswith("     ")]
+        for us, name in shallow[:15]:
+            print(f"  {us / 1000:8.1f} ms  {name.strip()}")
+
+    missed = (
+        cold_start > COLD_START_TARGET_SECONDS
+        or rss_mb > IDLE_RSS_TARGET_MB
+        or bool(lazy_loaded)
+    )
+    return 1 if args.check and missed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
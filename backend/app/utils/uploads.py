@@ -0,0 +1,153 @@
+"""
+Size-capped upload ingestion
+
+Reads an UploadFile in chunks, hashing as it goes, and stops with 413 as
+soon as the upload passes its size cap, so an oversized file is never
+buffered whole. Small uploads stay in memory and are handed on as a
+zero-copy memoryview; larger ones are spooled to a named temporary file
+and handed on as a path, which worker processes can open themselves.
+
+Use as a context manager so spooled files are always removed:
+
+    with ingest_upload(model_file, settings.max_model_file_size) as upload:
+        save(upload.open())
+"""
+
+from typing import BinaryIO, Optional, Union
+import hashlib
+import io
+import os
+import tempfile
+
+from fastapi import HTTPException, UploadFile, status
+
+from app.core.config import settings
+
+
+def _too_large(filename: str, max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"{filename} exceeds the {max_bytes / (1024 * 1024):.1f} MB upload limit",
+    )
+
+
+class IngestedUpload:
+    """An upload read under its size cap, in memory or spooled to disk."""
+
+    def __init__(self, filename: str, content_type: str, max_bytes: int, spool_bytes: int):
+        self.filename = filename
+        self.content_type = content_type
+        self.size = 0
+        self.max_bytes = max_bytes
+        self.spool_bytes = spool_bytes
+        self.path: Optional[str] = None  # set once spooled to disk
+        self._buffer: Optional[io.BytesIO] = io.BytesIO()
+        self._spool: Optional[BinaryIO] = None
+        self._hash = hashlib.sha256()
+        self.sha256 = ""
+
+    def write(self, chunk: bytes) -> None:
+        """Append a chunk, raising 413 once the upload exceeds max_bytes."""
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            self.close()
+            raise _too_large(self.filename, self.max_bytes)
+        self._hash.update(chunk)
+
+        if self._spool is None and self.size > self.spool_bytes:
+            self._spool = tempfile.NamedTemporaryFile(
+                prefix="upload-", dir=settings.upload_spool_dir, delete=False
+            )
+            self.path = self._spool.name
+            self._spool.write(self._buffer.getbuffer())
+            self._buffer = None
+        (self._spool or self._buffer).write(chunk)
+
+    def finish(self) -> "IngestedUpload":
+        self.sha256 = self._hash.hexdigest()
+        if self._spool is not None:
+            self._spool.close()
+        return self
+
+    @property
+    def content(self) -> Union[memoryview, str]:
+        """A zero-copy view of an in-memory upload, or the spooled file's path."""
+        return self.path or self._buffer.getbuffer()
+
+    def open(self) -> BinaryIO:
+        """A new reader positioned at the start of the upload."""
+        if self.path:
+            return open(self.path, "rb")
+        return io.BytesIO(self._buffer.getbuffer())
+
+    def close(self) -> None:
+        """Release the buffer and remove any spooled file."""
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass  # Already removed
+        self._buffer = None
+
+    def __enter__(self) -> "IngestedUpload":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _start(upload: UploadFile, max_bytes: int, spool_bytes: Optional[int]) -> IngestedUpload:
+    # Starlette records the parsed size; reject without reading it again
+    if upload.size is not None and upload.size > max_bytes:
+        raise _too_large(upload.filename, max_bytes)
+    return IngestedUpload(
+        upload.filename or "unknown",
+        upload.content_type or "application/octet-stream",
+        max_bytes,
+        settings.upload_spool_bytes if spool_bytes is None else spool_bytes,
+    )
+
+
+def ingest_upload(
+    upload: UploadFile, max_bytes: int, spool_bytes: Optional[int] = None
+) -> IngestedUpload:
+    """
+    Read an upload in chunks under a size cap (for sync endpoints).
+
+    Args:
+        upload: The uploaded file
+        max_bytes: Largest accepted upload; larger ones raise 413
+        spool_bytes: Size above which the upload is spooled to disk
+            (defaults to settings.upload_spool_bytes)
+
+    Returns:
+        IngestedUpload: The upload with its size and SHA-256
+    """
+    ingested = _start(upload, max_bytes, spool_bytes)
+    try:
+        upload.file.seek(0)
+        while chunk := upload.file.read(settings.upload_chunk_bytes):
+            ingested.write(chunk)
+    except BaseException:
+        ingested.close()
+        raise
+    return ingested.finish()
+
+
+async def ingest_upload_async(
+    upload: UploadFile, max_bytes: int, spool_bytes: Optional[int] = None
+) -> IngestedUpload:
+    """Read an upload in chunks under a size cap (for async endpoints)."""
+    ingested = _start(upload, max_bytes, spool_bytes)
+    try:
+        await upload.seek(0)
+        while chunk := await upload.read(settings.upload_chunk_bytes):
+            ingested.write(chunk)
+    except BaseException:
+        ingested.close()
+        raise
+    return ingested.finish()
+